@@ -0,0 +1,87 @@
+"""
+Parallel scaling benchmark for Diffraction.calculateDiffraction.
+Times an energy x deviation map serially and with process pools of growing size and reports speedup and
+parallel efficiency.
+
+Usage: python benchmarks/diffraction_parallel.py [energy_points] [angle_deviation_points]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Run from a checkout without installing the package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orangecontrib.crystal.diffraction.Diffraction import Diffraction
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
+
+
+class QuietDiffraction(Diffraction):
+    """
+    Diffraction that does not log structure factors.
+    """
+    @staticmethod
+    def log(string):
+        pass
+
+
+def sweepSetup(energy_points, angle_deviation_points):
+    return DiffractionSetupSweeps(BraggDiffraction(),
+                                  "Si",
+                                  thickness=100 * 1e-6,
+                                  miller_h=1,
+                                  miller_k=1,
+                                  miller_l=1,
+                                  asymmetry_angle=0.0,
+                                  azimuthal_angle=0.5 * np.pi,
+                                  energy_min=8000,
+                                  energy_max=8100,
+                                  energy_points=energy_points,
+                                  angle_deviation_min=-100e-6,
+                                  angle_deviation_max=100e-6,
+                                  angle_deviation_points=angle_deviation_points)
+
+
+def workerCounts():
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+
+    if counts[-1] != os.cpu_count():
+        counts.append(os.cpu_count())
+
+    return counts
+
+
+def run(energy_points, angle_deviation_points):
+    diffraction_setup = sweepSetup(energy_points, angle_deviation_points)
+
+    # Build the setup caches outside of the timed region.
+    diffraction_setup.energies()
+    diffraction_setup.angleDeviationGrid()
+
+    start = time.perf_counter()
+    QuietDiffraction().calculateDiffraction(diffraction_setup)
+    serial = time.perf_counter() - start
+
+    print("%i energies x %i deviations" % (energy_points, angle_deviation_points))
+    print("%8s %12s %10s %12s" % ("workers", "seconds", "speedup", "efficiency"))
+    print("%8s %12.2f %10.2f %12.2f" % ("serial", serial, 1.0, 1.0))
+
+    for workers in workerCounts():
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            start = time.perf_counter()
+            QuietDiffraction().calculateDiffraction(diffraction_setup, executor=executor)
+            elapsed = time.perf_counter() - start
+
+        print("%8i %12.2f %10.2f %12.2f" % (workers, elapsed, serial / elapsed, serial / elapsed / workers))
+
+
+if __name__ == "__main__":
+    energy_points = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    angle_deviation_points = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    run(energy_points, angle_deviation_points)
@@ -0,0 +1,85 @@
+"""
+Scaling benchmark for Diffraction.calculateDiffraction.
+Times the calculation for growing energy x deviation sweeps and reports the number of kernel evaluations
+and the time per evaluation. For a linear engine both the evaluations per photon and the time per photon
+stay constant while E*D grows.
+
+Usage: python benchmarks/diffraction_scaling.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+# Run from a checkout without installing the package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orangecontrib.crystal.diffraction.Diffraction import Diffraction
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
+
+
+class CountingDiffraction(Diffraction):
+    """
+    Diffraction that counts the kernel evaluations.
+    """
+    def __init__(self):
+        super(CountingDiffraction, self).__init__()
+        self.evaluations = 0
+
+    def _perfectCrystalForEnergy(self, diffraction_setup, energy, *args, **kwargs):
+        perfect_crystal = Diffraction._perfectCrystalForEnergy(self, diffraction_setup, energy, *args, **kwargs)
+        calculate_diffraction_batch = perfect_crystal.calculateDiffractionBatch
+
+        def countingCalculateDiffractionBatch(energies, directions):
+            self.evaluations += len(energies)
+            return calculate_diffraction_batch(energies, directions)
+
+        perfect_crystal.calculateDiffractionBatch = countingCalculateDiffractionBatch
+        return perfect_crystal
+
+    @staticmethod
+    def log(string):
+        pass
+
+
+def sweepSetup(energy_points, angle_deviation_points):
+    return DiffractionSetupSweeps(BraggDiffraction(),
+                                  "Si",
+                                  thickness=100 * 1e-6,
+                                  miller_h=1,
+                                  miller_k=1,
+                                  miller_l=1,
+                                  asymmetry_angle=0.0,
+                                  azimuthal_angle=0.5 * np.pi,
+                                  energy_min=8000,
+                                  energy_max=8100,
+                                  energy_points=energy_points,
+                                  angle_deviation_min=-100e-6,
+                                  angle_deviation_max=100e-6,
+                                  angle_deviation_points=angle_deviation_points)
+
+
+def run(sizes):
+    print("%8s %8s %10s %12s %12s %16s" % ("E", "D", "E*D", "evaluations", "seconds", "us per photon"))
+    for energy_points, angle_deviation_points in sizes:
+        diffraction_setup = sweepSetup(energy_points, angle_deviation_points)
+
+        # Build the setup caches outside of the timed region.
+        diffraction_setup.energies()
+        diffraction_setup.angleDeviationGrid()
+
+        diffraction = CountingDiffraction()
+
+        start = time.perf_counter()
+        diffraction.calculateDiffraction(diffraction_setup)
+        elapsed = time.perf_counter() - start
+
+        photons = energy_points * angle_deviation_points
+        print("%8i %8i %10i %12i %12.3f %16.1f" % (energy_points, angle_deviation_points, photons,
+                                                   diffraction.evaluations, elapsed, 1e6 * elapsed / photons))
+
+
+if __name__ == "__main__":
+    run([(1, 200), (2, 200), (4, 200), (8, 200), (16, 200), (32, 200)])
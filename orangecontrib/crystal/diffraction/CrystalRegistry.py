@@ -0,0 +1,99 @@
+"""
+Process-wide registry of xraylib crystals.
+Every crystal is loaded once with xraylib.Crystal_GetCrystal and shared read-only by all setups.
+"""
+from threading import Lock
+
+import xraylib
+
+
+class FrozenDict(dict):
+    """
+    Read-only dictionary. Copies are the instance itself.
+    """
+
+    def _readOnly(self, *args, **kwargs):
+        raise TypeError("Registered crystals are read-only.")
+
+    __setitem__ = _readOnly
+    __delitem__ = _readOnly
+    clear = _readOnly
+    pop = _readOnly
+    popitem = _readOnly
+    setdefault = _readOnly
+    update = _readOnly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+class FrozenCrystal(FrozenDict):
+    """
+    Read-only xraylib crystal. xraylib accepts it wherever it expects a crystal.
+    Unpickled instances resolve to the registered crystal.
+    """
+
+    def __reduce__(self):
+        return _registeredCrystal, (self["name"],)
+
+
+class CrystalRegistry(object):
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        self._lock = Lock()
+        self._crystals = dict()
+
+    def size(self):
+        """
+        Returns the number of registered crystals.
+        :return: Number of registered crystals.
+        """
+        return len(self._crystals)
+
+    def clear(self):
+        """
+        Removes all registered crystals. Setups keep their references.
+        """
+        with self._lock:
+            self._crystals.clear()
+
+    def crystal(self, crystal_name):
+        """
+        Returns the shared crystal of the given name. Loads it from xraylib on first use.
+        :param crystal_name: The name of the crystal, e.g. Si.
+        :return: Read-only xraylib crystal.
+        """
+        with self._lock:
+            if crystal_name in self._crystals:
+                return self._crystals[crystal_name]
+
+        crystal = xraylib.Crystal_GetCrystal(crystal_name)
+
+        # The atom list is shared as well and must not be modified either.
+        crystal["atom"] = tuple(FrozenDict(atom) for atom in crystal["atom"])
+        frozen_crystal = FrozenCrystal(crystal)
+
+        with self._lock:
+            return self._crystals.setdefault(crystal_name, frozen_crystal)
+
+
+def _registeredCrystal(crystal_name):
+    """
+    Returns the registered crystal of the given name. Used to unpickle FrozenCrystal.
+    :param crystal_name: The name of the crystal.
+    :return: Read-only xraylib crystal.
+    """
+    return crystal_registry.crystal(crystal_name)
+
+
+# Registry shared by all diffraction setups of this process.
+crystal_registry = CrystalRegistry()
@@ -3,21 +3,38 @@ Calculates a crystal diffraction.
 Except for energy all units are in SI. Energy is in eV.
 """
 
+from collections import OrderedDict
+from concurrent.futures import as_completed
+import hashlib
 from math import isnan
+import os
 
-from numpy import pi
-import scipy.constants.codata
+import numpy
 
 from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction, BraggTransmission, LaueDiffraction, LaueTransmission
 from orangecontrib.crystal.diffraction.DiffractionExceptions import ReflectionImpossibleException, TransmissionImpossibleException, \
                                                                     StructureFactorF0isZeroException, StructureFactorFHisZeroException, \
-                                                                    StructureFactorFHbarIsZeroException
+                                                                    StructureFactorFHbarIsZeroException, BraggConditionUnreachableException, \
+                                                                    DiffractionException
 from orangecontrib.crystal.util.Photon import Photon
+from orangecontrib.crystal.util.VectorArray import VectorArray
+from orangecontrib.crystal.diffraction.DiffractionEnergyResult import DiffractionEnergyResult
+from orangecontrib.crystal.diffraction.DiffractionOrientationSweepResult import DiffractionOrientationSweepResult
+from orangecontrib.crystal.diffraction.DiffractionReflectionScanResult import DiffractionReflectionScanResult
 from orangecontrib.crystal.diffraction.DiffractionResult import DiffractionResult
+from orangecontrib.crystal.diffraction.DiffractionSetup import DiffractionSetup
+from orangecontrib.crystal.diffraction.DiffractionSetupAdaptiveSweeps import DiffractionSetupAdaptiveSweeps
+from orangecontrib.crystal.diffraction.DiffractionThicknessSweepResult import DiffractionThicknessSweepResult
 from orangecontrib.crystal.diffraction.PerfectCrystalDiffraction import PerfectCrystalDiffraction
+from orangecontrib.crystal.diffraction.Psi import psiFromStructureFactor
+from orangecontrib.crystal.diffraction.SusceptibilityTable import SusceptibilityTable
 
 
 class Diffraction(object):
+
+    # Version of the calculation as seen by the result store. Increase it whenever a change of the calculation
+    # changes its results, so results stored by older versions are no longer found.
+    RESULT_STORE_VERSION = 1
     
     def __init__(self):
         """
@@ -28,6 +45,78 @@ class Diffraction(object):
         self.setOnProgress(None)
         self.setOnCalculationEnd(None)
 
+        # Calculate structure factors exactly by default.
+        self.setSusceptibilityTolerance(None)
+
+        # Do not cache or store results by default.
+        self.setResultCache(None)
+        self.setResultStore(None)
+
+    def setSusceptibilityTolerance(self, tolerance):
+        """
+        Sets the relative tolerance of the interpolated susceptibility table used for energy sweeps.
+        If None the structure factors are calculated by xraylib for every energy.
+        :param tolerance: Relative interpolation error bound of the structure factors or None.
+        """
+        self._susceptibility_tolerance = tolerance
+
+    def susceptibilityTolerance(self):
+        """
+        Returns the relative tolerance of the interpolated susceptibility table.
+        :return: Relative interpolation error bound of the structure factors or None.
+        """
+        return self._susceptibility_tolerance
+
+    def setResultCache(self, result_cache):
+        """
+        Sets the cache that calculateDiffraction consults before calculating a setup, e.g. diffraction_result_cache.
+        If None every setup is calculated.
+        :param result_cache: DiffractionResultCache or None.
+        """
+        self._result_cache = result_cache
+
+    def resultCache(self):
+        """
+        Returns the cache that calculateDiffraction consults before calculating a setup.
+        :return: DiffractionResultCache or None.
+        """
+        return self._result_cache
+
+    def setResultStore(self, result_store):
+        """
+        Sets the persistent store that calculateDiffraction consults before calculating a setup and saves
+        calculated results to, e.g. result_store. If None results are not persisted.
+        :param result_store: ResultStore or None.
+        """
+        self._result_store = result_store
+
+    def resultStore(self):
+        """
+        Returns the persistent store that calculateDiffraction consults before calculating a setup.
+        :return: ResultStore or None.
+        """
+        return self._result_store
+
+    def _resultCacheKey(self, diffraction_setup):
+        """
+        Returns the key of the results of a setup. Covers the setup and the settings of this instance
+        that change the results.
+        :param diffraction_setup: The diffraction setup.
+        :return: Hashable key.
+        """
+        return (self.__class__.__name__,
+                diffraction_setup.fingerprint(),
+                self._susceptibility_tolerance)
+
+    def calculationSettings(self):
+        """
+        Returns the settings of this instance that change the results, independent of the setup. Results
+        calculated with equal settings can be combined, see calculateDiffractionIncremental.
+        :return: Hashable settings.
+        """
+        return (self.__class__.__name__,
+                self._susceptibility_tolerance)
+
     def _calculatePsiFromStructureFactor(self, unit_cell_volume, photon_in, structure_factor):
         """
         Calculates the Psi as defined in Zachariasen [3-95].
@@ -36,12 +125,7 @@ class Diffraction(object):
         :param structure_factor: Structure factor.
         :return: Psi as defined in Zachariasen [3-95].
         """
-        codata = scipy.constants.codata.physical_constants
-        classical_electron_radius = codata["classical electron radius"][0]
-
-        psi = (-classical_electron_radius * photon_in.wavelength() ** 2 / (pi * unit_cell_volume)) * structure_factor
-
-        return psi
+        return psiFromStructureFactor(unit_cell_volume, photon_in.wavelength(), structure_factor)
 
     @staticmethod
     def log(string):
@@ -90,19 +174,6 @@ class Diffraction(object):
         if self._on_progress is not None:
             self._on_progress(index, angle_deviation_points)
 
-    def _onProgressEveryTenPercent(self, index, angle_deviation_points):
-        """
-        Raises on progress event every ten percent of progression.
-        :param index: Index of current point.
-        :param angle_deviation_points: Number of total points to calculate.
-        """
-        ten_percent = angle_deviation_points / 10
-
-        if((index + 1) % ten_percent == 0 or
-                index == angle_deviation_points):
-
-            self._onProgress(index + 1, angle_deviation_points)
-
     def setOnCalculationEnd(self, on_calculation_end):
         """
         Sets handler for calculation end. The handler is called when the calculation ends.
@@ -128,6 +199,18 @@ class Diffraction(object):
         :param F_H_bar: Structure factor F_H_bar.
         """
         # Check if the given geometry is a valid Bragg/Laue geometry.
+        self._checkGeometry(diffraction_setup, bragg_angle)
+
+        # Check the structure factors.
+        self._checkStructureFactors(F_0, F_H, F_H_bar)
+
+    def _checkGeometry(self, diffraction_setup, bragg_angle):
+        """
+        Checks if the Diffraction/Transmission of the given setup is possible for its asymmetry angle.
+        Raises an exception if impossible.
+        :param diffraction_setup: Diffraction setup.
+        :param bragg_angle: Bragg angle.
+        """
         if diffraction_setup.geometryType() == BraggDiffraction() or diffraction_setup.geometryType() == BraggTransmission():
             if diffraction_setup.asymmetryAngle() >= bragg_angle:
                 raise ReflectionImpossibleException()
@@ -135,6 +218,13 @@ class Diffraction(object):
             if diffraction_setup.asymmetryAngle() <= bragg_angle:
                 raise TransmissionImpossibleException()
 
+    def _checkStructureFactors(self, F_0, F_H, F_H_bar):
+        """
+        Checks if the structure factors allow a reflection. Raises an exception if they vanish.
+        :param F_0: Structure factor F_0.
+        :param F_H: Structure factor F_H.
+        :param F_H_bar: Structure factor F_H_bar.
+        """
         # Check structure factor F_0.
         if abs(F_0.real) < 1e-7 or isnan(F_0.real):
             raise StructureFactorF0isZeroException()
@@ -147,18 +237,34 @@ class Diffraction(object):
         if abs(F_H_bar.real) < 1e-7 or isnan(F_H_bar.real) or abs(F_H_bar.imag) < 1e-7 or isnan(F_H_bar.imag):
             raise StructureFactorFHbarIsZeroException()
 
-    def _perfectCrystalForEnergy(self, diffraction_setup, energy):
+    def _perfectCrystalForEnergy(self, diffraction_setup, energy, susceptibility_table=None, check_geometry=True):
+        """
+        Creates the PerfectCrystalDiffraction of the given energy.
+        :param diffraction_setup: The diffraction setup.
+        :param energy: Energy of the incoming photons.
+        :param susceptibility_table: SusceptibilityTable of the setup to interpolate the structure factors, or None
+                                     to calculate them exactly.
+        :param check_geometry: If False only the structure factors are checked, e.g. if the caller checks the
+                               geometry of several crystal orientations itself.
+        :return: PerfectCrystalDiffraction for the energy.
+        """
 
         # Retrieve bragg angle.
         angle_bragg = diffraction_setup.angleBragg(energy)
 
         # Get structure factors for all relevant lattice vectors 0,H,H_bar.
-        F_0 = diffraction_setup.F0(energy)
-        F_H = diffraction_setup.FH(energy)
-        F_H_bar = diffraction_setup.FH_bar(energy)
+        if susceptibility_table is None:
+            F_0 = diffraction_setup.F0(energy)
+            F_H = diffraction_setup.FH(energy)
+            F_H_bar = diffraction_setup.FH_bar(energy)
+        else:
+            F_0, F_H, F_H_bar = susceptibility_table.structureFactors(energy)
 
         # Check if given Bragg/Laue geometry and given miller indices are possible.
-        self._checkSetup(diffraction_setup, angle_bragg, F_0, F_H, F_H_bar)
+        if check_geometry:
+            self._checkSetup(diffraction_setup, angle_bragg, F_0, F_H, F_H_bar)
+        else:
+            self._checkStructureFactors(F_0, F_H, F_H_bar)
 
         # Log the structure factors.
         self.logStructureFactors(F_0, F_H, F_H_bar)
@@ -199,58 +305,686 @@ class Diffraction(object):
 
         return perfect_crystal
 
-    def _calculateDiffractionForEnergy(self, diffraction_setup, energy, result):
+    def _calculateEnergyResult(self, diffraction_setup, energy, susceptibility_table=None):
+        """
+        Calculates the diffraction/transmission of the incoming photons with the given energy.
+        Adaptive setups refine the angle deviations of the energy.
+        :param diffraction_setup: The diffraction setup.
+        :param energy: Energy of the incoming photons.
+        :param susceptibility_table: SusceptibilityTable of the setup or None, see _createSusceptibilityTable.
+        :return: DiffractionEnergyResult of the energy.
+        """
+        # Get PerfectCrystal instance for the current energy.
+        perfect_crystal = self._perfectCrystalForEnergy(diffraction_setup, energy, susceptibility_table)
+
+        if isinstance(diffraction_setup, DiffractionSetupAdaptiveSweeps):
+            deviations, s_amplitudes, p_amplitudes = self._refineDeviations(diffraction_setup,
+                                                                            energy,
+                                                                            perfect_crystal)
+        else:
+            # Only visit the photons having the current energy.
+            deviations = diffraction_setup.angleDeviationGridByEnergy(energy)
+
+            # Calculate diffraction for all incoming photons at once.
+            s_amplitudes, p_amplitudes = self._calculateAmplitudes(diffraction_setup,
+                                                                   energy,
+                                                                   perfect_crystal,
+                                                                   deviations)
+
+        return DiffractionEnergyResult(energy, deviations, s_amplitudes, p_amplitudes)
+
+    def _calculateDiffractionForEnergy(self, diffraction_setup, energy, result, susceptibility_table=None):
+        """
+        Calculates the diffraction/transmission of one energy and adds it to the result.
+        :param diffraction_setup: The diffraction setup.
+        :param energy: Energy of the incoming photons.
+        :param result: DiffractionResult to add to.
+        :param susceptibility_table: SusceptibilityTable of the setup or None, see _createSusceptibilityTable.
+        :return: DiffractionResult representing this setup.
+        """
+        energy_result = self._calculateEnergyResult(diffraction_setup, energy, susceptibility_table)
+
+        result.addEnergyResult(energy_result)
+
+        # Return diffraction results.
+        return result
+
+    def _energyChunks(self, energies, energies_per_chunk):
+        """
+        Splits the energies into chunks for parallel calculation.
+        :param energies: Energies to split.
+        :param energies_per_chunk: Number of energies per chunk. If None four chunks per CPU are created.
+        :return: List of energy chunks.
+        """
+        if energies_per_chunk is None:
+            number_chunks = 4 * (os.cpu_count() or 1)
+            energies_per_chunk = max(1, -(-len(energies) // number_chunks))
+
+        return [energies[start:start + energies_per_chunk]
+                for start in range(0, len(energies), energies_per_chunk)]
+
+    def _calculateDiffractionParallel(self, diffraction_setup, result, executor, energies_per_chunk,
+                                      susceptibility_table):
+        """
+        Calculates the diffraction/transmission by distributing energy chunks on an executor.
+        The workers write their results in place into the memory-mapped buffers of the result.
+        :param diffraction_setup: The diffraction setup.
+        :param result: Memory-mapped DiffractionResult to fill.
+        :param executor: concurrent.futures executor, e.g. a ProcessPoolExecutor.
+        :param energies_per_chunk: Number of energies per chunk or None.
+        :param susceptibility_table: SusceptibilityTable of the setup or None, see _createSusceptibilityTable.
+        """
+        energies = diffraction_setup.energies()
+        chunks = self._energyChunks(energies, energies_per_chunk)
+
+        futures = [executor.submit(_calculateDiffractionForEnergies,
+                                   self.__class__,
+                                   result,
+                                   chunk,
+                                   susceptibility_table)
+                   for chunk in chunks]
+
+        calculated_energies = 0
+
+        # Report the progress in energies in order of completion.
+        for future in as_completed(futures):
+            calculated_energies += future.result()
+            self._onProgress(calculated_energies, len(energies))
+
+    def _calculateAmplitudes(self, diffraction_setup, energy, perfect_crystal, deviations):
+        """
+        Calculates the complex amplitudes of both polarizations for the given deviations.
+        :param diffraction_setup: The diffraction setup.
+        :param energy: Energy of the incoming photons.
+        :param perfect_crystal: PerfectCrystalDiffraction for the energy.
+        :param deviations: Array of angle deviations.
+        :return: Tuple of complex S and P amplitudes.
+        """
+        photon_directions = diffraction_setup.incomingPhotonDirections(energy, deviations)
+        energies = numpy.full(len(deviations), energy)
+
+        result_deviations = perfect_crystal.calculateDiffractionBatch(energies, photon_directions)
+
+        return result_deviations["S"], result_deviations["P"]
+
+    def _refinementErrors(self, diffraction_setup, deviations, amplitudes):
+        """
+        Estimates the linear interpolation error of intensities and phases on every interval of the deviations.
+        The curvature is estimated by second divided differences at the interval end points.
+        :param diffraction_setup: The adaptive diffraction setup providing the tolerances.
+        :param deviations: Ascending array of angle deviations.
+        :param amplitudes: Complex amplitudes of the polarizations at the deviations.
+        :return: Array of interval errors in units of the tolerances, i.e. values larger than 1 need refinement.
+        """
+        spacings = numpy.diff(deviations)
+        errors = numpy.zeros(len(spacings))
+
+        def intervalErrors(values):
+            slopes = numpy.diff(values) / spacings
+            curvatures = numpy.zeros(len(values))
+            curvatures[1:-1] = numpy.abs(2.0 * numpy.diff(slopes) / (spacings[:-1] + spacings[1:]))
+            curvatures[0] = curvatures[1]
+            curvatures[-1] = curvatures[-2]
+
+            # The linear interpolation error is bounded by max|f''| h^2 / 8.
+            return numpy.maximum(curvatures[:-1], curvatures[1:]) * spacings ** 2 / 8.0
+
+        for amplitude in amplitudes:
+            intensities = numpy.abs(amplitude) ** 2
+            peak_intensity = intensities.max()
+
+            if not peak_intensity > 0.0:
+                continue
+
+            intensity_threshold = diffraction_setup.intensityTolerance() * peak_intensity
+            errors = numpy.maximum(errors, intervalErrors(intensities) / intensity_threshold)
+
+            # Phases are meaningless where the intensity vanishes.
+            phases = numpy.unwrap(numpy.angle(amplitude))
+            significant = (intensities[:-1] > intensity_threshold) & (intensities[1:] > intensity_threshold)
+            phase_errors = intervalErrors(phases) / diffraction_setup.phaseTolerance()
+            errors = numpy.maximum(errors, numpy.where(significant, phase_errors, 0.0))
+
+        return errors
+
+    def _refineDeviations(self, diffraction_setup, energy, perfect_crystal):
+        """
+        Refines the angle deviations of one energy by bisecting the intervals whose estimated interpolation error
+        exceeds the tolerances, largest errors first, until the point budget is spent.
+        :param diffraction_setup: The adaptive diffraction setup.
+        :param energy: Energy of the incoming photons.
+        :param perfect_crystal: PerfectCrystalDiffraction for the energy.
+        :return: Tuple of ascending deviations and the complex S and P amplitudes.
+        """
+        deviations = numpy.sort(diffraction_setup.angleDeviationGridByEnergy(energy))
+        s_amplitudes, p_amplitudes = self._calculateAmplitudes(diffraction_setup, energy, perfect_crystal, deviations)
+
+        while len(deviations) > 2 and len(deviations) < diffraction_setup.angleDeviationMaxPoints():
+            errors = self._refinementErrors(diffraction_setup, deviations, (s_amplitudes, p_amplitudes))
+            spacings = numpy.diff(deviations)
+
+            candidates = numpy.where((errors > 1.0) &
+                                     (spacings > 2.0 * diffraction_setup.angleDeviationMinSpacing()))[0]
+
+            if len(candidates) == 0:
+                break
+
+            budget = diffraction_setup.angleDeviationMaxPoints() - len(deviations)
+            if len(candidates) > budget:
+                candidates = candidates[numpy.argsort(errors[candidates])[::-1][:budget]]
+
+            midpoints = 0.5 * (deviations[candidates] + deviations[candidates + 1])
+            s_midpoints, p_midpoints = self._calculateAmplitudes(diffraction_setup, energy, perfect_crystal, midpoints)
+
+            deviations = numpy.concatenate((deviations, midpoints))
+            order = numpy.argsort(deviations, kind="mergesort")
+            deviations = deviations[order]
+            s_amplitudes = numpy.concatenate((s_amplitudes, s_midpoints))[order]
+            p_amplitudes = numpy.concatenate((p_amplitudes, p_midpoints))[order]
+
+        return deviations, s_amplitudes, p_amplitudes
+
+    def _calculateDiffractionAdaptive(self, diffraction_setup):
+        """
+        Calculates the diffraction/transmission of an adaptive setup. Every energy gets its own refined, generally
+        non-uniform, deviation axis.
+        :param diffraction_setup: The adaptive diffraction setup.
+        :return: DiffractionResult on the refined deviation axes.
+        """
+        # The deviation axes of the result are only known after the refinement.
+        energy_results = list(self.iterateDiffraction(diffraction_setup))
+
+        refined_deviations = OrderedDict((energy_result.energy(), energy_result.angleDeviations())
+                                         for energy_result in energy_results)
+
+        result = DiffractionResult(diffraction_setup.refinedSetup(refined_deviations), 0.0)
+
+        for energy_result in energy_results:
+            result.addEnergyResult(energy_result)
+
+        return result
+
+    def _createSusceptibilityTable(self, diffraction_setup):
+        """
+        Creates the susceptibility table for the energies of the setup if a susceptibility tolerance is set.
+        The table belongs to one calculation and is passed along with it, so calculations of different setups
+        on the same instance, e.g. interleaved generators of iterateDiffraction, do not share tables.
+        :param diffraction_setup: The diffraction setup.
+        :return: SusceptibilityTable or None if the structure factors are calculated exactly.
+        """
+        # Interpolate the structure factors of energy sweeps if requested.
+        if self._susceptibility_tolerance is None or diffraction_setup.energyPoints() <= 1:
+            return None
+
+        return SusceptibilityTable(diffraction_setup,
+                                   diffraction_setup.energyMin(),
+                                   diffraction_setup.energyMax(),
+                                   self._susceptibility_tolerance)
+
+    def iterateDiffraction(self, diffraction_setup):
+        """
+        Calculates the diffraction/transmission given by the setup energy by energy. Yields the results of every
+        energy as soon as it is calculated without materializing a DiffractionResult.
+        Progress is reported as number of calculated energies.
+        :param diffraction_setup: The diffraction setup.
+        :return: Generator of DiffractionEnergyResult in ascending order of energy.
+        """
+        susceptibility_table = self._createSusceptibilityTable(diffraction_setup)
+
+        energies = diffraction_setup.energies()
+
+        # Raise calculation start.
+        self._onCalculationStart()
+
+        for index, energy in enumerate(energies):
+            yield self._calculateEnergyResult(diffraction_setup, energy, susceptibility_table)
+
+            # Raise OnProgress event.
+            self._onProgress(index + 1, len(energies))
+
+        # Raise calculation end.
+        self._onCalculationEnd()
+
+    def _calculateDiffractionOnGrid(self, diffraction_setup, executor, energies_per_chunk, susceptibility_table):
+        """
+        Calculates the diffraction/transmission for the incoming photons of the setup.
+        :param diffraction_setup: The diffraction setup.
+        :param executor: concurrent.futures executor or None.
+        :param energies_per_chunk: Number of energies per chunk if an executor is given.
+        :param susceptibility_table: SusceptibilityTable of the setup or None, see _createSusceptibilityTable.
+        :return: DiffractionResult representing this setup.
+        """
+        # Create DiffractionResult instance. Parallel workers write into memory-mapped buffers.
+        result = DiffractionResult(diffraction_setup, 0.0, memory_mapped=executor is not None)
+
+        energies = diffraction_setup.energies()
+
+        try:
+            # Raise calculation start.
+            self._onCalculationStart()
+
+            if executor is None:
+                for index, energy in enumerate(energies):
+                    self._calculateDiffractionForEnergy(diffraction_setup, energy, result, susceptibility_table)
+
+                    # Raise OnProgress event.
+                    self._onProgress(index + 1, len(energies))
+            else:
+                self._calculateDiffractionParallel(diffraction_setup, result, executor, energies_per_chunk,
+                                                   susceptibility_table)
+
+            # Raise calculation end.
+            self._onCalculationEnd()
+        finally:
+            result.releaseBuffers()
+
+        return result
+
+    def calculateDiffraction(self, diffraction_setup, executor=None, energies_per_chunk=None):
         """
         Calculates the diffraction/transmission given by the setup.
+        The calculation start and end events are raised once. Progress is reported as number of calculated energies,
+        with executor once per finished chunk. Results served from the result cache or store raise only start and end.
+        :param diffraction_setup: The diffraction setup. DiffractionSetupAdaptiveSweeps are refined adaptively
+                                  and calculated without executor.
+        :param executor: Optional concurrent.futures executor, e.g. a ProcessPoolExecutor. If given the energies
+                         are split into chunks that are calculated by the executor.
+        :param energies_per_chunk: Number of energies per chunk if an executor is given.
+                                   If None four chunks per CPU are created.
+        :return: DiffractionResult representing this setup. With a result cache results are shared and
+                 read-only, see DiffractionResult.setReadOnly.
+        """
+        if self._result_cache is None and self._result_store is None:
+            return self._calculateDiffractionUncached(diffraction_setup, executor, energies_per_chunk)
+
+        key = self._resultCacheKey(diffraction_setup)
+        result = self._knownResult(diffraction_setup, key)
+
+        if result is None:
+            result = self._calculateDiffractionUncached(diffraction_setup, executor, energies_per_chunk)
+            self._keepResult(key, result)
+        else:
+            # Report the cached calculation as done.
+            self._onCalculationStart()
+            self._onCalculationEnd()
+
+        return result
+
+    def calculateDiffractionIncremental(self, diffraction_setup, previous_result):
+        """
+        Calculates the diffraction/transmission given by the setup reusing the grid points of a previous result
+        of an otherwise identical setup, e.g. after widening the angle deviation range, adding energy points or
+        increasing the angular resolution. Only new grid points are calculated.
+        Falls back to calculateDiffraction if the crystal of the previous result differs, it was calculated with other
+        settings, e.g. another susceptibility tolerance, or the setup is adaptive.
         :param diffraction_setup: The diffraction setup.
+        :param previous_result: DiffractionResult calculated by a Diffraction, or None.
         :return: DiffractionResult representing this setup.
         """
-        # Get PerfectCrystal instance for the current energy.
-        perfect_crystal = self._perfectCrystalForEnergy(diffraction_setup, energy)
+        if previous_result is None or \
+                isinstance(diffraction_setup, DiffractionSetupAdaptiveSweeps) or \
+                previous_result.calculationSettings() != self.calculationSettings() or \
+                previous_result.diffractionSetup().physicsFingerprint() != diffraction_setup.physicsFingerprint():
+            return self.calculateDiffraction(diffraction_setup)
+
+        key = self._resultCacheKey(diffraction_setup)
+        result = self._knownResult(diffraction_setup, key)
+
+        if result is not None:
+            self._onCalculationStart()
+            self._onCalculationEnd()
+            return result
+
+        result = DiffractionResult(diffraction_setup, 0.0)
+        result.setCalculationSettings(self.calculationSettings())
+
+        susceptibility_table = self._createSusceptibilityTable(diffraction_setup)
+
+        energies = diffraction_setup.energies()
+
+        self._onCalculationStart()
+
+        for index, energy in enumerate(energies):
+            deviations = result.angleDeviationsByEnergy(energy)
+            known, known_s_amplitudes, known_p_amplitudes = previous_result.knownAmplitudes(energy, deviations)
+
+            s_amplitudes = numpy.zeros(len(deviations), dtype=numpy.complex128)
+            p_amplitudes = numpy.zeros(len(deviations), dtype=numpy.complex128)
+            s_amplitudes[known] = known_s_amplitudes
+            p_amplitudes[known] = known_p_amplitudes
+
+            # Calculate the new grid points only.
+            if not known.all():
+                perfect_crystal = self._perfectCrystalForEnergy(diffraction_setup, energy, susceptibility_table)
+                s_amplitudes[~known], p_amplitudes[~known] = self._calculateAmplitudes(diffraction_setup,
+                                                                                       energy,
+                                                                                       perfect_crystal,
+                                                                                       deviations[~known])
+
+            result.setAmplitudesByEnergy(energy, s_amplitudes, p_amplitudes)
+
+            self._onProgress(index + 1, len(energies))
+
+        self._onCalculationEnd()
+
+        if self._result_cache is not None or self._result_store is not None:
+            self._keepResult(key, result)
+
+        return result
+
+    def calculateThicknessSweep(self, diffraction_setup):
+        """
+        Calculates the diffraction/transmission of a thickness sweep. The thickness independent eigen-solution is
+        calculated once per energy and deviation and all thicknesses are evaluated from it at once.
+        Progress is reported as number of calculated energies.
+        :param diffraction_setup: DiffractionSetupThicknessSweeps.
+        :return: DiffractionThicknessSweepResult holding one DiffractionResult per thickness.
+        """
+        thicknesses = diffraction_setup.thicknesses()
+        results = [DiffractionResult(diffraction_setup.thicknessSetup(thickness), 0.0)
+                   for thickness in thicknesses]
+
+        susceptibility_table = self._createSusceptibilityTable(diffraction_setup)
+
+        energies = diffraction_setup.energies()
 
         # Raise calculation start.
         self._onCalculationStart()
 
-        # For every deviation from Bragg angle ...
-        for index, deviation in enumerate(diffraction_setup.angleDeviationGrid()):
+        for index, energy in enumerate(energies):
+            perfect_crystal = self._perfectCrystalForEnergy(diffraction_setup, energy, susceptibility_table)
+
+            deviations = results[0].angleDeviationsByEnergy(energy)
+            photon_directions = diffraction_setup.incomingPhotonDirections(energy, deviations)
+
+            amplitudes = perfect_crystal.calculateDiffractionThicknessSweep(numpy.full(len(deviations), energy),
+                                                                            photon_directions,
+                                                                            thicknesses)
+
+            for thickness_index, result in enumerate(results):
+                result.setAmplitudesByEnergy(energy,
+                                             amplitudes["S"][thickness_index],
+                                             amplitudes["P"][thickness_index])
 
-            # Raise OnProgress event if progressed by 10 percent.
-            self._onProgressEveryTenPercent(index, diffraction_setup.angleDeviationPoints())
+            # Raise OnProgress event.
+            self._onProgress(index + 1, len(energies))
 
-            # Calculate deviated incoming photon.
-            photon_direction = diffraction_setup.incomingPhotonDirection(energy, deviation)
-            photon_in = Photon(energy, photon_direction)
+        # Raise calculation end.
+        self._onCalculationEnd()
 
-            # Calculate diffraction for current incoming photon.
-            result_deviation = perfect_crystal.calculateDiffraction(photon_in)
+        return DiffractionThicknessSweepResult(thicknesses, results)
 
-            # Calculate polarization difference between sigma and pi polarization.
-            polarization_difference = result_deviation["S"] / result_deviation["P"]
+    def calculateOrientationSweep(self, diffraction_setup):
+        """
+        Calculates the diffraction/transmission of an orientation sweep. Structure factors and psi values are
+        calculated once per energy, only the geometry is evaluated for all orientations at once.
+        Orientations that are geometrically impossible at an energy get NaN amplitudes instead of raising.
+        Progress is reported as number of calculated energies.
+        :param diffraction_setup: DiffractionSetupOrientationSweeps.
+        :return: DiffractionOrientationSweepResult holding one DiffractionResult per orientation.
+        """
+        orientations = diffraction_setup.orientations()
+        results = [DiffractionResult(diffraction_setup.orientationSetup(asymmetry_angle, azimuthal_angle), 0.0)
+                   for asymmetry_angle, azimuthal_angle in orientations]
 
-            # Add result of current deviation.
-            result.add(energy,
-                       deviation,
-                       result_deviation["S"],
-                       result_deviation["P"],
-                       polarization_difference)
+        # The Bragg normals depend on the orientation only.
+        normals_bragg = diffraction_setup.normalsBragg(orientations[:, 0], orientations[:, 1]).components()
+
+        susceptibility_table = self._createSusceptibilityTable(diffraction_setup)
+
+        energies = diffraction_setup.energies()
+
+        # Raise calculation start.
+        self._onCalculationStart()
+
+        for index, energy in enumerate(energies):
+            perfect_crystal = self._perfectCrystalForEnergy(diffraction_setup, energy, susceptibility_table,
+                                                            check_geometry=False)
+            angle_bragg = diffraction_setup.angleBragg(energy)
+
+            # Valid Bragg/Laue geometries, see _checkGeometry.
+            if diffraction_setup.geometryType() == BraggDiffraction() or \
+                    diffraction_setup.geometryType() == BraggTransmission():
+                possible = orientations[:, 0] < angle_bragg
+            else:
+                possible = orientations[:, 0] > angle_bragg
+
+            deviations = results[0].angleDeviationsByEnergy(energy)
+            number_deviations = len(deviations)
+
+            s_amplitudes = numpy.full((len(orientations), number_deviations), numpy.nan, dtype=numpy.complex128)
+            p_amplitudes = numpy.full((len(orientations), number_deviations), numpy.nan, dtype=numpy.complex128)
+
+            if possible.any():
+                # One photon per possible orientation and deviation, orientation major.
+                number_possible = numpy.count_nonzero(possible)
+                photon_deviations = numpy.tile(deviations, number_possible)
+                photon_asymmetry_angles = numpy.repeat(orientations[possible, 0], number_deviations)
+                photon_directions = diffraction_setup.incomingPhotonDirections(energy,
+                                                                               photon_deviations,
+                                                                               photon_asymmetry_angles)
+                photon_normals_bragg = VectorArray(numpy.repeat(normals_bragg[possible], number_deviations, axis=0))
+
+                amplitudes = perfect_crystal.calculateDiffractionOrientationSweep(numpy.full(len(photon_deviations),
+                                                                                             energy),
+                                                                                  photon_directions,
+                                                                                  photon_normals_bragg)
+
+                s_amplitudes[possible] = amplitudes["S"].reshape(-1, number_deviations)
+                p_amplitudes[possible] = amplitudes["P"].reshape(-1, number_deviations)
+
+            for orientation_index, result in enumerate(results):
+                result.setAmplitudesByEnergy(energy,
+                                             s_amplitudes[orientation_index],
+                                             p_amplitudes[orientation_index])
+
+            # Raise OnProgress event.
+            self._onProgress(index + 1, len(energies))
 
         # Raise calculation end.
         self._onCalculationEnd()
 
-        # Return diffraction results.
+        return DiffractionOrientationSweepResult(diffraction_setup.asymmetryAngles(),
+                                                 diffraction_setup.azimuthalAngles(),
+                                                 results)
+
+    def _reflectionImpossibility(self, reflection_setup):
+        """
+        Checks before any calculation if a reflection is possible at all energies of its setup. Cheaper than
+        _checkSetup: needs the Bragg angles only and no structure factors.
+        :param reflection_setup: The diffraction setup of the reflection.
+        :return: DiffractionException telling why the reflection is impossible or None if it is possible.
+        """
+        if reflection_setup.isForbiddenReflection():
+            return StructureFactorFHisZeroException()
+
+        angles_bragg = reflection_setup.anglesBragg(reflection_setup.energies())
+
+        if numpy.any(numpy.isnan(angles_bragg)):
+            return BraggConditionUnreachableException()
+
+        if reflection_setup.geometryType() == BraggDiffraction() or reflection_setup.geometryType() == BraggTransmission():
+            if reflection_setup.asymmetryAngle() >= angles_bragg.min():
+                return ReflectionImpossibleException()
+        elif reflection_setup.geometryType() == LaueDiffraction() or reflection_setup.geometryType() == LaueTransmission():
+            if reflection_setup.asymmetryAngle() <= angles_bragg.max():
+                return TransmissionImpossibleException()
+
+        return None
+
+    def _calculateReflection(self, reflection_setup):
+        """
+        Calculates the diffraction/transmission of one reflection of a scan without raising events.
+        :param reflection_setup: The diffraction setup of the reflection.
+        :return: DiffractionResult of the reflection.
+        """
+        susceptibility_table = self._createSusceptibilityTable(reflection_setup)
+
+        energy_results = [self._calculateEnergyResult(reflection_setup, energy, susceptibility_table)
+                          for energy in reflection_setup.energies()]
+
+        # Adaptive setups are refined per energy, see _calculateDiffractionAdaptive.
+        if isinstance(reflection_setup, DiffractionSetupAdaptiveSweeps):
+            reflection_setup = reflection_setup.refinedSetup(OrderedDict((energy_result.energy(),
+                                                                          energy_result.angleDeviations())
+                                                                         for energy_result in energy_results))
+
+        result = DiffractionResult(reflection_setup, 0.0)
+        result.setCalculationSettings(self.calculationSettings())
+
+        for energy_result in energy_results:
+            result.addEnergyResult(energy_result)
+
         return result
 
-    def calculateDiffraction(self, diffraction_setup):
+    def calculateReflectionScan(self, diffraction_setup, reflections):
         """
-        Calculates the diffraction/transmission given by the setup.
+        Calculates the diffraction/transmission of many reflections of one crystal, e.g. to survey analyser
+        reflections. The crystal, the energies and the angle deviations are taken from the setup, see
+        DiffractionSetup.reflectionSetup. The crystal is loaded once and the structure factor F_0 is shared by all
+        reflections. Forbidden and geometrically impossible reflections are skipped up front.
+        Progress is reported as number of scanned reflections.
+        :param diffraction_setup: The diffraction setup providing crystal, geometry and photons.
+        :param reflections: List of Miller indices (h, k, l).
+        :return: DiffractionReflectionScanResult indexed by the Miller indices.
+        """
+        reflections = [tuple(int(miller_index) for miller_index in reflection) for reflection in reflections]
+
+        if (0, 0, 0) in reflections:
+            raise ValueError("(0, 0, 0) is not a reflection.")
+
+        scan_result = DiffractionReflectionScanResult()
+
+        # Raise calculation start.
+        self._onCalculationStart()
+
+        for index, reflection in enumerate(reflections):
+            # Screen on a plain copy: setups like DiffractionSetupDarwinSweeps need structure factors to place
+            # their photons.
+            reason = self._reflectionImpossibility(DiffractionSetup.reflectionSetup(diffraction_setup, *reflection))
+
+            if reason is None:
+                reflection_setup = diffraction_setup.reflectionSetup(*reflection)
+
+                try:
+                    if self._result_cache is None and self._result_store is None:
+                        scan_result.addDiffractionResult(reflection, self._calculateReflection(reflection_setup))
+                    else:
+                        key = self._resultCacheKey(reflection_setup)
+                        result = self._knownResult(reflection_setup, key)
+
+                        if result is None:
+                            result = self._calculateReflection(reflection_setup)
+                            self._keepResult(key, result)
+
+                        scan_result.addDiffractionResult(reflection, result)
+                except DiffractionException as exception:
+                    # E.g. a vanishing structure factor F_H_bar the screening cannot foresee.
+                    reason = exception
+
+            if reason is not None:
+                scan_result.addSkippedReflection(reflection, reason)
+
+            # Raise OnProgress event.
+            self._onProgress(index + 1, len(reflections))
+
+        # Raise calculation end.
+        self._onCalculationEnd()
+
+        return scan_result
+
+    def _knownResult(self, diffraction_setup, key):
+        """
+        Looks up the result of a setup in the result cache and then in the result store.
+        :param diffraction_setup: The diffraction setup.
+        :param key: Key of the setup, see _resultCacheKey.
+        :return: DiffractionResult or None if the setup was not calculated before.
+        """
+        if self._result_cache is not None:
+            result = self._result_cache.result(key)
+
+            if result is not None:
+                return result
+
+        if self._result_store is not None:
+            arrays = self._result_store.load(self._resultStoreKey(key))
+
+            if arrays is not None:
+                try:
+                    result = DiffractionResult.fromArrays(diffraction_setup, arrays)
+                except ValueError:
+                    # Malformed or of another format. Recalculate and overwrite it.
+                    return None
+
+                result.setCalculationSettings(self.calculationSettings())
+
+                if self._result_cache is not None:
+                    self._result_cache.store(key, result)
+
+                return result
+
+        return None
+
+    def _keepResult(self, key, result):
+        """
+        Puts a calculated result into the result cache and the result store.
+        :param key: Key of the setup, see _resultCacheKey.
+        :param result: The calculated DiffractionResult.
+        """
+        if self._result_cache is not None:
+            self._result_cache.store(key, result)
+
+        if self._result_store is not None:
+            self._result_store.save(self._resultStoreKey(key), result.asArrays())
+
+    @staticmethod
+    def _resultStoreKey(key):
+        """
+        Returns the file key of a result in the result store. Covers the versions of the calculation and of the
+        stored arrays.
+        :param key: Key of the setup, see _resultCacheKey.
+        :return: Hexadecimal SHA-256 digest of the key.
+        """
+        store_key = (Diffraction.RESULT_STORE_VERSION, DiffractionResult.ARRAYS_FORMAT_VERSION, key)
+
+        return hashlib.sha256(repr(store_key).encode("utf-8")).hexdigest()
+
+    def _calculateDiffractionUncached(self, diffraction_setup, executor, energies_per_chunk):
+        """
+        Calculates the diffraction/transmission given by the setup without consulting the result cache.
         :param diffraction_setup: The diffraction setup.
+        :param executor: concurrent.futures executor or None.
+        :param energies_per_chunk: Number of energies per chunk if an executor is given.
         :return: DiffractionResult representing this setup.
         """
-        # Create DiffractionResult instance.
-        result = DiffractionResult(diffraction_setup, 0.0)
+        if isinstance(diffraction_setup, DiffractionSetupAdaptiveSweeps):
+            result = self._calculateDiffractionAdaptive(diffraction_setup)
+        else:
+            susceptibility_table = self._createSusceptibilityTable(diffraction_setup)
+            result = self._calculateDiffractionOnGrid(diffraction_setup, executor, energies_per_chunk,
+                                                      susceptibility_table)
 
-        for energy in diffraction_setup.energies():
-            self._calculateDiffractionForEnergy(diffraction_setup, energy, result)
+        result.setCalculationSettings(self.calculationSettings())
 
         # Return diffraction results.
         return result
+
+
+def _calculateDiffractionForEnergies(diffraction_class, result, energies, susceptibility_table):
+    """
+    Worker function: calculates the diffraction for a chunk of energies and writes it into the result.
+    Must be a module level function to be usable by process pools.
+    :param diffraction_class: Class of the calling Diffraction. Event handlers are not passed to the workers.
+    :param result: Memory-mapped DiffractionResult. Pickling passes only the buffer file name.
+    :param energies: Energies of this chunk.
+    :param susceptibility_table: SusceptibilityTable of the calling Diffraction or None.
+    :return: Number of calculated energies.
+    """
+    diffraction = diffraction_class()
+
+    diffraction_setup = result.diffractionSetup()
+
+    for energy in energies:
+        diffraction._calculateDiffractionForEnergy(diffraction_setup, energy, result, susceptibility_table)
+
+    return len(energies)
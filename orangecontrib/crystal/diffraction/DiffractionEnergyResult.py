@@ -0,0 +1,90 @@
+"""
+Represents the diffraction results of a single energy as yielded by Diffraction.iterateDiffraction.
+Holds the complex amplitudes as arrays and nothing else, so long energy sweeps can be processed energy by energy.
+"""
+import numpy
+
+
+class DiffractionEnergyResult(object):
+
+    __slots__ = ("_energy", "_angle_deviations", "_s_amplitudes", "_p_amplitudes")
+
+    def __init__(self, energy, angle_deviations, s_amplitudes, p_amplitudes):
+        """
+        Constructor.
+        :param energy: Energy of the incoming photons.
+        :param angle_deviations: Array of angle deviations.
+        :param s_amplitudes: Complex amplitudes of the S polarization at the angle deviations.
+        :param p_amplitudes: Complex amplitudes of the P polarization at the angle deviations.
+        """
+        self._energy = energy
+        self._angle_deviations = angle_deviations
+        self._s_amplitudes = s_amplitudes
+        self._p_amplitudes = p_amplitudes
+
+    def energy(self):
+        """
+        Returns the energy of these results.
+        :return: Energy of these results.
+        """
+        return self._energy
+
+    def angleDeviations(self):
+        """
+        Returns the angle deviations of these results.
+        :return: Angle deviations of these results.
+        """
+        return self._angle_deviations
+
+    def sAmplitudes(self):
+        """
+        Returns the complex amplitudes of the S polarization.
+        :return: Complex amplitudes of the S polarization.
+        """
+        return self._s_amplitudes
+
+    def pAmplitudes(self):
+        """
+        Returns the complex amplitudes of the P polarization.
+        :return: Complex amplitudes of the P polarization.
+        """
+        return self._p_amplitudes
+
+    def differenceAmplitudes(self):
+        """
+        Returns the complex amplitudes of the difference between S and P polarizations, i.e. S/P.
+        Like DiffractionResult the difference is zero where the P amplitude vanishes.
+        :return: Complex amplitudes of the polarization difference.
+        """
+        return numpy.divide(self._s_amplitudes,
+                            self._p_amplitudes,
+                            out=numpy.zeros(len(self._s_amplitudes), dtype=numpy.complex128),
+                            where=self._p_amplitudes != 0)
+
+    def sIntensities(self):
+        """
+        Returns the intensities of the S polarization.
+        :return: Intensities of the S polarization.
+        """
+        return numpy.abs(self._s_amplitudes) ** 2
+
+    def pIntensities(self):
+        """
+        Returns the intensities of the P polarization.
+        :return: Intensities of the P polarization.
+        """
+        return numpy.abs(self._p_amplitudes) ** 2
+
+    def sPhases(self):
+        """
+        Returns the phases of the S polarization.
+        :return: Phases of the S polarization.
+        """
+        return numpy.angle(self._s_amplitudes)
+
+    def pPhases(self):
+        """
+        Returns the phases of the P polarization.
+        :return: Phases of the P polarization.
+        """
+        return numpy.angle(self._p_amplitudes)
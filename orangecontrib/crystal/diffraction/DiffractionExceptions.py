@@ -22,6 +22,13 @@ class TransmissionImpossibleException(DiffractionException):
                                                               "No transmission possible.")
 
 
+class BraggConditionUnreachableException(DiffractionException):
+    def __init__(self):
+        super(BraggConditionUnreachableException, self).__init__("Impossible reflection. "
+                                                                 "Wavelength larger than twice the lattice spacing. "
+                                                                 "No Bragg angle for given energy.")
+
+
 class StructureFactorF0isZeroException(DiffractionException):
     def __init__(self):
         super(StructureFactorF0isZeroException, self).__init__("Structure factor for F_0 is zero.")
@@ -0,0 +1,128 @@
+"""
+Represents the diffraction results of an orientation sweep as calculated by Diffraction.calculateOrientationSweep.
+Holds one DiffractionResult per crystal orientation. All results share the energy and angle deviation axes.
+Amplitudes of orientations that are geometrically impossible at an energy are NaN.
+"""
+import numpy
+
+
+class DiffractionOrientationSweepResult(object):
+
+    def __init__(self, asymmetry_angles, azimuthal_angles, diffraction_results):
+        """
+        Constructor.
+        :param asymmetry_angles: Ascending array of asymmetry angles.
+        :param azimuthal_angles: Ascending array of azimuthal angles.
+        :param diffraction_results: List of DiffractionResult, one per orientation. The azimuthal angle varies
+                                    fastest.
+        """
+        if len(asymmetry_angles) * len(azimuthal_angles) != len(diffraction_results):
+            raise ValueError("Expected one diffraction result per orientation.")
+
+        self._asymmetry_angles = numpy.asarray(asymmetry_angles, dtype=numpy.float64)
+        self._azimuthal_angles = numpy.asarray(azimuthal_angles, dtype=numpy.float64)
+        self._diffraction_results = list(diffraction_results)
+
+    def asymmetryAngles(self):
+        """
+        Returns the asymmetry angles of these results.
+        :return: Array of asymmetry angles.
+        """
+        return self._asymmetry_angles
+
+    def azimuthalAngles(self):
+        """
+        Returns the azimuthal angles of these results.
+        :return: Array of azimuthal angles.
+        """
+        return self._azimuthal_angles
+
+    def diffractionResults(self):
+        """
+        Returns the diffraction results in order of the orientations. The azimuthal angle varies fastest.
+        :return: List of DiffractionResult.
+        """
+        return self._diffraction_results
+
+    def diffractionResultByOrientation(self, asymmetry_angle, azimuthal_angle):
+        """
+        Returns the diffraction result of the orientation that is closest to the given orientation.
+        :param asymmetry_angle: Asymmetry angle to return the result for.
+        :param azimuthal_angle: Azimuthal angle to return the result for.
+        :return: DiffractionResult of the orientation.
+        """
+        asymmetry_index = abs(self._asymmetry_angles - asymmetry_angle).argmin()
+        azimuthal_index = abs(self._azimuthal_angles - azimuthal_angle).argmin()
+
+        return self._diffraction_results[asymmetry_index * len(self._azimuthal_angles) + azimuthal_index]
+
+    def _amplitudesByOrientation(self, energy, deviation, polarization_index):
+        """
+        Returns the complex amplitudes of one polarization at one grid point for all orientations.
+        :param energy: Energy of the grid point. The closest energy is used.
+        :param deviation: Angle deviation of the grid point. The closest deviation is used.
+        :param polarization_index: Index of the polarization, see DiffractionResult.
+        :return: Array of complex amplitudes of shape (asymmetry angles, azimuthal angles).
+        """
+        # All results share the axes, the indices of the first result are valid for all of them.
+        first_result = self._diffraction_results[0]
+        energy_index, deviation_index = first_result.gridIndices(energy, deviation)
+
+        amplitudes = numpy.array([result._amplitudes(polarization_index)[energy_index, deviation_index]
+                                  for result in self._diffraction_results])
+
+        return amplitudes.reshape(len(self._asymmetry_angles), len(self._azimuthal_angles))
+
+    def sAmplitudeByOrientation(self, energy, deviation):
+        """
+        Returns the complex amplitude of the S polarization as function of the orientation.
+        :param energy: Energy to return complex amplitude for.
+        :param deviation: Deviation to return complex amplitude for.
+        :return: Complex amplitudes of the S polarization of shape (asymmetry angles, azimuthal angles).
+        """
+        return self._amplitudesByOrientation(energy, deviation, self._diffraction_results[0].INDEX_POLARIZATION_S)
+
+    def pAmplitudeByOrientation(self, energy, deviation):
+        """
+        Returns the complex amplitude of the P polarization as function of the orientation.
+        :param energy: Energy to return complex amplitude for.
+        :param deviation: Deviation to return complex amplitude for.
+        :return: Complex amplitudes of the P polarization of shape (asymmetry angles, azimuthal angles).
+        """
+        return self._amplitudesByOrientation(energy, deviation, self._diffraction_results[0].INDEX_POLARIZATION_P)
+
+    def sIntensityByOrientation(self, energy, deviation):
+        """
+        Returns the intensity of the S polarization as function of the orientation.
+        :param energy: Energy to return intensity for.
+        :param deviation: Deviation to return intensity for.
+        :return: Intensities of the S polarization of shape (asymmetry angles, azimuthal angles).
+        """
+        return numpy.abs(self.sAmplitudeByOrientation(energy, deviation)) ** 2
+
+    def pIntensityByOrientation(self, energy, deviation):
+        """
+        Returns the intensity of the P polarization as function of the orientation.
+        :param energy: Energy to return intensity for.
+        :param deviation: Deviation to return intensity for.
+        :return: Intensities of the P polarization of shape (asymmetry angles, azimuthal angles).
+        """
+        return numpy.abs(self.pAmplitudeByOrientation(energy, deviation)) ** 2
+
+    def sPhaseByOrientation(self, energy, deviation):
+        """
+        Returns the phase of the S polarization as function of the orientation.
+        :param energy: Energy to return phase for.
+        :param deviation: Deviation to return phase for.
+        :return: Phases of the S polarization of shape (asymmetry angles, azimuthal angles).
+        """
+        return numpy.angle(self.sAmplitudeByOrientation(energy, deviation))
+
+    def pPhaseByOrientation(self, energy, deviation):
+        """
+        Returns the phase of the P polarization as function of the orientation.
+        :param energy: Energy to return phase for.
+        :param deviation: Deviation to return phase for.
+        :return: Phases of the P polarization of shape (asymmetry angles, azimuthal angles).
+        """
+        return numpy.angle(self.pAmplitudeByOrientation(energy, deviation))
@@ -0,0 +1,78 @@
+"""
+Represents the diffraction results of a reflection scan as calculated by Diffraction.calculateReflectionScan.
+Holds one DiffractionResult per possible reflection and the reason why every other reflection was skipped.
+Reflections are indexed by their Miller indices (h, k, l).
+"""
+from collections import OrderedDict
+
+
+class DiffractionReflectionScanResult(object):
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        self._diffraction_results = OrderedDict()
+        self._skipped_reflections = OrderedDict()
+
+    def addDiffractionResult(self, reflection, diffraction_result):
+        """
+        Adds the result of a calculated reflection.
+        :param reflection: Miller indices (h, k, l).
+        :param diffraction_result: DiffractionResult of the reflection.
+        """
+        self._diffraction_results[tuple(reflection)] = diffraction_result
+
+    def addSkippedReflection(self, reflection, reason):
+        """
+        Adds a reflection that was not calculated.
+        :param reflection: Miller indices (h, k, l).
+        :param reason: DiffractionException telling why the reflection is impossible.
+        """
+        self._skipped_reflections[tuple(reflection)] = reason
+
+    def reflections(self):
+        """
+        Returns the calculated reflections in scan order.
+        :return: List of Miller indices (h, k, l).
+        """
+        return list(self._diffraction_results.keys())
+
+    def diffractionResults(self):
+        """
+        Returns the results of the calculated reflections in scan order.
+        :return: List of DiffractionResult.
+        """
+        return list(self._diffraction_results.values())
+
+    def diffractionResultByReflection(self, miller_h, miller_k, miller_l):
+        """
+        Returns the result of a calculated reflection.
+        :param miller_h: Miller index H.
+        :param miller_k: Miller index K.
+        :param miller_l: Miller index L.
+        :return: DiffractionResult of the reflection.
+        """
+        return self._diffraction_results[(miller_h, miller_k, miller_l)]
+
+    def skippedReflections(self):
+        """
+        Returns the reflections that were not calculated.
+        :return: OrderedDict (h, k, l) -> DiffractionException telling why the reflection is impossible.
+        """
+        return self._skipped_reflections
+
+    def __len__(self):
+        """
+        Returns the number of calculated reflections.
+        :return: Number of calculated reflections.
+        """
+        return len(self._diffraction_results)
+
+    def __contains__(self, reflection):
+        """
+        Determines if a reflection was calculated.
+        :param reflection: Miller indices (h, k, l).
+        :return: True if the reflection was calculated. False otherwise.
+        """
+        return tuple(reflection) in self._diffraction_results
@@ -1,6 +1,11 @@
 """
 Represents diffraction results.
 """
+from collections import OrderedDict
+import hashlib
+import os
+import tempfile
+
 import numpy
 
 
@@ -10,26 +15,169 @@ class DiffractionResult(object):
     INDEX_POLARIZATION_P = 1
     INDEX_DIFFERENCE_SP = 2
 
-    def __init__(self, diffraction_setup, bragg_angle):
+    # Version of the arrays returned by asArrays. Increase it whenever their names or meaning change.
+    ARRAYS_FORMAT_VERSION = 1
+
+    def __init__(self, diffraction_setup, bragg_angle, memory_mapped=False):
         """
         Constructor.
         :param diffraction_setup: Setup used for these results.
         :param bragg_angle: Bragg angle of the setup.
+        :param memory_mapped: If True the complex amplitudes are held in a memory-mapped file (in /dev/shm if
+                              available) that parallel workers can write in place. See releaseBuffers.
         """
-        self._diffraction_setup = diffraction_setup.clone()
+        self._diffraction_setup = diffraction_setup.snapshot()
         self._bragg_angle = bragg_angle
 
+        # Settings of the calculation that produced these results, see Diffraction.calculationSettings.
+        self._calculation_settings = None
+
+        # Every energy has its own deviation axis. Axes may differ in length and need not be uniform,
+        # e.g. after adaptive angular sampling. Shorter axes leave the tail of their buffer row unused.
+        # Sweeps use one axis for all energies: equal axes are sorted once and shared.
+        self._deviations_by_energy = list()
+
+        previous_grid = None
+        for energy in self.energies():
+            grid = diffraction_setup.angleDeviationGridByEnergy(energy)
+
+            if previous_grid is None or not (grid is previous_grid or numpy.array_equal(grid, previous_grid)):
+                deviations = numpy.sort(grid)
+
+            self._deviations_by_energy.append(deviations)
+            previous_grid = grid
+
+        # Index maps for point-wise lookups. Deviation maps are built on first use of an energy.
+        self._energy_index_map = dict((energy, index) for index, energy in enumerate(self.energies()))
+        self._deviation_index_maps = [None] * len(self._deviations_by_energy)
+
         number_energies = len(self.energies())
-        number_angles = len(self.angleDeviations())
-        number_polarizations = 3
+        number_angles = max(len(deviations) for deviations in self._deviations_by_energy)
+
+        # The complex amplitudes of the S and P polarizations are stored. Intensities, phases and the polarization
+        # difference S/P are derived on demand and cached until the next change of the amplitudes.
+        self._buffer_shape = (number_energies,
+                              number_angles)
+
+        self._buffer_filename = None
+        self._owns_buffer = False
+        self._views = dict()
+
+        if memory_mapped:
+            self._allocateMemoryMappedBuffers()
+        else:
+            self._s_amplitudes = numpy.zeros(self._buffer_shape, dtype=numpy.complex128)
+            self._p_amplitudes = numpy.zeros(self._buffer_shape, dtype=numpy.complex128)
+
+    def _allocateMemoryMappedBuffers(self):
+        """
+        Allocates the complex amplitudes in one memory-mapped file owned by this instance.
+        """
+        directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        file_descriptor, self._buffer_filename = tempfile.mkstemp(prefix="DiffractionResult_",
+                                                                  suffix=".bin",
+                                                                  dir=directory)
+        os.close(file_descriptor)
+        self._owns_buffer = True
+        self._attachMemoryMappedBuffers("w+")
+
+    def _attachMemoryMappedBuffers(self, mode):
+        """
+        Maps the complex amplitudes from the buffer file.
+        :param mode: numpy.memmap mode.
+        """
+        buffer = numpy.memmap(self._buffer_filename,
+                              dtype=numpy.complex128,
+                              mode=mode,
+                              shape=(2,) + self._buffer_shape)
+        self._s_amplitudes = buffer[0]
+        self._p_amplitudes = buffer[1]
+
+    def isMemoryMapped(self):
+        """
+        Returns True if the complex amplitudes are held in a memory-mapped file.
+        :return: True if memory-mapped, False otherwise.
+        """
+        return self._buffer_filename is not None
+
+    def releaseBuffers(self):
+        """
+        Copies memory-mapped complex amplitudes into process private memory and removes the buffer file.
+        Has no effect on results that are not memory-mapped or on copies that do not own the buffer file.
+        """
+        if not self._owns_buffer:
+            return
+
+        self._s_amplitudes = numpy.array(self._s_amplitudes)
+        self._p_amplitudes = numpy.array(self._p_amplitudes)
+        self._views.clear()
+        self._removeBufferFile()
+
+    def setReadOnly(self):
+        """
+        Marks the complex amplitudes and the deviation axes of these results read-only, e.g. because the results
+        are shared by a DiffractionResultCache. Any later modification raises ValueError.
+        """
+        self._s_amplitudes.setflags(write=False)
+        self._p_amplitudes.setflags(write=False)
+
+        for deviations in self._deviations_by_energy:
+            deviations.setflags(write=False)
+
+        for view in self._views.values():
+            view.setflags(write=False)
+
+    def isReadOnly(self):
+        """
+        Returns True if these results are read-only, see setReadOnly.
+        :return: True if read-only, False otherwise.
+        """
+        return not self._s_amplitudes.flags.writeable
+
+    def _removeBufferFile(self):
+        """
+        Removes the buffer file if this instance owns it.
+        """
+        if self._owns_buffer:
+            self._owns_buffer = False
+            os.remove(self._buffer_filename)
+            self._buffer_filename = None
+
+    def __getstate__(self):
+        """
+        Returns the state for pickling. Memory-mapped buffers are passed by file name, not by content.
+        :return: State of this instance.
+        """
+        state = self.__dict__.copy()
+
+        # Cached views are recomputed on demand.
+        state["_views"] = dict()
 
-        self._intensities = numpy.zeros((number_energies,
-                                         number_angles,
-                                         number_polarizations))
+        if self.isMemoryMapped():
+            del state["_s_amplitudes"]
+            del state["_p_amplitudes"]
+            state["_owns_buffer"] = False
 
-        self._phases = numpy.zeros((number_energies,
-                                    number_angles,
-                                    number_polarizations))
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores the state after unpickling. Memory-mapped buffers are mapped again for writing in place.
+        :param state: State of the instance.
+        """
+        self.__dict__.update(state)
+
+        if self.isMemoryMapped():
+            self._attachMemoryMappedBuffers("r+")
+
+    def __del__(self):
+        """
+        Removes a buffer file that was not released.
+        """
+        try:
+            self._removeBufferFile()
+        except (AttributeError, OSError, TypeError):
+            pass
 
     def diffractionSetup(self):
         """
@@ -38,6 +186,20 @@ class DiffractionResult(object):
         """
         return self._diffraction_setup
 
+    def byteSize(self):
+        """
+        Returns the bytes held by the complex amplitudes and the deviation axes of these results.
+        Derived views like intensities and phases are not included.
+        :return: Size of these results in bytes.
+        """
+        byte_size = self._s_amplitudes.nbytes + self._p_amplitudes.nbytes
+
+        # Shared deviation axes are counted once.
+        byte_size += sum(deviations.nbytes for deviations in
+                         dict((id(deviations), deviations) for deviations in self._deviations_by_energy).values())
+
+        return byte_size
+
     def braggAngle(self):
         """
         Returns Bragg angle used for these results.
@@ -45,6 +207,20 @@ class DiffractionResult(object):
         """
         return self._bragg_angle
 
+    def calculationSettings(self):
+        """
+        Returns the settings of the Diffraction that calculated these results, see Diffraction.calculationSettings.
+        :return: Settings of the calculation or None if unknown.
+        """
+        return self._calculation_settings
+
+    def setCalculationSettings(self, calculation_settings):
+        """
+        Records the settings of the Diffraction that calculated these results.
+        :param calculation_settings: Settings of the calculation, see Diffraction.calculationSettings.
+        """
+        self._calculation_settings = calculation_settings
+
     def energies(self):
         """
         Returns the energies used for these results.
@@ -58,25 +234,188 @@ class DiffractionResult(object):
         :param energy: Energy to find index for.
         :return: Energy index that corresponds to the energy.
         """
-        energy_index = abs(self.energies()-energy).argmin()
+        energy_index = self._energy_index_map.get(energy)
+
+        if energy_index is None:
+            energy_index = abs(self.energies()-energy).argmin()
+
         return energy_index
 
     def angleDeviations(self):
         """
-        Returns the angle deviations used for these results.
+        Returns the angle deviations used for these results. If the energies have different deviation axes
+        this is the axis of the lowest energy. See angleDeviationsByEnergy.
         :return: Angle deviations used for these results.
         """
-        return self._diffraction_setup.angleDeviationGrid()
+        return self._deviations_by_energy[0]
 
-    def _deviationIndexByDeviation(self, deviation):
+    def angleDeviationsByEnergy(self, energy):
+        """
+        Returns the angle deviations used for the given energy in ascending order.
+        :param energy: Energy to return the angle deviations for.
+        :return: Angle deviations used for the given energy.
         """
-        Returns the index of the entry in the angle deviations list that is closest to the given deviation.
+        energy_index = self._energyIndexByEnergy(energy)
+        return self._deviations_by_energy[energy_index]
+
+    def _deviationIndexByDeviation(self, energy_index, deviation):
+        """
+        Returns the index of the entry in the angle deviations of the given energy that is closest
+        to the given deviation.
+        :param energy_index: Index of the energy.
         :param deviation: Deviation to find index for.
         :return: Deviation index that corresponds to the deviation.
         """
-        deviation_index = abs(self.angleDeviations()-deviation).argmin()
+        if self._deviation_index_maps[energy_index] is None:
+            self._deviation_index_maps[energy_index] = dict((deviation, index) for index, deviation
+                                                            in enumerate(self._deviations_by_energy[energy_index]))
+
+        deviation_index = self._deviation_index_maps[energy_index].get(deviation)
+
+        if deviation_index is None:
+            deviation_index = self._nearestDeviationIndices(energy_index, numpy.array([deviation]))[0]
+
         return deviation_index
 
+    def gridIndices(self, energy, deviation):
+        """
+        Returns the indices of the grid point closest to the given energy and deviation, e.g. to index arrays
+        aligned with these results.
+        :param energy: Energy of the grid point. The closest energy is used.
+        :param deviation: Angle deviation of the grid point. The closest deviation of that energy is used.
+        :return: Tuple of energy index and deviation index.
+        """
+        energy_index = self._energyIndexByEnergy(energy)
+
+        return energy_index, self._deviationIndexByDeviation(energy_index, deviation)
+
+    def _nearestDeviationIndices(self, energy_index, deviations):
+        """
+        Returns the indices of the entries in the angle deviations of the given energy that are closest
+        to the given deviations. Uses binary search on the ascending deviation axis.
+        :param energy_index: Index of the energy.
+        :param deviations: Array of deviations to find indices for.
+        :return: Array of deviation indices.
+        """
+        axis = self._deviations_by_energy[energy_index]
+
+        if len(axis) == 1:
+            return numpy.zeros(len(deviations), dtype=int)
+
+        right = numpy.clip(numpy.searchsorted(axis, deviations), 1, len(axis) - 1)
+        left = right - 1
+
+        return numpy.where(deviations - axis[left] <= axis[right] - deviations, left, right)
+
+    def knownAmplitudes(self, energy, deviations, relative_tolerance=1e-12):
+        """
+        Looks up the complex amplitudes of the given grid points among these results. Points are known if the energy
+        and the deviation agree with a point of these results within the relative tolerance, e.g. to reuse results
+        of a sweep with a different range or resolution.
+        :param energy: Energy of the grid points.
+        :param deviations: Array of angle deviations of the grid points.
+        :param relative_tolerance: Relative tolerance of energies and deviations.
+        :return: Tuple of boolean mask of the known deviations and their complex S and P amplitudes.
+        """
+        deviations = numpy.asarray(deviations, dtype=numpy.float64)
+        known = numpy.zeros(len(deviations), dtype=bool)
+
+        energy_index = self._energyIndexByEnergy(energy)
+        if len(deviations) == 0 or not numpy.isclose(self.energies()[energy_index], energy,
+                                                      rtol=relative_tolerance, atol=0.0):
+            return known, numpy.zeros(0, dtype=numpy.complex128), numpy.zeros(0, dtype=numpy.complex128)
+
+        axis = self._deviations_by_energy[energy_index]
+        indices = self._nearestDeviationIndices(energy_index, deviations)
+
+        scale = max(numpy.abs(axis).max(), numpy.abs(deviations).max())
+        known[:] = numpy.abs(axis[indices] - deviations) <= relative_tolerance * scale
+
+        return (known,
+                self._s_amplitudes[energy_index, indices[known]],
+                self._p_amplitudes[energy_index, indices[known]])
+
+    def _deviationIndicesByDeviation(self, deviation):
+        """
+        Returns for every energy the index of the angle deviation that is closest to the given deviation.
+        :param deviation: Deviation to find indices for.
+        :return: Tuple of energy indices and deviation indices to index the buffers with.
+        """
+        energy_indices = numpy.arange(len(self.energies()))
+        deviation_indices = numpy.array([self._deviationIndexByDeviation(energy_index, deviation)
+                                         for energy_index in energy_indices], dtype=int)
+        return energy_indices, deviation_indices
+
+    def _amplitudes(self, polarization_index):
+        """
+        Returns the complex amplitudes of one polarization for all energies and deviations.
+        :param polarization_index: Index of the polarization.
+        :return: Complex amplitudes of shape (energies, deviations).
+        """
+        if polarization_index == self.INDEX_POLARIZATION_S:
+            return self._s_amplitudes
+
+        if polarization_index == self.INDEX_POLARIZATION_P:
+            return self._p_amplitudes
+
+        return self._view("amplitude", polarization_index)
+
+    def _view(self, quantity, polarization_index):
+        """
+        Returns a derived quantity of one polarization for all energies and deviations.
+        Views are calculated on first access and cached until the amplitudes change.
+        :param quantity: "amplitude", "intensity" or "phase".
+        :param polarization_index: Index of the polarization.
+        :return: Array of shape (energies, deviations).
+        """
+        if quantity == "amplitude" and polarization_index != self.INDEX_DIFFERENCE_SP:
+            return self._amplitudes(polarization_index)
+
+        key = (quantity, polarization_index)
+
+        if key not in self._views:
+            if quantity == "amplitude":
+                # Difference between S and P polarization. Unused buffer entries stay zero.
+                self._views[key] = numpy.divide(self._s_amplitudes,
+                                                self._p_amplitudes,
+                                                out=numpy.zeros(self._buffer_shape, dtype=numpy.complex128),
+                                                where=self._p_amplitudes != 0)
+            elif quantity == "intensity":
+                self._views[key] = numpy.abs(self._amplitudes(polarization_index)) ** 2
+            elif quantity == "phase":
+                self._views[key] = numpy.angle(self._amplitudes(polarization_index))
+            else:
+                raise ValueError("Unknown quantity: " + quantity)
+
+            # Views of shared results are shared as well.
+            if self.isReadOnly():
+                self._views[key].setflags(write=False)
+
+        return self._views[key]
+
+    def _byEnergy(self, quantity, energy, polarization_index):
+        """
+        Returns a quantity of one polarization along the deviation axis of the given energy.
+        :param quantity: "amplitude", "intensity" or "phase".
+        :param energy: Energy to return values for.
+        :param polarization_index: Index of the polarization.
+        :return: Values along the deviation axis of the energy.
+        """
+        energy_index = self._energyIndexByEnergy(energy)
+        number_deviations = len(self._deviations_by_energy[energy_index])
+        return self._view(quantity, polarization_index)[energy_index, :number_deviations]
+
+    def _byDeviation(self, quantity, deviation, polarization_index):
+        """
+        Returns a quantity of one polarization at the given deviation for all energies.
+        :param quantity: "amplitude", "intensity" or "phase".
+        :param deviation: Deviation to return values for.
+        :param polarization_index: Index of the polarization.
+        :return: Values along the energy axis.
+        """
+        energy_indices, deviation_indices = self._deviationIndicesByDeviation(deviation)
+        return self._view(quantity, polarization_index)[energy_indices, deviation_indices]
+
     def angles(self):
         """
         Returns the angles used for calculation of these results.
@@ -90,8 +429,7 @@ class DiffractionResult(object):
         :param energy: Energy to return intensity for.
         :return: Intensity of the S polarization.
         """
-        energy_index = self._energyIndexByEnergy(energy)
-        return self._intensities[energy_index, :, self.INDEX_POLARIZATION_S]
+        return self._byEnergy("intensity", energy, self.INDEX_POLARIZATION_S)
 
     def sPhaseByEnergy(self, energy):
         """
@@ -99,8 +437,7 @@ class DiffractionResult(object):
         :param energy: Energy to return phase for.
         :return: Phase of the S polarization.
         """
-        energy_index = self._energyIndexByEnergy(energy)
-        return self._phases[energy_index, :, self.INDEX_POLARIZATION_S]
+        return self._byEnergy("phase", energy, self.INDEX_POLARIZATION_S)
 
     def pIntensityByEnergy(self, energy):
         """
@@ -108,8 +445,7 @@ class DiffractionResult(object):
         :param energy: Energy to return intensity for.
         :return: Intensity of the P polarization.
         """
-        energy_index = self._energyIndexByEnergy(energy)
-        return self._intensities[energy_index, :, self.INDEX_POLARIZATION_P]
+        return self._byEnergy("intensity", energy, self.INDEX_POLARIZATION_P)
 
     def pPhaseByEnergy(self, energy):
         """
@@ -117,8 +453,7 @@ class DiffractionResult(object):
         :param energy: Energy to return phase for.
         :return: Phase of the P polarization.
         """
-        energy_index = self._energyIndexByEnergy(energy)
-        return self._phases[energy_index, :, self.INDEX_POLARIZATION_P]
+        return self._byEnergy("phase", energy, self.INDEX_POLARIZATION_P)
 
     def differenceIntensityByEnergy(self, energy):
         """
@@ -126,8 +461,7 @@ class DiffractionResult(object):
         :param energy: Energy to return intensity for.
         :return: Intensity of the  difference between the S and P polarization.
         """
-        energy_index = self._energyIndexByEnergy(energy)
-        return self._intensities[energy_index, :, self.INDEX_DIFFERENCE_SP]
+        return self._byEnergy("intensity", energy, self.INDEX_DIFFERENCE_SP)
 
     def differencePhaseByEnergy(self, energy):
         """
@@ -135,8 +469,7 @@ class DiffractionResult(object):
         :param energy: Energy to return phase for.
         :return: Phase of the difference between S and P polarization.
         """
-        energy_index = self._energyIndexByEnergy(energy)
-        return self._phases[energy_index, :, self.INDEX_DIFFERENCE_SP]
+        return self._byEnergy("phase", energy, self.INDEX_DIFFERENCE_SP)
 
     def sIntensityByDeviation(self, deviation):
         """
@@ -144,8 +477,7 @@ class DiffractionResult(object):
         :param deviation: Deviation to return intensity for.
         :return: Intensity of the S polarization.
         """
-        deviation_index = self._deviationIndexByDeviation(deviation)
-        return self._intensities[:, deviation_index, self.INDEX_POLARIZATION_S]
+        return self._byDeviation("intensity", deviation, self.INDEX_POLARIZATION_S)
 
     def sPhaseByDeviation(self, deviation):
         """
@@ -153,8 +485,7 @@ class DiffractionResult(object):
         :param deviation: Deviation to return phase for.
         :return: Phase of the S polarization.
         """
-        deviation_index = self._deviationIndexByDeviation(deviation)
-        return self._phases[:, deviation_index, self.INDEX_POLARIZATION_S]
+        return self._byDeviation("phase", deviation, self.INDEX_POLARIZATION_S)
 
     def pIntensityByDeviation(self, deviation):
         """
@@ -162,8 +493,7 @@ class DiffractionResult(object):
         :param deviation: Deviation to return intensity for.
         :return: Intensity of the P polarization.
         """
-        deviation_index = self._deviationIndexByDeviation(deviation)
-        return self._intensities[:, deviation_index, self.INDEX_POLARIZATION_P]
+        return self._byDeviation("intensity", deviation, self.INDEX_POLARIZATION_P)
 
     def pPhaseByDeviation(self, deviation):
         """
@@ -171,8 +501,7 @@ class DiffractionResult(object):
         :param deviation: Deviation to return phase for.
         :return: Phase of the P polarization.
         """
-        deviation_index = self._deviationIndexByDeviation(deviation)
-        return self._phases[:, deviation_index, self.INDEX_POLARIZATION_P]
+        return self._byDeviation("phase", deviation, self.INDEX_POLARIZATION_P)
 
     def differenceIntensityByDeviation(self, deviation):
         """
@@ -180,8 +509,7 @@ class DiffractionResult(object):
         :param deviation: Deviation to return intensity for.
         :return: Intensity of the  difference between the S and P polarization.
         """
-        deviation_index = self._deviationIndexByDeviation(deviation)
-        return self._intensities[:, deviation_index, self.INDEX_DIFFERENCE_SP]
+        return self._byDeviation("intensity", deviation, self.INDEX_DIFFERENCE_SP)
 
     def differencePhaseByDeviation(self, deviation):
         """
@@ -189,23 +517,219 @@ class DiffractionResult(object):
         :param deviation: Deviation to return phase for.
         :return: Phase of the difference between S and P polarization.
         """
-        deviation_index = self._deviationIndexByDeviation(deviation)
-        return self._phases[:, deviation_index, self.INDEX_DIFFERENCE_SP]
+        return self._byDeviation("phase", deviation, self.INDEX_DIFFERENCE_SP)
+
+    def sAmplitudeByEnergy(self, energy):
+        """
+        Returns the complex amplitude of the S polarization.
+        :param energy: Energy to return complex amplitude for.
+        :return: Complex amplitude of the S polarization.
+        """
+        return self._byEnergy("amplitude", energy, self.INDEX_POLARIZATION_S)
+
+    def pAmplitudeByEnergy(self, energy):
+        """
+        Returns the complex amplitude of the P polarization.
+        :param energy: Energy to return complex amplitude for.
+        :return: Complex amplitude of the P polarization.
+        """
+        return self._byEnergy("amplitude", energy, self.INDEX_POLARIZATION_P)
+
+    def differenceAmplitudeByEnergy(self, energy):
+        """
+        Returns the complex amplitude of the difference between S and P polarizations.
+        :param energy: Energy to return complex amplitude for.
+        :return: Complex amplitude of the difference between S and P polarizations.
+        """
+        return self._byEnergy("amplitude", energy, self.INDEX_DIFFERENCE_SP)
+
+    def sAmplitudeByDeviation(self, deviation):
+        """
+        Returns the complex amplitude of the S polarization.
+        :param deviation: Deviation to return complex amplitude for.
+        :return: Complex amplitude of the S polarization.
+        """
+        return self._byDeviation("amplitude", deviation, self.INDEX_POLARIZATION_S)
+
+    def pAmplitudeByDeviation(self, deviation):
+        """
+        Returns the complex amplitude of the P polarization.
+        :param deviation: Deviation to return complex amplitude for.
+        :return: Complex amplitude of the P polarization.
+        """
+        return self._byDeviation("amplitude", deviation, self.INDEX_POLARIZATION_P)
+
+    def differenceAmplitudeByDeviation(self, deviation):
+        """
+        Returns the complex amplitude of the difference between S and P polarizations.
+        :param deviation: Deviation to return complex amplitude for.
+        :return: Complex amplitude of the difference between S and P polarizations.
+        """
+        return self._byDeviation("amplitude", deviation, self.INDEX_DIFFERENCE_SP)
 
-    def add(self, energy, deviation, s_complex_amplitude, p_complex_amplitude, difference_complex_amplitude):
+    def add(self, energy, deviation, s_complex_amplitude, p_complex_amplitude, difference_complex_amplitude=None):
         """
         Adds a result for a given energy and deviation.
+        :param energy: Energy of the result.
+        :param deviation: Angle deviation of the result.
+        :param s_complex_amplitude: ComplexAmplitude of the S polarization.
+        :param p_complex_amplitude: ComplexAmplitude of the P polarization.
+        :param difference_complex_amplitude: Unused. The polarization difference is derived from S and P.
         """
         energy_index = self._energyIndexByEnergy(energy)
-        deviation_index = self._deviationIndexByDeviation(deviation)
+        deviation_index = self._deviationIndexByDeviation(energy_index, deviation)
+
+        self._s_amplitudes[energy_index, deviation_index] = s_complex_amplitude.complexAmplitude()
+        self._p_amplitudes[energy_index, deviation_index] = p_complex_amplitude.complexAmplitude()
+
+        self._views.clear()
+
+    def setAmplitudesByEnergy(self, energy, s_amplitudes, p_amplitudes):
+        """
+        Sets the complex amplitudes of one energy at once.
+        :param energy: Energy of the results.
+        :param s_amplitudes: Complex amplitudes of the S polarization aligned with angleDeviationsByEnergy(energy).
+        :param p_amplitudes: Complex amplitudes of the P polarization aligned with angleDeviationsByEnergy(energy).
+        """
+        energy_index = self._energyIndexByEnergy(energy)
+        number_deviations = len(self._deviations_by_energy[energy_index])
+
+        self._s_amplitudes[energy_index, :number_deviations] = s_amplitudes
+        self._p_amplitudes[energy_index, :number_deviations] = p_amplitudes
+
+        self._views.clear()
+
+    def setAmplitudes(self, s_amplitudes, p_amplitudes):
+        """
+        Sets the complex amplitudes of all energies at once.
+        :param s_amplitudes: Complex amplitudes of the S polarization of shape (energies, deviations). Row i is
+                             aligned with the angle deviations of the i-th energy.
+        :param p_amplitudes: Complex amplitudes of the P polarization of the same shape.
+        """
+        self._s_amplitudes[:, :] = s_amplitudes
+        self._p_amplitudes[:, :] = p_amplitudes
+
+        self._views.clear()
+
+    def asArrays(self):
+        """
+        Returns these results as plain arrays, e.g. for a ResultStore.
+        :return: Dictionary name -> numpy array. See fromArrays.
+        """
+        deviation_counts = numpy.array([len(deviations) for deviations in self._deviations_by_energy])
+
+        # Deviation axes are padded to the buffer width like the amplitudes.
+        angle_deviations = numpy.zeros(self._buffer_shape)
+        for index, deviations in enumerate(self._deviations_by_energy):
+            angle_deviations[index, :len(deviations)] = deviations
+
+        return {"format_version": numpy.array(self.ARRAYS_FORMAT_VERSION, dtype=numpy.int64),
+                "energies": numpy.asarray(self.energies(), dtype=numpy.float64),
+                "deviation_counts": deviation_counts,
+                "angle_deviations": angle_deviations,
+                "s_amplitudes": numpy.asarray(self._s_amplitudes),
+                "p_amplitudes": numpy.asarray(self._p_amplitudes),
+                "bragg_angle": numpy.array(self._bragg_angle, dtype=numpy.float64)}
+
+    @staticmethod
+    def fromArrays(diffraction_setup, arrays):
+        """
+        Creates results from the arrays returned by asArrays. Raises ValueError if the arrays are of another
+        format version or malformed, e.g. read from a damaged file.
+        :param diffraction_setup: Setup the results were calculated for. The deviation axes are taken from the arrays.
+        :param arrays: Dictionary name -> numpy array as returned by asArrays.
+        :return: DiffractionResult holding the arrays.
+        """
+        DiffractionResult._checkArrays(arrays)
+
+        deviations_by_energy = OrderedDict((energy, deviations[:count])
+                                           for energy, deviations, count in zip(arrays["energies"],
+                                                                                arrays["angle_deviations"],
+                                                                                arrays["deviation_counts"]))
+
+        # Adaptive setups are refined during the calculation. The arrays hold the refined axes.
+        result_setup = diffraction_setup.snapshot()
+        result_setup._setAxes(arrays["energies"], deviations_by_energy)
+
+        result = DiffractionResult(result_setup, float(arrays["bragg_angle"]))
+        result.setAmplitudes(arrays["s_amplitudes"], arrays["p_amplitudes"])
+
+        return result
+
+    @staticmethod
+    def _checkArrays(arrays):
+        """
+        Checks that arrays are as returned by asArrays of this format version. Raises ValueError otherwise.
+        :param arrays: Dictionary name -> numpy array.
+        """
+        # Name -> (kind of dtype, number of dimensions).
+        expected_arrays = {"format_version": ("i", 0),
+                           "energies": ("f", 1),
+                           "deviation_counts": ("i", 1),
+                           "angle_deviations": ("f", 2),
+                           "s_amplitudes": ("c", 2),
+                           "p_amplitudes": ("c", 2),
+                           "bragg_angle": ("f", 0)}
+
+        if set(arrays.keys()) != set(expected_arrays.keys()):
+            raise ValueError("Expected arrays %s, got %s." % (sorted(expected_arrays.keys()), sorted(arrays.keys())))
+
+        for name, (kind, dimensions) in expected_arrays.items():
+            array = numpy.asarray(arrays[name])
+            if array.dtype.kind != kind or array.ndim != dimensions:
+                raise ValueError("Malformed array %s of dtype %s and shape %s." % (name, array.dtype, array.shape))
+
+        if int(arrays["format_version"]) != DiffractionResult.ARRAYS_FORMAT_VERSION:
+            raise ValueError("Expected arrays of format version %i, got %i." % (DiffractionResult.ARRAYS_FORMAT_VERSION,
+                                                                               int(arrays["format_version"])))
+
+        buffer_shape = arrays["s_amplitudes"].shape
+        number_energies = len(arrays["energies"])
+
+        if number_energies == 0 or \
+                buffer_shape[0] != number_energies or \
+                arrays["p_amplitudes"].shape != buffer_shape or \
+                arrays["angle_deviations"].shape != buffer_shape or \
+                arrays["deviation_counts"].shape != (number_energies,):
+            raise ValueError("Arrays of inconsistent shapes.")
+
+        deviation_counts = arrays["deviation_counts"]
+        if deviation_counts.min() < 1 or deviation_counts.max() > buffer_shape[1]:
+            raise ValueError("Deviation counts exceed the amplitude buffers.")
+
+    def contentDigest(self):
+        """
+        Returns a digest of the energies, deviation axes and complex amplitudes of these results.
+        Results with equal digests hold equal values.
+        :return: Hexadecimal SHA-256 digest.
+        """
+        digest = hashlib.sha256()
+        for name, array in sorted(self.asArrays().items()):
+            digest.update(name.encode("ascii"))
+            digest.update(numpy.ascontiguousarray(array).tobytes())
+
+        return digest.hexdigest()
+
+    def addEnergyResult(self, energy_result):
+        """
+        Adds the results of one energy at once.
+        :param energy_result: DiffractionEnergyResult to add. Its deviations need not be sorted.
+        """
+        energy_index = self._energyIndexByEnergy(energy_result.energy())
+        deviations = numpy.asarray(energy_result.angleDeviations())
+
+        if numpy.array_equal(deviations, self._deviations_by_energy[energy_index]):
+            self.setAmplitudesByEnergy(energy_result.energy(),
+                                       energy_result.sAmplitudes(),
+                                       energy_result.pAmplitudes())
+            return
+
+        deviation_indices = self._nearestDeviationIndices(energy_index, deviations)
 
-        self._intensities[energy_index, deviation_index, self.INDEX_POLARIZATION_S] = s_complex_amplitude.intensity()
-        self._intensities[energy_index, deviation_index, self.INDEX_POLARIZATION_P] = p_complex_amplitude.intensity()
-        self._intensities[energy_index, deviation_index, self.INDEX_DIFFERENCE_SP] = difference_complex_amplitude.intensity()
+        self._s_amplitudes[energy_index, deviation_indices] = energy_result.sAmplitudes()
+        self._p_amplitudes[energy_index, deviation_indices] = energy_result.pAmplitudes()
 
-        self._phases[energy_index, deviation_index, self.INDEX_POLARIZATION_S] = s_complex_amplitude.phase()
-        self._phases[energy_index, deviation_index, self.INDEX_POLARIZATION_P] = p_complex_amplitude.phase()
-        self._phases[energy_index, deviation_index, self.INDEX_DIFFERENCE_SP] = difference_complex_amplitude.phase()
+        self._views.clear()
 
     # def _debugPlot(self):
         # """
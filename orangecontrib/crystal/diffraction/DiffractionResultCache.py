@@ -0,0 +1,133 @@
+"""
+Process-wide memoization of diffraction results.
+Results are keyed by the fingerprint of their setup and the settings of the calculating Diffraction. They are evicted
+in LRU order whenever the cached results exceed the byte budget.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+
+class DiffractionResultCache(object):
+
+    def __init__(self, max_bytes=256 * 1024 ** 2):
+        """
+        Constructor.
+        :param max_bytes: Byte budget of the cached results.
+        """
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._used_bytes = 0
+        self.setMaxBytes(max_bytes)
+        self.resetStatistics()
+
+    def maxBytes(self):
+        """
+        Returns the byte budget of the cached results.
+        :return: Byte budget of the cached results.
+        """
+        return self._max_bytes
+
+    def setMaxBytes(self, max_bytes):
+        """
+        Sets the byte budget of the cached results. Evicts least recently used results if necessary.
+        :param max_bytes: Byte budget of the cached results.
+        """
+        if max_bytes < 0:
+            raise ValueError("Byte budget must not be negative.")
+
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def size(self):
+        """
+        Returns the number of cached results.
+        :return: Number of cached results.
+        """
+        return len(self._entries)
+
+    def usedBytes(self):
+        """
+        Returns the bytes held by the cached results.
+        :return: Bytes held by the cached results.
+        """
+        return self._used_bytes
+
+    def hits(self):
+        """
+        Returns the number of lookups that were served from the cache.
+        :return: Number of cache hits.
+        """
+        return self._hits
+
+    def misses(self):
+        """
+        Returns the number of lookups that found no result.
+        :return: Number of cache misses.
+        """
+        return self._misses
+
+    def resetStatistics(self):
+        """
+        Resets the hit and miss counters.
+        """
+        self._hits = 0
+        self._misses = 0
+
+    def clear(self):
+        """
+        Removes all cached results and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._used_bytes = 0
+            self.resetStatistics()
+
+    def _evict(self):
+        """
+        Evicts least recently used results until the byte budget holds.
+        """
+        while self._used_bytes > self._max_bytes:
+            _, (_, byte_size) = self._entries.popitem(last=False)
+            self._used_bytes -= byte_size
+
+    def result(self, key):
+        """
+        Returns the cached result for the key.
+        :param key: Hashable key, see Diffraction._resultCacheKey.
+        :return: The cached DiffractionResult or None.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def store(self, key, result):
+        """
+        Caches a result. Results larger than the byte budget are not cached.
+        Cached results are shared by all lookups and are therefore marked read-only.
+        :param key: Hashable key, see Diffraction._resultCacheKey.
+        :param result: DiffractionResult to cache.
+        """
+        byte_size = result.byteSize()
+
+        if byte_size > self._max_bytes:
+            return
+
+        result.setReadOnly()
+
+        with self._lock:
+            if key in self._entries:
+                self._used_bytes -= self._entries.pop(key)[1]
+
+            self._entries[key] = (result, byte_size)
+            self._used_bytes += byte_size
+            self._evict()
+
+
+# Cache shared by all Diffraction instances of this process that opt in.
+diffraction_result_cache = DiffractionResultCache()
@@ -3,11 +3,18 @@ Represents a diffraction setup.
 Except for energy all units are in SI. Energy is in eV.
 """
 from collections import OrderedDict
-from copy import deepcopy
+from copy import copy, deepcopy
+import hashlib
 import numpy as np
 import xraylib
 
+from orangecontrib.crystal.util.Photon import Photon, SPEED_OF_LIGHT, PLANCK_CONSTANT, ELEMENTARY_CHARGE
+from orangecontrib.crystal.util.PhotonBundle import PhotonBundle
 from orangecontrib.crystal.util.Vector import Vector
+from orangecontrib.crystal.util.VectorArray import VectorArray
+from orangecontrib.crystal.diffraction.CrystalRegistry import crystal_registry
+from orangecontrib.crystal.diffraction.Psi import psiFromStructureFactor
+from orangecontrib.crystal.diffraction.StructureFactorCache import structure_factor_cache
 
 
 class DiffractionSetup(object):
@@ -28,7 +35,8 @@ class DiffractionSetup(object):
         :param asymmetry_angle: The asymmetry angle between surface normal and Bragg normal (radians).
         :param azimuthal_angle: The angle between the projection of the Bragg normal
                                 on the crystal surface plane and the x axis (radians).
-        :param incoming_photons: The incoming photons.
+        :param incoming_photons: The incoming photons as list of Photon or as PhotonBundle. None for setups that
+                                 describe their photons by energy and angle deviation axes, see _setAxes.
         """
         self._geometry_type = geometry_type
         self._crystal_name = crystal_name
@@ -42,15 +50,25 @@ class DiffractionSetup(object):
         # Edoardo: I add an azimuthal angle.
         self._azimuthal_angle = azimuthal_angle  # degrees
 
-        # Set deviations and energies caches to None.
+        # Set deviations, energies and per energy photon index caches to None.
         self._deviations = None
         self._energies = None
+        self._deviations_by_energy = None
+        self._axes_digest = None
 
         # Set Debye Waller factor.
         self._debyeWaller = 1.0
 
-        # Load crystal from xraylib.
-        self._crystal = xraylib.Crystal_GetCrystal(self.crystalName())
+        # Set derived geometry and Bragg angle caches. See invalidateCache.
+        self._geometry_cache = dict()
+        self._geometry_cache_key = None
+        self._angle_bragg_cache = dict()
+
+        # Count the xraylib calls made by this setup.
+        self.resetXraylibCalls()
+
+        # Reference the shared crystal. It is loaded from xraylib once per process.
+        self._crystal = crystal_registry.crystal(self.crystalName())
 
     def geometryType(self):
         """
@@ -108,6 +126,91 @@ class DiffractionSetup(object):
         """
         return self._azimuthal_angle
 
+    def _geometryKey(self):
+        """
+        Returns the members the derived geometry depends on.
+        :return: Tuple of crystal name, Miller indices, asymmetry and azimuthal angle.
+        """
+        return (self._crystal_name,
+                self._miller_h, self._miller_k, self._miller_l,
+                self._asymmetry_angle,
+                self._azimuthal_angle)
+
+    def _validateCache(self):
+        """
+        Drops memoized values that were calculated for different members.
+        Members are occasionally assigned directly, e.g. in tests, and would otherwise see stale values.
+        """
+        geometry_key = self._geometryKey()
+        if self._geometry_cache_key != geometry_key:
+            self.invalidateCache()
+            self._geometry_cache_key = geometry_key
+
+    def _cachedGeometry(self, name, calculate):
+        """
+        Returns a memoized setup invariant quantity. Calculates it on first use.
+        :param name: Name of the quantity.
+        :param calculate: Function calculating the quantity.
+        :return: The quantity.
+        """
+        self._validateCache()
+
+        if name not in self._geometry_cache:
+            self._geometry_cache[name] = calculate()
+
+        return self._geometry_cache[name]
+
+    def invalidateCache(self):
+        """
+        Drops the memoized derived geometry and Bragg angles. Must be called after changing the crystal
+        or its orientation.
+        """
+        self._geometry_cache = dict()
+        self._geometry_cache_key = None
+        self._angle_bragg_cache = dict()
+
+    def xraylibCalls(self):
+        """
+        Returns how many xraylib calls this setup made since the last reset, by xraylib function.
+        Structure factor calls are counted by the misses of the structure factor cache.
+        :return: Dictionary xraylib function name -> number of calls.
+        """
+        return dict(self._xraylib_calls)
+
+    def resetXraylibCalls(self):
+        """
+        Resets the xraylib call counters.
+        """
+        self._xraylib_calls = {"Bragg_angle": 0,
+                               "Crystal_dSpacing": 0}
+
+    def _setAxes(self, energies, deviations_by_energy):
+        """
+        Describes the incoming photons by their axes instead of a photon list. Photons are only generated on demand.
+        :param energies: Ascending array of energies.
+        :param deviations_by_energy: OrderedDict energy -> array of angle deviations. Energies may share one array.
+        """
+        self._incoming_photons = None
+        self._energies = energies
+        self._deviations = None
+        self._deviations_by_energy = deviations_by_energy
+        self._axes_digest = None
+
+    def incomingPhotons(self):
+        """
+        Returns the incoming photons. Setups described by axes generate them on every call.
+        :return: List of incoming photons.
+        """
+        if self._incoming_photons is not None:
+            return self._incoming_photons
+
+        photons = list()
+        for energy, deviations in self._photonIndexByEnergy().items():
+            for direction in self.incomingPhotonDirections(energy, deviations):
+                photons.append(Photon(energy, Vector(direction[0], direction[1], direction[2])))
+
+        return photons
+
     def energyMin(self):
         """
         Returns the minimum energy in eV.
@@ -136,7 +239,7 @@ class DiffractionSetup(object):
         :return: The angle deviations grid.
         """
         if self._energies is None:
-            self._energies = np.unique(np.array([photon.energy() for photon in self._incoming_photons]))
+            self._energies = np.unique(self._photonEnergies())
 
         return self._energies
 
@@ -145,21 +248,21 @@ class DiffractionSetup(object):
         Returns the minimal angle deviation.
         :return: Minimal angle deviation.
         """
-        return self.angleDeviationGrid().min()
+        return min(deviations.min() for deviations in self._photonIndexByEnergy().values())
 
     def angleDeviationMax(self):
         """
         Returns the maximal angle deviation.
         :return: Maximal angle deviation.
         """
-        return self.angleDeviationGrid().max()
+        return max(deviations.max() for deviations in self._photonIndexByEnergy().values())
 
     def angleDeviationPoints(self):
         """
-        Returns the angle deviation points.
+        Returns the angle deviation points, i.e. the number of incoming photons.
         :return: Angle deviation points.
         """
-        return self.angleDeviationGrid().shape[0]
+        return sum(len(deviations) for deviations in self._photonIndexByEnergy().values())
 
     def angleDeviationGrid(self):
         """
@@ -167,25 +270,86 @@ class DiffractionSetup(object):
         :return: The angle deviations grid.
         """
         if self._deviations is None:
-            self._deviations = np.array([self.deviationOfIncomingPhoton(photon) for photon in self._incoming_photons])
+            if self._incoming_photons is None:
+                self._deviations = np.concatenate(list(self._photonIndexByEnergy().values()))
+            else:
+                self._deviations = self.deviationsOfIncomingPhotons(self._incoming_photons)
 
         return self._deviations
 
+    def _photonIndexByEnergy(self):
+        """
+        Returns the per energy photon index, i.e. an ordered mapping from every energy of this setup
+        to the angle deviations of the incoming photons having that energy.
+        :return: OrderedDict energy -> array of angle deviations.
+        """
+        if self._deviations_by_energy is None:
+            photon_energies = self._photonEnergies()
+            deviations = self.angleDeviationGrid()
+
+            # Group the photons by energy in a single pass. The stable sort keeps the photon order within each energy.
+            energies, inverse = np.unique(photon_energies, return_inverse=True)
+            order = np.argsort(inverse, kind="mergesort")
+            boundaries = np.cumsum(np.bincount(inverse, minlength=len(energies)))[:-1]
+
+            self._deviations_by_energy = OrderedDict(zip(energies,
+                                                         np.split(deviations[order], boundaries)))
+
+        return self._deviations_by_energy
+
+    def _photonEnergies(self):
+        """
+        Returns the energies of the incoming photons in photon order.
+        :return: Array of photon energies.
+        """
+        if isinstance(self._incoming_photons, PhotonBundle):
+            return self._incoming_photons.energies()
+
+        return np.array([photon.energy() for photon in self._incoming_photons])
+
+    def angleDeviationGridByEnergy(self, energy):
+        """
+        Returns the angle deviations of the incoming photons with the given energy.
+        :param energy: Energy of the photons.
+        :return: Angle deviations of the photons with the given energy.
+        """
+        return self._photonIndexByEnergy()[energy]
+
     def angleBragg(self, energy):
         """
-        Returns the Bragg angle for a given energy.
+        Returns the Bragg angle for a given energy. Memoized per energy.
         :param energy: Energy to calculate the Bragg angle for.
         :return: Bragg angle.
         """
-        energy_in_kev = energy / 1000.0
+        self._validateCache()
 
-        # Retrieve bragg angle from xraylib.
-        angle_bragg = xraylib.Bragg_angle(self._crystal,
-                                          energy_in_kev,
-                                          self.millerH(),
-                                          self.millerK(),
-                                          self.millerL())
-        return angle_bragg
+        energy = float(energy)
+        if energy not in self._angle_bragg_cache:
+            energy_in_kev = energy / 1000.0
+
+            # Retrieve bragg angle from xraylib.
+            self._xraylib_calls["Bragg_angle"] += 1
+            self._angle_bragg_cache[energy] = xraylib.Bragg_angle(self._crystal,
+                                                                  energy_in_kev,
+                                                                  self.millerH(),
+                                                                  self.millerK(),
+                                                                  self.millerL())
+
+        return self._angle_bragg_cache[energy]
+
+    def anglesBragg(self, energies):
+        """
+        Returns the Bragg angles for an array of energies. Array version of angleBragg.
+        xraylib is called once per distinct energy.
+        :param energies: Array of energies to calculate the Bragg angles for.
+        :return: Array of Bragg angles in the shape of energies.
+        """
+        energies = np.asarray(energies, dtype=np.float64)
+        unique_energies, inverse = np.unique(energies, return_inverse=True)
+
+        angles_bragg = np.array([self.angleBragg(energy) for energy in unique_energies])
+
+        return angles_bragg[inverse].reshape(energies.shape)
 
     def F0(self, energy):
         """
@@ -193,11 +357,11 @@ class DiffractionSetup(object):
         :param energy: photon energy in eV.
         :return: F0
         """
-        energy_in_kev = energy / 1000.0
-        F_0 = xraylib.Crystal_F_H_StructureFactor(self._crystal,
-                                                  energy_in_kev,
-                                                  0, 0, 0,
-                                                  self._debyeWaller, 1.0)
+        F_0 = structure_factor_cache.structureFactor(self.crystalName(),
+                                                     self._crystal,
+                                                     energy,
+                                                     0, 0, 0,
+                                                     self._debyeWaller)
         return F_0
 
     def FH(self, energy):
@@ -206,14 +370,13 @@ class DiffractionSetup(object):
         :param energy: photon energy in eV.
         :return: FH
         """
-        energy_in_kev = energy / 1000.0
-
-        F_H = xraylib.Crystal_F_H_StructureFactor(self._crystal,
-                                                  energy_in_kev,
-                                                  self.millerH(),
-                                                  self.millerK(),
-                                                  self.millerL(),
-                                                  self._debyeWaller, 1.0)
+        F_H = structure_factor_cache.structureFactor(self.crystalName(),
+                                                     self._crystal,
+                                                     energy,
+                                                     self.millerH(),
+                                                     self.millerK(),
+                                                     self.millerL(),
+                                                     self._debyeWaller)
         return F_H
 
     def FH_bar(self, energy):
@@ -222,24 +385,30 @@ class DiffractionSetup(object):
         :param energy: photon energy in eV.
         :return: FH_bar
         """
-        energy_in_kev = energy / 1000.0
-
-        F_H_bar = xraylib.Crystal_F_H_StructureFactor(self._crystal,
-                                                      energy_in_kev,
-                                                      -self.millerH(),
-                                                      -self.millerK(),
-                                                      -self.millerL(),
-                                                      self._debyeWaller, 1.0)
+        F_H_bar = structure_factor_cache.structureFactor(self.crystalName(),
+                                                         self._crystal,
+                                                         energy,
+                                                         -self.millerH(),
+                                                         -self.millerK(),
+                                                         -self.millerL(),
+                                                         self._debyeWaller)
 
         return F_H_bar
 
     def dSpacing(self):
         """
-        Returns the lattice spacing d.
+        Returns the lattice spacing d. Memoized.
         :return: Lattice spacing.
         """
+        return self._cachedGeometry("d_spacing", self._calculateDSpacing)
 
+    def _calculateDSpacing(self):
+        """
+        Calculates the lattice spacing d.
+        :return: Lattice spacing.
+        """
         # Retrieve lattice spacing d from xraylib in Angstrom.
+        self._xraylib_calls["Crystal_dSpacing"] += 1
         d_spacing = xraylib.Crystal_dSpacing(self._crystal,
                                              self.millerH(),
                                              self.millerK(),
@@ -248,6 +417,13 @@ class DiffractionSetup(object):
         return d_spacing
 
     def normalBragg(self):
+        """
+        Returns the normal on the reflection lattice plane B_H. Memoized.
+        :return: Bragg normal B_H.
+        """
+        return self._cachedGeometry("normal_bragg", self._calculateNormalBragg)
+
+    def _calculateNormalBragg(self):
         """
         Calculates the normal on the reflection lattice plane B_H.
         :return: Bragg normal B_H.
@@ -271,7 +447,33 @@ class DiffractionSetup(object):
 
         return normal_bragg
 
+    def normalsBragg(self, asymmetry_angles, azimuthal_angles):
+        """
+        Calculates the Bragg normals B_H for arrays of crystal orientations. Array version of normalBragg.
+        :param asymmetry_angles: Array of asymmetry angles.
+        :param azimuthal_angles: Array of azimuthal angles of the same shape.
+        :return: VectorArray of the Bragg normals.
+        """
+        asymmetry_angles = np.asarray(asymmetry_angles, dtype=np.float64).reshape(-1)
+        azimuthal_angles = np.asarray(azimuthal_angles, dtype=np.float64).reshape(-1)
+
+        # Same rotations as in _calculateNormalBragg, with one angle per orientation.
+        normals_bragg = np.zeros((len(asymmetry_angles), 3))
+        normals_bragg[:, 2] = 2.0 * np.pi / (self.dSpacing() * 1e-10)
+
+        normals_bragg = VectorArray(normals_bragg).rotateAroundAxis(Vector(0, 1, 0), asymmetry_angles)
+        normals_bragg = normals_bragg.rotateAroundAxis(Vector(0, 0, 1), azimuthal_angles)
+
+        return normals_bragg
+
     def normalSurface(self):
+        """
+        Returns the surface normal n. Memoized.
+        :return: Surface normal n.
+        """
+        return self._cachedGeometry("normal_surface", self._calculateNormalSurface)
+
+    def _calculateNormalSurface(self):
         """
         Calculates surface normal n.
         asymmetry_angle: Asymmetry angle of the surface cut.
@@ -290,6 +492,35 @@ class DiffractionSetup(object):
 
         return normal_surface
 
+    def isForbiddenReflection(self):
+        """
+        Determines if the reflection is forbidden by the crystal structure, i.e. if its structure factor vanishes
+        at all energies. This is the case if the phase sums of the atoms of every element vanish. Memoized.
+        :return: True if the reflection is forbidden. False otherwise.
+        """
+        return self._cachedGeometry("forbidden_reflection", self._calculateIsForbiddenReflection)
+
+    def _calculateIsForbiddenReflection(self):
+        """
+        Calculates if the reflection is forbidden by the crystal structure. Atoms of one element share their
+        scattering factor, so the structure factor vanishes exactly if the phase sum of every element does.
+        :return: True if the reflection is forbidden. False otherwise.
+        """
+        atoms = self._crystal["atom"]
+        elements = np.array([atom["Zatom"] for atom in atoms])
+        fractions = np.array([atom["fraction"] for atom in atoms])
+        positions = np.array([[atom["x"], atom["y"], atom["z"]] for atom in atoms])
+
+        miller_indices = np.array([self.millerH(), self.millerK(), self.millerL()], dtype=np.float64)
+        phase_factors = fractions * np.exp(2j * np.pi * positions.dot(miller_indices))
+
+        for element in np.unique(elements):
+            is_element = elements == element
+            if abs(phase_factors[is_element].sum()) > 1e-6 * fractions[is_element].sum():
+                return False
+
+        return True
+
     def incomingPhotonDirection(self, energy, deviation):
         """
         Calculates the direction of the incoming photon. Parallel to k_0.
@@ -318,6 +549,87 @@ class DiffractionSetup(object):
 
         return photon_direction
 
+    def incomingPhotonDirections(self, energy, deviations, asymmetry_angles=None):
+        """
+        Calculates the directions of incoming photons for an array of deviations. Array version of
+        incomingPhotonDirection.
+        :param energy: Energy to calculate the Bragg angle for.
+        :param deviations: Array of deviations from the Bragg angle.
+        :param asymmetry_angles: Array of asymmetry angles, one per deviation. None for the asymmetry angle of
+                                 this setup.
+        :return: Array of shape (N, 3) holding the unit directions of the incoming photons.
+        """
+        if asymmetry_angles is None:
+            asymmetry_angles = self.asymmetryAngle()
+
+        angles = np.pi / 2.0 - (self.angleBragg(energy) + np.asarray(asymmetry_angles) + np.asarray(deviations))
+
+        photon_directions = np.zeros((angles.shape[0], 3))
+        photon_directions[:, 1] = np.sin(angles)
+        photon_directions[:, 2] = -np.cos(angles)
+
+        return photon_directions
+
+    def _psi(self, energy, structure_factor):
+        """
+        Calculates the Psi as defined in Zachariasen [3-95] for photons of the given energy.
+        :param energy: Photon energy in eV.
+        :param structure_factor: Structure factor.
+        :return: Psi as defined in Zachariasen [3-95].
+        """
+        wavelength = SPEED_OF_LIGHT * PLANCK_CONSTANT / (ELEMENTARY_CHARGE * energy)
+        unit_cell_volume = self.unitcellVolume() * 10 ** -30
+
+        return psiFromStructureFactor(unit_cell_volume, wavelength, structure_factor)
+
+    def asymmetryFactor(self, energy):
+        """
+        Returns the asymmetry factor b = gamma_0 / gamma_H as defined in Zachariasen [3-115] for a photon
+        incoming at the Bragg angle.
+        :param energy: Photon energy in eV.
+        :return: Asymmetry factor b. Negative for Bragg, positive for Laue geometries.
+        """
+        wavenumber = 2.0 * np.pi * ELEMENTARY_CHARGE * energy / (SPEED_OF_LIGHT * PLANCK_CONSTANT)
+
+        k_in = self.incomingPhotonDirection(energy, 0.0).scalarMultiplication(wavenumber)
+        k_out = k_in.addVector(self.normalBragg())
+
+        asymmetry_factor = k_in.scalarProduct(self.normalSurface()) * k_out.norm() / \
+                           (k_out.scalarProduct(self.normalSurface()) * wavenumber)
+
+        return asymmetry_factor
+
+    def darwinWidth(self, energy):
+        """
+        Returns the angular Darwin width of the S polarization, i.e. the width of the region in which the
+        deviation parameter z of Zachariasen [3-123] satisfies |z| < sqrt(|q|).
+        :param energy: Photon energy in eV.
+        :return: Darwin width in radians.
+        """
+        psi_h = self._psi(energy, self.FH(energy))
+        psi_h_bar = self._psi(energy, self.FH_bar(energy))
+        asymmetry_factor = self.asymmetryFactor(energy)
+
+        darwin_width = 2.0 * np.sqrt(abs(psi_h * psi_h_bar)) / \
+                       (np.sqrt(abs(asymmetry_factor)) * np.sin(2.0 * self.angleBragg(energy)))
+
+        return darwin_width
+
+    def refractionShift(self, energy):
+        """
+        Returns the deviation from the kinematical Bragg angle at which Re(z) of Zachariasen [3-123] vanishes,
+        i.e. the center of the Darwin plateau shifted by refraction.
+        :param energy: Photon energy in eV.
+        :return: Refraction shift in radians.
+        """
+        psi_0 = self._psi(energy, self.F0(energy))
+        asymmetry_factor = self.asymmetryFactor(energy)
+
+        refraction_shift = (1.0 - asymmetry_factor) * psi_0.real / \
+                           (2.0 * asymmetry_factor * np.sin(2.0 * self.angleBragg(energy)))
+
+        return refraction_shift
+
     def deviationOfIncomingPhoton(self, photon_in):
         """
         Given an incoming photon its deviation from the Bragg angle is returned.
@@ -333,6 +645,21 @@ class DiffractionSetup(object):
         deviation = total_angle - angle_bragg - np.pi / 2
         return deviation
 
+    def deviationsOfIncomingPhotons(self, photons_in):
+        """
+        Given incoming photons their deviations from the Bragg angle are returned. Array version of
+        deviationOfIncomingPhoton: the Bragg normal is evaluated once and the Bragg angle once per distinct energy.
+        :param photons_in: Incoming photons as PhotonBundle or list of Photon.
+        :return: Array of deviations from the Bragg angle.
+        """
+        if not isinstance(photons_in, PhotonBundle):
+            photons_in = PhotonBundle.fromPhotons(photons_in)
+
+        total_angles = VectorArray(photons_in.unitDirections()).angle(self.normalBragg())
+
+        deviations = total_angles - self.anglesBragg(photons_in.energies()) - np.pi / 2
+        return deviations
+
     def unitcellVolume(self):
         """
         Returns the unit cell volume.
@@ -367,56 +694,79 @@ class DiffractionSetup(object):
 
         return info_dict
 
-    def __eq__(self, candidate):
+    def _fingerprintParameters(self):
         """
-        Determines if two setups are equal.
-        :param candidate: Instance to compare to.
-        :return: True if the two instances are equal. False otherwise.
+        Returns the parameters besides the photon axes that determine the diffraction results of this setup.
+        Subclasses whose calculation depends on further parameters extend this tuple.
+        :return: Tuple of plain Python values.
         """
-        if self._geometry_type != candidate.geometryType():
-            return False
-
-        if self._crystal_name != candidate.crystalName():
-            return False
-
-        if self._thickness != candidate.thickness():
-            return False
-
-        if self._miller_h != candidate.millerH():
-            return False
-
-        if self._miller_k != candidate.millerK():
-            return False
+        return (self.geometryType().description(),
+                self.crystalName(),
+                int(self.millerH()),
+                int(self.millerK()),
+                int(self.millerL()),
+                float(self.thickness()),
+                float(self.asymmetryAngle()),
+                float(self.azimuthalAngle()),
+                float(self._debyeWaller))
 
-        if self._miller_l != candidate.millerL():
-            return False
+    def _axesDigest(self):
+        """
+        Returns a digest of the energies and angle deviations of the incoming photons. Calculated once per axes.
+        The order of the photons does not matter.
+        :return: Hexadecimal SHA-256 digest.
+        """
+        if self._axes_digest is None:
+            digest = hashlib.sha256()
+            for energy, deviations in self._photonIndexByEnergy().items():
+                deviations = np.sort(np.asarray(deviations, dtype=np.float64))
+                digest.update(np.array([energy, len(deviations)], dtype=np.float64).tobytes())
+                digest.update(deviations.tobytes())
 
-        if self._asymmetry_angle != candidate.asymmetryAngle():
-            return False
+            self._axes_digest = digest.hexdigest()
 
-        if self._azimuthal_angle != candidate.azimuthalAngle():
-            return False
+        return self._axes_digest
 
-        if self.energyMin() != candidate.energyMin():
-            return False
+    def physicsFingerprint(self):
+        """
+        Returns a stable content hash of the parameters besides the photon axes, i.e. crystal, reflection, geometry
+        and orientation. Setups with equal physics fingerprints yield equal amplitudes for equal photons, so their
+        results can be combined, see Diffraction.calculateDiffractionIncremental.
+        :return: Hexadecimal SHA-256 digest.
+        """
+        return hashlib.sha256(repr(self._fingerprintParameters()).encode("utf-8")).hexdigest()
 
-        if self.energyMax() != candidate.energyMax():
-            return False
+    def fingerprint(self):
+        """
+        Returns a stable content hash of this setup. Setups with equal fingerprints yield equal diffraction results,
+        also across processes and sessions.
+        :return: Hexadecimal SHA-256 digest.
+        """
+        digest = hashlib.sha256(repr(self._fingerprintParameters()).encode("utf-8"))
+        digest.update(self._axesDigest().encode("ascii"))
 
-        if self.energyPoints() != candidate.energyPoints():
-            return False
+        return digest.hexdigest()
 
-        if self.angleDeviationMin() != candidate.angleDeviationMin():
-            return False
+    def __hash__(self):
+        """
+        Returns a hash consistent with __eq__.
+        :return: Hash of this setup.
+        """
+        return int(self.fingerprint()[:16], 16)
 
-        if self.angleDeviationMax() != candidate.angleDeviationMax():
-            return False
+    def __eq__(self, candidate):
+        """
+        Determines if two setups are equal, i.e. have the same fingerprint.
+        :param candidate: Instance to compare to.
+        :return: True if the two instances are equal. False otherwise.
+        """
+        if self is candidate:
+            return True
 
-        if self.angleDeviationPoints() != candidate.angleDeviationPoints():
+        if not isinstance(candidate, DiffractionSetup):
             return False
 
-        # All members are equal so are the instances.
-        return True
+        return self.fingerprint() == candidate.fingerprint()
 
     def __ne__(self, candidate):
         """
@@ -432,3 +782,53 @@ class DiffractionSetup(object):
         :return: A copy of this instance.
         """
         return deepcopy(self)
+
+    def snapshot(self):
+        """
+        Returns a lightweight copy of this instance as kept by results. It shares the crystal and the axis arrays
+        and describes the incoming photons by their energy and angle deviation axes instead of copying them.
+        :return: A snapshot of this instance.
+        """
+        snapshot = copy(self)
+        snapshot._geometry_cache = dict(self._geometry_cache)
+        snapshot._angle_bragg_cache = dict(self._angle_bragg_cache)
+        snapshot.resetXraylibCalls()
+
+        if self._incoming_photons is not None:
+            snapshot._setAxes(self.energies(), self._photonIndexByEnergy())
+
+        return snapshot
+
+    def reflectionSetup(self, miller_h, miller_k, miller_l):
+        """
+        Returns a setup for another reflection of the same crystal. It shares the crystal and the photon axes.
+        The angle deviations are taken relative to the Bragg angle of the new reflection.
+        :param miller_h: Miller index H.
+        :param miller_k: Miller index K.
+        :param miller_l: Miller index L.
+        :return: DiffractionSetup of the reflection.
+        """
+        reflection_setup = self.snapshot()
+        reflection_setup._miller_h = miller_h
+        reflection_setup._miller_k = miller_k
+        reflection_setup._miller_l = miller_l
+        reflection_setup.invalidateCache()
+
+        return reflection_setup
+
+    def __getstate__(self):
+        """
+        Returns the state for pickling and copying. The shared crystal is referenced by name only.
+        :return: State of this instance.
+        """
+        state = self.__dict__.copy()
+        del state["_crystal"]
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores the state and references the shared crystal again.
+        :param state: State of the instance.
+        """
+        self.__dict__.update(state)
+        self._crystal = crystal_registry.crystal(self._crystal_name)
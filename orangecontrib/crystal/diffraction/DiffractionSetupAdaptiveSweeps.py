@@ -0,0 +1,136 @@
+"""
+Represents a diffraction setup with adaptive angular sampling.
+The angle deviations of every energy start on a coarse uniform grid that Diffraction refines
+wherever the intensity or phase curves are not resolved within the tolerances.
+Except for energy all units are in SI. Energy is in eV. Angles in radians.
+"""
+import numpy as np
+
+from orangecontrib.crystal.diffraction.DiffractionSetup import DiffractionSetup
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+
+
+class DiffractionSetupAdaptiveSweeps(DiffractionSetupSweeps):
+
+    def __init__(self, geometry_type, crystal_name, thickness,
+                 miller_h, miller_k, miller_l,
+                 asymmetry_angle,
+                 azimuthal_angle,
+                 energy_min,
+                 energy_max,
+                 energy_points,
+                 angle_deviation_min,
+                 angle_deviation_max,
+                 angle_deviation_points,
+                 angle_deviation_max_points,
+                 intensity_tolerance=1e-3,
+                 phase_tolerance=1e-2):
+        """
+        Constructor.
+        :param geometry_type: GeometryType (BraggDiffraction,...).
+        :param crystal_name: The name of the crystal, e.g. Si.
+        :param thickness: The crystal thickness.
+        :param miller_h: Miller index H.
+        :param miller_k: Miller index K.
+        :param miller_l: Miller index L.
+        :param asymmetry_angle: The asymmetry angle between surface normal and Bragg normal.
+        :param azimuthal_angle: The angle between the projection of the Bragg normal
+                                on the crystal surface plane and the x axis.
+        :param energy_min: The minimum energy.
+        :param energy_max: The maximum energy.
+        :param energy_points: Number of energy points.
+        :param angle_deviation_min: Minimal angle deviation.
+        :param angle_deviation_max: Maximal angle deviation.
+        :param angle_deviation_points: Number of deviation points of the initial coarse grid.
+        :param angle_deviation_max_points: Maximal number of deviation points per energy after refinement.
+        :param intensity_tolerance: Tolerated linear interpolation error of the intensities relative to
+                                    the peak intensity of the energy.
+        :param phase_tolerance: Tolerated linear interpolation error of the phases in radians.
+        """
+        if angle_deviation_max_points < angle_deviation_points:
+            raise ValueError("Maximal number of deviation points must not be smaller than the initial number.")
+
+        DiffractionSetupSweeps.__init__(self,
+                                        geometry_type=geometry_type,
+                                        crystal_name=crystal_name,
+                                        thickness=thickness,
+                                        miller_h=miller_h,
+                                        miller_k=miller_k,
+                                        miller_l=miller_l,
+                                        asymmetry_angle=asymmetry_angle,
+                                        azimuthal_angle=azimuthal_angle,
+                                        energy_min=energy_min,
+                                        energy_max=energy_max,
+                                        energy_points=energy_points,
+                                        angle_deviation_min=angle_deviation_min,
+                                        angle_deviation_max=angle_deviation_max,
+                                        angle_deviation_points=angle_deviation_points)
+
+        self._angle_deviation_max_points = angle_deviation_max_points
+        self._intensity_tolerance = intensity_tolerance
+        self._phase_tolerance = phase_tolerance
+
+        # Intervals are not refined below this spacing.
+        self._angle_deviation_min_spacing = (angle_deviation_max - angle_deviation_min) / \
+                                            (16.0 * angle_deviation_max_points)
+
+    def angleDeviationMaxPoints(self):
+        """
+        Returns the maximal number of deviation points per energy after refinement.
+        :return: Maximal number of deviation points per energy.
+        """
+        return self._angle_deviation_max_points
+
+    def angleDeviationMinSpacing(self):
+        """
+        Returns the spacing of angle deviations below which intervals are not refined.
+        :return: Minimal spacing of angle deviations.
+        """
+        return self._angle_deviation_min_spacing
+
+    def intensityTolerance(self):
+        """
+        Returns the tolerated interpolation error of the intensities relative to the peak intensity.
+        :return: Intensity tolerance.
+        """
+        return self._intensity_tolerance
+
+    def phaseTolerance(self):
+        """
+        Returns the tolerated interpolation error of the phases in radians.
+        :return: Phase tolerance.
+        """
+        return self._phase_tolerance
+
+    def _fingerprintParameters(self):
+        """
+        Returns the parameters besides the photon axes that determine the diffraction results of this setup.
+        The refinement depends on the tolerances and the point budget.
+        :return: Tuple of plain Python values.
+        """
+        return DiffractionSetupSweeps._fingerprintParameters(self) + \
+               ("adaptive",
+                int(self._angle_deviation_max_points),
+                float(self._intensity_tolerance),
+                float(self._phase_tolerance),
+                float(self._angle_deviation_min_spacing))
+
+    def refinedSetup(self, deviations_by_energy):
+        """
+        Returns a setup with the same crystal and the given, possibly non-uniform, angle deviations.
+        :param deviations_by_energy: OrderedDict energy -> array of angle deviations.
+        :return: DiffractionSetup holding the refined incoming photons.
+        """
+        refined_setup = DiffractionSetup(geometry_type=self.geometryType(),
+                                         crystal_name=self.crystalName(),
+                                         thickness=self.thickness(),
+                                         miller_h=self.millerH(),
+                                         miller_k=self.millerK(),
+                                         miller_l=self.millerL(),
+                                         asymmetry_angle=self.asymmetryAngle(),
+                                         azimuthal_angle=self.azimuthalAngle(),
+                                         incoming_photons=None)
+
+        refined_setup._setAxes(np.array(list(deviations_by_energy.keys())), deviations_by_energy)
+
+        return refined_setup
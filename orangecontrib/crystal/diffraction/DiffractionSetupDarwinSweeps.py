@@ -0,0 +1,94 @@
+"""
+Represents a diffraction setup whose angular window follows the Darwin plateau.
+For every energy the angle deviations are centered on the refraction shifted Bragg angle and span
+a given number of Darwin widths.
+Except for energy all units are in SI. Energy is in eV. Angles in radians.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from orangecontrib.crystal.diffraction.DiffractionSetup import DiffractionSetup
+
+
+class DiffractionSetupDarwinSweeps(DiffractionSetup):
+
+    def __init__(self, geometry_type, crystal_name, thickness,
+                 miller_h, miller_k, miller_l,
+                 asymmetry_angle,
+                 azimuthal_angle,
+                 energy_min,
+                 energy_max,
+                 energy_points,
+                 darwin_widths,
+                 angle_deviation_points):
+        """
+        Constructor.
+        :param geometry_type: GeometryType (BraggDiffraction,...).
+        :param crystal_name: The name of the crystal, e.g. Si.
+        :param thickness: The crystal thickness.
+        :param miller_h: Miller index H.
+        :param miller_k: Miller index K.
+        :param miller_l: Miller index L.
+        :param asymmetry_angle: The asymmetry angle between surface normal and Bragg normal.
+        :param azimuthal_angle: The angle between the projection of the Bragg normal
+                                on the crystal surface plane and the x axis.
+        :param energy_min: The minimum energy.
+        :param energy_max: The maximum energy.
+        :param energy_points: Number of energy points.
+        :param darwin_widths: Width of the angular window in units of the Darwin width of each energy.
+        :param angle_deviation_points: Number of deviations points per energy.
+        """
+        energies = np.unique(np.linspace(energy_min,
+                                         energy_max,
+                                         energy_points))
+
+        self._darwin_widths = darwin_widths
+
+        # Call base constructor. The sweep is described by its axes, photons are generated on demand.
+        DiffractionSetup.__init__(self,
+                                  geometry_type=geometry_type,
+                                  crystal_name=crystal_name,
+                                  thickness=thickness,
+                                  miller_h=miller_h,
+                                  miller_k=miller_k,
+                                  miller_l=miller_l,
+                                  asymmetry_angle=asymmetry_angle,
+                                  azimuthal_angle=azimuthal_angle,
+                                  incoming_photons=None)
+
+        # Place the angular window of every energy on its Darwin plateau.
+        self._window = np.linspace(-0.5, 0.5, angle_deviation_points) * darwin_widths
+        self._placeWindows(energies)
+
+    def _placeWindows(self, energies):
+        """
+        Places the angular window of every energy on the Darwin plateau of the reflection.
+        :param energies: Ascending array of energies.
+        """
+        deviations_by_energy = OrderedDict()
+        for energy in energies:
+            deviations_by_energy[energy] = self.refractionShift(energy) + self._window * self.darwinWidth(energy)
+
+        self._setAxes(energies, deviations_by_energy)
+
+    def darwinWidths(self):
+        """
+        Returns the width of the angular window in units of the Darwin width.
+        :return: Width of the angular window in Darwin widths.
+        """
+        return self._darwin_widths
+
+    def reflectionSetup(self, miller_h, miller_k, miller_l):
+        """
+        Returns a setup for another reflection of the same crystal. The angular windows are placed on the Darwin
+        plateaus of the new reflection.
+        :param miller_h: Miller index H.
+        :param miller_k: Miller index K.
+        :param miller_l: Miller index L.
+        :return: DiffractionSetupDarwinSweeps of the reflection.
+        """
+        reflection_setup = DiffractionSetup.reflectionSetup(self, miller_h, miller_k, miller_l)
+        reflection_setup._placeWindows(self.energies())
+
+        return reflection_setup
@@ -0,0 +1,134 @@
+"""
+Represents a diffraction setup that sweeps the crystal orientation, i.e. the asymmetry and the azimuthal angle,
+in addition to energy and angle deviation. Structure factors and psi values do not depend on the orientation.
+Diffraction.calculateOrientationSweep calculates them once per energy and evaluates all orientations at once.
+Except for energy all units are in SI. Energy is in eV. Angles in radians.
+"""
+import numpy as np
+
+from orangecontrib.crystal.diffraction.DiffractionSetup import DiffractionSetup
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+
+
+class DiffractionSetupOrientationSweeps(DiffractionSetupSweeps):
+
+    def __init__(self, geometry_type, crystal_name, thickness,
+                 miller_h, miller_k, miller_l,
+                 asymmetry_angle_min,
+                 asymmetry_angle_max,
+                 asymmetry_angle_points,
+                 azimuthal_angle_min,
+                 azimuthal_angle_max,
+                 azimuthal_angle_points,
+                 energy_min,
+                 energy_max,
+                 energy_points,
+                 angle_deviation_min,
+                 angle_deviation_max,
+                 angle_deviation_points):
+        """
+        Constructor. The orientations are the grid of all asymmetry and azimuthal angles. A single point sweeps
+        only the other angle.
+        :param geometry_type: GeometryType (BraggDiffraction,...).
+        :param crystal_name: The name of the crystal, e.g. Si.
+        :param thickness: The crystal thickness.
+        :param miller_h: Miller index H.
+        :param miller_k: Miller index K.
+        :param miller_l: Miller index L.
+        :param asymmetry_angle_min: The minimum asymmetry angle between surface normal and Bragg normal.
+        :param asymmetry_angle_max: The maximum asymmetry angle.
+        :param asymmetry_angle_points: Number of asymmetry angles.
+        :param azimuthal_angle_min: The minimum angle between the projection of the Bragg normal
+                                    on the crystal surface plane and the x axis.
+        :param azimuthal_angle_max: The maximum azimuthal angle.
+        :param azimuthal_angle_points: Number of azimuthal angles.
+        :param energy_min: The minimum energy.
+        :param energy_max: The maximum energy.
+        :param energy_points: Number of energy points.
+        :param angle_deviation_min: Minimal angle deviation.
+        :param angle_deviation_max: Maximal angle deviation.
+        :param angle_deviation_points: Number of deviations points.
+        """
+        self._asymmetry_angles = np.unique(np.linspace(asymmetry_angle_min,
+                                                       asymmetry_angle_max,
+                                                       asymmetry_angle_points))
+
+        self._azimuthal_angles = np.unique(np.linspace(azimuthal_angle_min,
+                                                       azimuthal_angle_max,
+                                                       azimuthal_angle_points))
+
+        # The setup itself stands for the first orientation, e.g. if it is passed to Diffraction.calculateDiffraction.
+        DiffractionSetupSweeps.__init__(self,
+                                        geometry_type=geometry_type,
+                                        crystal_name=crystal_name,
+                                        thickness=thickness,
+                                        miller_h=miller_h,
+                                        miller_k=miller_k,
+                                        miller_l=miller_l,
+                                        asymmetry_angle=self._asymmetry_angles[0],
+                                        azimuthal_angle=self._azimuthal_angles[0],
+                                        energy_min=energy_min,
+                                        energy_max=energy_max,
+                                        energy_points=energy_points,
+                                        angle_deviation_min=angle_deviation_min,
+                                        angle_deviation_max=angle_deviation_max,
+                                        angle_deviation_points=angle_deviation_points)
+
+    def asymmetryAngles(self):
+        """
+        Returns the asymmetry angles of the sweep in ascending order.
+        :return: Array of asymmetry angles.
+        """
+        return self._asymmetry_angles
+
+    def azimuthalAngles(self):
+        """
+        Returns the azimuthal angles of the sweep in ascending order.
+        :return: Array of azimuthal angles.
+        """
+        return self._azimuthal_angles
+
+    def orientations(self):
+        """
+        Returns all orientations of the sweep. The azimuthal angle varies fastest.
+        :return: Array of shape (asymmetry angles * azimuthal angles, 2) holding asymmetry and azimuthal angle.
+        """
+        asymmetry_angles, azimuthal_angles = np.meshgrid(self._asymmetry_angles, self._azimuthal_angles,
+                                                         indexing="ij")
+
+        return np.column_stack((asymmetry_angles.reshape(-1), azimuthal_angles.reshape(-1)))
+
+    def _fingerprintParameters(self):
+        """
+        Returns the parameters besides the photon axes that determine the diffraction results of this setup.
+        :return: Tuple of plain Python values.
+        """
+        return DiffractionSetupSweeps._fingerprintParameters(self) + \
+               ("asymmetry_angles",) + tuple(float(angle) for angle in self._asymmetry_angles) + \
+               ("azimuthal_angles",) + tuple(float(angle) for angle in self._azimuthal_angles)
+
+    def orientationSetup(self, asymmetry_angle, azimuthal_angle):
+        """
+        Returns a setup with the same crystal and photons and the given orientation.
+        :param asymmetry_angle: The asymmetry angle.
+        :param azimuthal_angle: The azimuthal angle.
+        :return: DiffractionSetup of the given orientation.
+        """
+        orientation_setup = DiffractionSetup(geometry_type=self.geometryType(),
+                                             crystal_name=self.crystalName(),
+                                             thickness=self.thickness(),
+                                             miller_h=self.millerH(),
+                                             miller_k=self.millerK(),
+                                             miller_l=self.millerL(),
+                                             asymmetry_angle=asymmetry_angle,
+                                             azimuthal_angle=azimuthal_angle,
+                                             incoming_photons=None)
+
+        orientation_setup._setAxes(self.energies(), self._photonIndexByEnergy())
+
+        # Lattice spacing and Bragg angles do not depend on the orientation.
+        orientation_setup._validateCache()
+        orientation_setup._geometry_cache["d_spacing"] = self.dSpacing()
+        orientation_setup._angle_bragg_cache = dict(self._angle_bragg_cache)
+
+        return orientation_setup
@@ -2,13 +2,12 @@
 Represents a diffraction setup.
 Except for energy all units are in SI. Energy is in eV. Angles in radians.
 """
+from collections import OrderedDict
+
 import numpy as np
 
 from orangecontrib.crystal.diffraction.DiffractionSetup import DiffractionSetup
 
-from orangecontrib.crystal.util.Photon import Photon
-from orangecontrib.crystal.util.Vector import Vector
-
 
 class DiffractionSetupSweeps(DiffractionSetup):
 
@@ -40,34 +39,15 @@ class DiffractionSetupSweeps(DiffractionSetup):
         :param angle_deviation_max: Maximal angle deviation.
         :param angle_deviation_points: Number of deviations points.
         """
-        energies = np.linspace(energy_min,
-                               energy_max,
-                               energy_points)
+        energies = np.unique(np.linspace(energy_min,
+                                         energy_max,
+                                         energy_points))
 
         deviations = np.linspace(angle_deviation_min,
                                  angle_deviation_max,
                                  angle_deviation_points)
 
-        # Create an "info setup" solely for the determination of deviation angles.
-        info_setup = DiffractionSetup(geometry_type=geometry_type,
-                                      crystal_name=crystal_name,
-                                      thickness=thickness,
-                                      miller_h=miller_h,
-                                      miller_k=miller_k,
-                                      miller_l=miller_l,
-                                      asymmetry_angle=asymmetry_angle,
-                                      azimuthal_angle=azimuthal_angle,
-                                      incoming_photons=[Photon(energy_min, Vector(0, 0, -1))])
-
-        # Create photons according to sweeps.
-        photons = list()
-        for energy in energies:
-            for deviation in deviations:
-                direction = info_setup.incomingPhotonDirection(energy, deviation)
-                incoming_photon = Photon(energy, direction)
-                photons.append(incoming_photon)
-
-        # Call base constructor.
+        # Call base constructor. The sweep is described by its axes, photons are generated on demand.
         DiffractionSetup.__init__(self,
                                   geometry_type=geometry_type,
                                   crystal_name=crystal_name,
@@ -77,4 +57,7 @@ class DiffractionSetupSweeps(DiffractionSetup):
                                   miller_l=miller_l,
                                   asymmetry_angle=asymmetry_angle,
                                   azimuthal_angle=azimuthal_angle,
-                                  incoming_photons=photons)
+                                  incoming_photons=None)
+
+        # All energies share the deviation axis.
+        self._setAxes(energies, OrderedDict((energy, deviations) for energy in energies))
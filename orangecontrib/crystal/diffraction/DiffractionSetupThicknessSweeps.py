@@ -0,0 +1,134 @@
+"""
+Represents a diffraction setup that sweeps the crystal thickness in addition to energy and angle deviation.
+Only the phase factors of the dynamical diffraction solution depend on the thickness. Diffraction.calculateThicknessSweep
+calculates the thickness independent eigen-solution once per photon and evaluates the whole thickness axis from it.
+Except for energy all units are in SI. Energy is in eV. Angles in radians.
+"""
+import numpy as np
+
+from orangecontrib.crystal.diffraction.DiffractionSetup import DiffractionSetup
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+
+
+class DiffractionSetupThicknessSweeps(DiffractionSetupSweeps):
+
+    def __init__(self, geometry_type, crystal_name,
+                 thickness_min,
+                 thickness_max,
+                 thickness_points,
+                 miller_h, miller_k, miller_l,
+                 asymmetry_angle,
+                 azimuthal_angle,
+                 energy_min,
+                 energy_max,
+                 energy_points,
+                 angle_deviation_min,
+                 angle_deviation_max,
+                 angle_deviation_points):
+        """
+        Constructor.
+        :param geometry_type: GeometryType (BraggDiffraction,...).
+        :param crystal_name: The name of the crystal, e.g. Si.
+        :param thickness_min: The minimum crystal thickness.
+        :param thickness_max: The maximum crystal thickness.
+        :param thickness_points: Number of thickness points.
+        :param miller_h: Miller index H.
+        :param miller_k: Miller index K.
+        :param miller_l: Miller index L.
+        :param asymmetry_angle: The asymmetry angle between surface normal and Bragg normal.
+        :param azimuthal_angle: The angle between the projection of the Bragg normal
+                                on the crystal surface plane and the x axis.
+        :param energy_min: The minimum energy.
+        :param energy_max: The maximum energy.
+        :param energy_points: Number of energy points.
+        :param angle_deviation_min: Minimal angle deviation.
+        :param angle_deviation_max: Maximal angle deviation.
+        :param angle_deviation_points: Number of deviations points.
+        """
+        thicknesses = np.unique(np.linspace(thickness_min,
+                                            thickness_max,
+                                            thickness_points))
+
+        if len(thicknesses) == 0 or thicknesses[0] <= 0.0:
+            raise ValueError("Thicknesses must be positive.")
+
+        self._thicknesses = thicknesses
+
+        # The setup itself stands for the thinnest crystal, e.g. if it is passed to Diffraction.calculateDiffraction.
+        DiffractionSetupSweeps.__init__(self,
+                                        geometry_type=geometry_type,
+                                        crystal_name=crystal_name,
+                                        thickness=thicknesses[0],
+                                        miller_h=miller_h,
+                                        miller_k=miller_k,
+                                        miller_l=miller_l,
+                                        asymmetry_angle=asymmetry_angle,
+                                        azimuthal_angle=azimuthal_angle,
+                                        energy_min=energy_min,
+                                        energy_max=energy_max,
+                                        energy_points=energy_points,
+                                        angle_deviation_min=angle_deviation_min,
+                                        angle_deviation_max=angle_deviation_max,
+                                        angle_deviation_points=angle_deviation_points)
+
+    def thicknesses(self):
+        """
+        Returns the crystal thicknesses of the sweep in ascending order.
+        :return: Array of crystal thicknesses.
+        """
+        return self._thicknesses
+
+    def thicknessMin(self):
+        """
+        Returns the minimum crystal thickness.
+        :return: Minimum crystal thickness.
+        """
+        return self._thicknesses.min()
+
+    def thicknessMax(self):
+        """
+        Returns the maximum crystal thickness.
+        :return: Maximum crystal thickness.
+        """
+        return self._thicknesses.max()
+
+    def thicknessPoints(self):
+        """
+        Returns the number of crystal thicknesses.
+        :return: Number of crystal thicknesses.
+        """
+        return len(self._thicknesses)
+
+    def _fingerprintParameters(self):
+        """
+        Returns the parameters besides the photon axes that determine the diffraction results of this setup.
+        :return: Tuple of plain Python values.
+        """
+        return DiffractionSetupSweeps._fingerprintParameters(self) + \
+               ("thicknesses",) + tuple(float(thickness) for thickness in self._thicknesses)
+
+    def thicknessSetup(self, thickness):
+        """
+        Returns a setup with the same crystal and photons and the given crystal thickness.
+        :param thickness: The crystal thickness.
+        :return: DiffractionSetup of the given thickness.
+        """
+        thickness_setup = DiffractionSetup(geometry_type=self.geometryType(),
+                                           crystal_name=self.crystalName(),
+                                           thickness=thickness,
+                                           miller_h=self.millerH(),
+                                           miller_k=self.millerK(),
+                                           miller_l=self.millerL(),
+                                           asymmetry_angle=self.asymmetryAngle(),
+                                           azimuthal_angle=self.azimuthalAngle(),
+                                           incoming_photons=None)
+
+        thickness_setup._setAxes(self.energies(), self._photonIndexByEnergy())
+
+        # The derived geometry does not depend on the thickness.
+        self._validateCache()
+        thickness_setup._geometry_cache = dict(self._geometry_cache)
+        thickness_setup._geometry_cache_key = self._geometry_cache_key
+        thickness_setup._angle_bragg_cache = dict(self._angle_bragg_cache)
+
+        return thickness_setup
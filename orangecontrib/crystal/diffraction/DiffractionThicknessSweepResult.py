@@ -0,0 +1,130 @@
+"""
+Represents the diffraction results of a thickness sweep as calculated by Diffraction.calculateThicknessSweep.
+Holds one DiffractionResult per crystal thickness. All results share the energy and angle deviation axes.
+"""
+import numpy
+
+
+class DiffractionThicknessSweepResult(object):
+
+    def __init__(self, thicknesses, diffraction_results):
+        """
+        Constructor.
+        :param thicknesses: Ascending array of crystal thicknesses.
+        :param diffraction_results: List of DiffractionResult, one per thickness.
+        """
+        if len(thicknesses) != len(diffraction_results):
+            raise ValueError("Expected one diffraction result per thickness.")
+
+        self._thicknesses = numpy.asarray(thicknesses, dtype=numpy.float64)
+        self._diffraction_results = list(diffraction_results)
+
+    def thicknesses(self):
+        """
+        Returns the crystal thicknesses of these results.
+        :return: Array of crystal thicknesses.
+        """
+        return self._thicknesses
+
+    def diffractionResults(self):
+        """
+        Returns the diffraction results in order of the thicknesses.
+        :return: List of DiffractionResult.
+        """
+        return self._diffraction_results
+
+    def _thicknessIndexByThickness(self, thickness):
+        """
+        Returns the index of the thickness that is closest to the given thickness.
+        :param thickness: Thickness to find index for.
+        :return: Thickness index that corresponds to the thickness.
+        """
+        return abs(self._thicknesses - thickness).argmin()
+
+    def diffractionResultByThickness(self, thickness):
+        """
+        Returns the diffraction result of the thickness that is closest to the given thickness.
+        :param thickness: Thickness to return the result for.
+        :return: DiffractionResult of the thickness.
+        """
+        return self._diffraction_results[self._thicknessIndexByThickness(thickness)]
+
+    def _amplitudesByThickness(self, energy, deviation, polarization_index):
+        """
+        Returns the complex amplitudes of one polarization at one grid point for all thicknesses.
+        :param energy: Energy of the grid point. The closest energy is used.
+        :param deviation: Angle deviation of the grid point. The closest deviation is used.
+        :param polarization_index: Index of the polarization, see DiffractionResult.
+        :return: Array of complex amplitudes, one per thickness.
+        """
+        # All results share the axes, the indices of the first result are valid for all of them.
+        first_result = self._diffraction_results[0]
+        energy_index, deviation_index = first_result.gridIndices(energy, deviation)
+
+        return numpy.array([result._amplitudes(polarization_index)[energy_index, deviation_index]
+                            for result in self._diffraction_results])
+
+    def sAmplitudeByThickness(self, energy, deviation):
+        """
+        Returns the complex amplitude of the S polarization as function of the thickness.
+        :param energy: Energy to return complex amplitude for.
+        :param deviation: Deviation to return complex amplitude for.
+        :return: Complex amplitudes of the S polarization, one per thickness.
+        """
+        return self._amplitudesByThickness(energy, deviation, self._diffraction_results[0].INDEX_POLARIZATION_S)
+
+    def pAmplitudeByThickness(self, energy, deviation):
+        """
+        Returns the complex amplitude of the P polarization as function of the thickness.
+        :param energy: Energy to return complex amplitude for.
+        :param deviation: Deviation to return complex amplitude for.
+        :return: Complex amplitudes of the P polarization, one per thickness.
+        """
+        return self._amplitudesByThickness(energy, deviation, self._diffraction_results[0].INDEX_POLARIZATION_P)
+
+    def sIntensityByThickness(self, energy, deviation):
+        """
+        Returns the intensity of the S polarization as function of the thickness.
+        :param energy: Energy to return intensity for.
+        :param deviation: Deviation to return intensity for.
+        :return: Intensities of the S polarization, one per thickness.
+        """
+        return numpy.abs(self.sAmplitudeByThickness(energy, deviation)) ** 2
+
+    def pIntensityByThickness(self, energy, deviation):
+        """
+        Returns the intensity of the P polarization as function of the thickness.
+        :param energy: Energy to return intensity for.
+        :param deviation: Deviation to return intensity for.
+        :return: Intensities of the P polarization, one per thickness.
+        """
+        return numpy.abs(self.pAmplitudeByThickness(energy, deviation)) ** 2
+
+    def sPhaseByThickness(self, energy, deviation):
+        """
+        Returns the phase of the S polarization as function of the thickness.
+        :param energy: Energy to return phase for.
+        :param deviation: Deviation to return phase for.
+        :return: Phases of the S polarization, one per thickness.
+        """
+        return numpy.angle(self.sAmplitudeByThickness(energy, deviation))
+
+    def pPhaseByThickness(self, energy, deviation):
+        """
+        Returns the phase of the P polarization as function of the thickness.
+        :param energy: Energy to return phase for.
+        :param deviation: Deviation to return phase for.
+        :return: Phases of the P polarization, one per thickness.
+        """
+        return numpy.angle(self.pAmplitudeByThickness(energy, deviation))
+
+    def differencePhaseByThickness(self, energy, deviation):
+        """
+        Returns the phase of the difference between S and P polarizations, i.e. the retardance, as function of
+        the thickness.
+        :param energy: Energy to return phase for.
+        :param deviation: Deviation to return phase for.
+        :return: Phases of the polarization difference, one per thickness.
+        """
+        return numpy.angle(self.sAmplitudeByThickness(energy, deviation) /
+                           self.pAmplitudeByThickness(energy, deviation))
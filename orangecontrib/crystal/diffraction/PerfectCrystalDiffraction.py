@@ -5,9 +5,11 @@ Except for energy all units are in SI. Energy is in eV.
 """
 
 from numpy import pi, cos, sqrt
+import numpy
 
 from orangecontrib.crystal.diffraction.ComplexAmplitude import ComplexAmplitude
-from orangecontrib.crystal.util.Photon import Photon
+from orangecontrib.crystal.util.Photon import Photon, SPEED_OF_LIGHT, PLANCK_CONSTANT, ELEMENTARY_CHARGE
+from orangecontrib.crystal.util.VectorArray import VectorArray
 from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction, LaueDiffraction, BraggTransmission, LaueTransmission
 
 # Use mpmath if possible. Otherwise use native cmath.
@@ -405,6 +407,86 @@ class PerfectCrystalDiffraction(object):
 
         return ComplexAmplitude(complex(complex_amplitude))
 
+    def _calculateEigenSolutionBatch(self, wavelengths, zac_q, zac_z, gamma_0, effective_psi_h_bar):
+        """
+        Calculates the thickness independent parts of the complex amplitudes for a whole batch of incoming photons:
+        the roots x1, x2 and the phases phi1, phi2 per unit thickness. See _calculateComplexAmplitude.
+        :param wavelengths: Wavelengths of the incoming photons.
+        :param zac_q: q as defined in Zachariasen [3-123].
+        :param zac_z: z as defined in Zachariasen [3-123].
+        :param gamma_0: Projection cosine as defined in Zachariasen [3-115].
+        :param effective_psi_h_bar: Effective PsiHBar (depending of polarisation. See text following [3.-139]).
+        :return: Tuple of complex arrays zac_x1, zac_x2, zac_phi1, zac_phi2.
+        """
+        # Calculate geometry independent parts.
+        tmp_root = numpy.sqrt(zac_q + zac_z * zac_z)
+
+        zac_x1 = (-1.0 * zac_z + tmp_root) / effective_psi_h_bar
+        zac_x2 = (-1.0 * zac_z - tmp_root) / effective_psi_h_bar
+        zac_delta1 = 0.5 * (self.Psi0() - zac_z + tmp_root)
+        zac_delta2 = 0.5 * (self.Psi0() - zac_z - tmp_root)
+        zac_phi1 = 2 * pi / gamma_0 / wavelengths * zac_delta1
+        zac_phi2 = 2 * pi / gamma_0 / wavelengths * zac_delta2
+
+        return zac_x1, zac_x2, zac_phi1, zac_phi2
+
+    def _calculateComplexAmplitudeFromEigenSolution(self, zac_x1, zac_x2, zac_phi1, zac_phi2, thickness):
+        """
+        Calculates the complex amplitudes of the questioned wave from the thickness independent parts.
+
+        The exponentials c1=exp(a1) and c2=exp(a2) overflow for thick crystals. Therefore the exponential with
+        the dominant real part is factored out of numerator and denominator and only the ratio
+        exp(-|Re(a1-a2)| + i...) of magnitude <= 1 is evaluated. Differences like c1 - c2 are evaluated with expm1.
+        This is accurate for arbitrarily thick crystals in all four geometries.
+        :param zac_x1: Root x1 as returned by _calculateEigenSolutionBatch.
+        :param zac_x2: Root x2 as returned by _calculateEigenSolutionBatch.
+        :param zac_phi1: Phase phi1 per unit thickness as returned by _calculateEigenSolutionBatch.
+        :param zac_phi2: Phase phi2 per unit thickness as returned by _calculateEigenSolutionBatch.
+        :param thickness: Crystal thickness. Scalar or array that broadcasts against the photon axis,
+                          e.g. of shape (T, 1) for T thicknesses.
+        :return: Complex amplitudes as complex128 array of the broadcast shape.
+        """
+        # Exponents of zac_c1 and zac_c2.
+        zac_a1 = -1j * thickness * zac_phi1
+        zac_a2 = -1j * thickness * zac_phi2
+
+        # Factor out the dominant exponential: c1 = exp(a1) where a1 dominates, c2 = exp(a2) otherwise.
+        # The remaining ratio is exp(a_other - a_dominant), its magnitude is at most one.
+        c1_dominates = zac_a1.real >= zac_a2.real
+        dominant_exponent = numpy.where(c1_dominates, zac_a1, zac_a2)
+        ratio_exponent = numpy.where(c1_dominates, zac_a2 - zac_a1, zac_a1 - zac_a2)
+        ratio = numpy.exp(ratio_exponent)
+        ratio_minus_one = numpy.expm1(ratio_exponent)
+
+        # x_dominant belongs to the dominant exponential, x_other to the other one.
+        x_dominant = numpy.where(c1_dominates, zac_x1, zac_x2)
+        x_other = numpy.where(c1_dominates, zac_x2, zac_x1)
+
+        # Sign that distinguishes the two cases, +1 if c1 dominates.
+        sign = numpy.where(c1_dominates, 1.0, -1.0)
+
+        # Calculate complex amplitude according to given geometry.
+        if self.geometryType() == BraggDiffraction():
+            # x1 x2 (c2 - c1) / (c2 x2 - c1 x1)
+            complex_amplitude = zac_x1 * zac_x2 * ratio_minus_one / \
+                                (ratio * x_other - x_dominant)
+        elif self.geometryType() == LaueDiffraction():
+            # x1 x2 (c1 - c2) / (x2 - x1)
+            complex_amplitude = -zac_x1 * zac_x2 * sign * ratio_minus_one * numpy.exp(dominant_exponent) / \
+                                (zac_x2 - zac_x1)
+        elif self.geometryType() == BraggTransmission():
+            # c1 c2 (x2 - x1) / (c2 x2 - c1 x1)
+            complex_amplitude = numpy.exp(zac_a1 + zac_a2 - dominant_exponent) * (zac_x2 - zac_x1) * sign / \
+                                (ratio * x_other - x_dominant)
+        elif self.geometryType() == LaueTransmission():
+            # (x2 c1 - x1 c2) / (x2 - x1)
+            complex_amplitude = sign * (x_other - x_dominant * ratio) * numpy.exp(dominant_exponent) / \
+                                (zac_x2 - zac_x1)
+        else:
+            raise Exception
+
+        return numpy.asarray(complex_amplitude, dtype=numpy.complex128)
+
     def _calculatePolarizationS(self, photon_in, zac_b, zac_z, gamma_0):
         """
         Calculates complex amplitude for the S polarization.
@@ -481,6 +563,100 @@ class PerfectCrystalDiffraction(object):
         # Returns the complex amplitudes.
         return result
 
+    def calculateDiffractionBatch(self, energies, directions):
+        """
+        Calculate diffraction for a whole batch of incoming photons at once.
+        Array version of calculateDiffraction: all quantities are evaluated as whole-array operations.
+        :param energies: Photon energies in eV. Array of shape (N,).
+        :param directions: Unit direction vectors of the incoming photons. Array of shape (N, 3).
+        :return: Dictionary with complex128 arrays of shape (N,) for the S and P polarization.
+        """
+        return self._calculateDiffractionBatch(energies, directions, self.thickness())
+
+    def calculateDiffractionThicknessSweep(self, energies, directions, thicknesses):
+        """
+        Calculate diffraction for a whole batch of incoming photons and a whole axis of crystal thicknesses.
+        The thickness of this instance is ignored. Only the phase factors depend on the thickness, the
+        eigen-solution of every photon is calculated once and shared by all thicknesses.
+        :param energies: Photon energies in eV. Array of shape (N,).
+        :param directions: Unit direction vectors of the incoming photons. Array of shape (N, 3).
+        :param thicknesses: Crystal thicknesses. Array of shape (T,).
+        :return: Dictionary with complex128 arrays of shape (T, N) for the S and P polarization.
+        """
+        thicknesses = numpy.asarray(thicknesses, dtype=numpy.float64).reshape(-1, 1)
+
+        return self._calculateDiffractionBatch(energies, directions, thicknesses)
+
+    def calculateDiffractionOrientationSweep(self, energies, directions, bragg_normals):
+        """
+        Calculate diffraction for a whole batch of incoming photons with one Bragg normal per photon, i.e. for
+        different crystal orientations (asymmetry and azimuthal angle) of the same reflection.
+        The Bragg normal of this instance is ignored. Psi values and Bragg angle do not depend on the orientation.
+        :param energies: Photon energies in eV. Array of shape (N,).
+        :param directions: Unit direction vectors of the incoming photons. Array of shape (N, 3).
+        :param bragg_normals: Bragg normals of the photons as VectorArray of length N.
+        :return: Dictionary with complex128 arrays of shape (N,) for the S and P polarization.
+        """
+        return self._calculateDiffractionBatch(energies, directions, self.thickness(), bragg_normals)
+
+    def _calculateDiffractionBatch(self, energies, directions, thickness, bragg_normal=None):
+        """
+        Calculate diffraction for a whole batch of incoming photons at once.
+        :param energies: Photon energies in eV. Array of shape (N,).
+        :param directions: Unit direction vectors of the incoming photons. Array of shape (N, 3).
+        :param thickness: Crystal thickness. Scalar or array of shape (T, 1).
+        :param bragg_normal: Bragg normal as Vector or per photon as VectorArray. None for the Bragg normal of
+                             this instance.
+        :return: Dictionary with complex128 arrays of shape (N,) or (T, N) for the S and P polarization.
+        """
+        energies = numpy.asarray(energies, dtype=numpy.float64).reshape(-1)
+        directions = numpy.asarray(directions, dtype=numpy.float64).reshape(-1, 3)
+
+        # Calculate wavelengths and wavenumbers of the incoming photons.
+        wavelengths = SPEED_OF_LIGHT * PLANCK_CONSTANT / (energies * ELEMENTARY_CHARGE)
+        wavenumbers = 2.0 * pi / wavelengths
+
+        if bragg_normal is None:
+            bragg_normal = self.braggNormal()
+
+        # Calculate k_0 and solve the Laue equation for k_H. k_H is rescaled to the photon wavenumber.
+        k_in = VectorArray(directions).scalarMultiplication(wavenumbers)
+        k_out = k_in.addVector(bragg_normal).getNormalizedVector().scalarMultiplication(wavenumbers)
+
+        # Calculate crystal field refraction index difference.
+        zac_alpha = (wavenumbers ** -2) * (bragg_normal.scalarProduct(bragg_normal) +
+                                           2 * k_in.scalarProduct(bragg_normal))
+
+        # Calculate asymmetry ratio.
+        zac_b = k_in.scalarProduct(self.surface_normal()) / k_out.scalarProduct(self.surface_normal())
+
+        # Calculate z as defined in Zachariasen [3-123].
+        zac_z = self._calculateZacZ(zac_b, zac_alpha)
+
+        # Calculate projection cosine.
+        gamma_0 = -directions.dot(self.surface_normal().getNormalizedVector().components())
+
+        # Calculate complex amplitude for S polarization.
+        zac_q = self._calculateZacQ(zac_b, self.PsiH(), self.PsiHBar())
+        eigen_solution = self._calculateEigenSolutionBatch(wavelengths, zac_q, zac_z, gamma_0, self.PsiHBar())
+        amplitude_s = self._calculateComplexAmplitudeFromEigenSolution(*eigen_solution, thickness=thickness)
+
+        # Calculate complex amplitude for P polarization.
+        effective_psi_h = self.PsiH() * cos(2 * self.braggAngle())
+        effective_psi_h_bar = self.PsiHBar() * cos(2 * self.braggAngle())
+        zac_q = self._calculateZacQ(zac_b, effective_psi_h, effective_psi_h_bar)
+        eigen_solution = self._calculateEigenSolutionBatch(wavelengths, zac_q, zac_z, gamma_0, effective_psi_h_bar)
+        amplitude_p = self._calculateComplexAmplitudeFromEigenSolution(*eigen_solution, thickness=thickness)
+
+        # Power balance factor for diffracted beams. See calculateDiffraction.
+        if (self.geometryType() == BraggDiffraction() or
+                self.geometryType() == LaueDiffraction()):
+            amplitude_s /= numpy.sqrt(numpy.abs(zac_b))
+            amplitude_p /= numpy.sqrt(numpy.abs(zac_b))
+
+        return {"S": amplitude_s,
+                "P": amplitude_p}
+
     def _logMembers(self, zac_b, zac_alpha, photon_in, result):
         """
         Debug logs the member variables and other relevant partial results.
@@ -0,0 +1,21 @@
+"""
+Calculates the Psi as defined in Zachariasen [3-95], i.e. the Fourier components of the electric susceptibility,
+from structure factors. Shared by Diffraction, DiffractionSetup and SusceptibilityTable.
+Except for energy all units are in SI. Energy is in eV.
+"""
+from numpy import pi
+import scipy.constants
+
+# Physical constants are resolved once per process.
+CLASSICAL_ELECTRON_RADIUS = scipy.constants.physical_constants["classical electron radius"][0]
+
+
+def psiFromStructureFactor(unit_cell_volume, wavelength, structure_factor):
+    """
+    Calculates the Psi as defined in Zachariasen [3-95].
+    :param unit_cell_volume: Volume of the unit cell in m^3.
+    :param wavelength: Photon wavelength in m. Scalar or array.
+    :param structure_factor: Structure factor. Scalar or array.
+    :return: Psi as defined in Zachariasen [3-95].
+    """
+    return (-CLASSICAL_ELECTRON_RADIUS * wavelength ** 2 / (pi * unit_cell_volume)) * structure_factor
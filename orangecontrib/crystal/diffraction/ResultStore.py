@@ -0,0 +1,272 @@
+"""
+Persistent content-addressed store of calculation results.
+Results are saved as compressed NumPy containers (.npz) named by a hexadecimal key, e.g. a setup fingerprint, and
+survive the process. Several processes may share one store directory: files are written to a temporary file and
+renamed into place atomically, so readers see either a complete result or none. Once the store exceeds its byte
+budget the least recently used results are removed. Every instance tracks the bytes of the store from its own saves
+and scans the directory only when the budget may be exceeded, so results saved by other processes are accounted for
+at the next scan.
+"""
+import os
+import re
+import tempfile
+import zipfile
+
+import numpy
+
+
+class ResultStore(object):
+
+    # Prefix of files that are still being written.
+    TEMPORARY_PREFIX = ".tmp-"
+
+    def __init__(self, directory, max_bytes=2 * 1024 ** 3):
+        """
+        Constructor. The directory is created on first save.
+        :param directory: Directory holding the results.
+        :param max_bytes: Byte budget of the stored results.
+        """
+        self._directory = directory
+        self.setMaxBytes(max_bytes)
+        self.resetStatistics()
+
+        # Bytes of the stored results as of the last directory scan plus the saves since. None until the first scan.
+        self._tracked_bytes = None
+
+    def directory(self):
+        """
+        Returns the directory holding the results.
+        :return: Directory holding the results.
+        """
+        return self._directory
+
+    def maxBytes(self):
+        """
+        Returns the byte budget of the stored results.
+        :return: Byte budget of the stored results.
+        """
+        return self._max_bytes
+
+    def setMaxBytes(self, max_bytes):
+        """
+        Sets the byte budget of the stored results. Takes effect on the next save.
+        :param max_bytes: Byte budget of the stored results.
+        """
+        if max_bytes < 0:
+            raise ValueError("Byte budget must not be negative.")
+
+        self._max_bytes = max_bytes
+
+    def hits(self):
+        """
+        Returns the number of loads of this instance that found a result.
+        :return: Number of hits.
+        """
+        return self._hits
+
+    def misses(self):
+        """
+        Returns the number of loads of this instance that found no result.
+        :return: Number of misses.
+        """
+        return self._misses
+
+    def resetStatistics(self):
+        """
+        Resets the hit and miss counters.
+        """
+        self._hits = 0
+        self._misses = 0
+
+    def _path(self, key):
+        """
+        Returns the file of a key. Files are spread over subdirectories named by the first two key characters.
+        :param key: Hexadecimal key.
+        :return: Path of the file holding the result of the key.
+        """
+        if re.match("^[0-9a-f]{8,}$", key) is None:
+            raise ValueError("Keys must be lower case hexadecimal digests, got %s." % key)
+
+        return os.path.join(self._directory, key[:2], key + ".npz")
+
+    def _resultFiles(self):
+        """
+        Returns the stored results.
+        :return: List of (path, size in bytes, time of last use) tuples.
+        """
+        result_files = list()
+
+        if not os.path.isdir(self._directory):
+            return result_files
+
+        for subdirectory in os.scandir(self._directory):
+            if not subdirectory.is_dir():
+                continue
+
+            for entry in os.scandir(subdirectory.path):
+                if not entry.name.endswith(".npz") or entry.name.startswith(self.TEMPORARY_PREFIX):
+                    continue
+
+                # Another process may remove files at any time.
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                result_files.append((entry.path, stat.st_size, stat.st_mtime))
+
+        return result_files
+
+    def size(self):
+        """
+        Returns the number of stored results.
+        :return: Number of stored results.
+        """
+        return len(self._resultFiles())
+
+    def usedBytes(self):
+        """
+        Returns the bytes held by the stored results.
+        :return: Bytes held by the stored results.
+        """
+        return sum(size for _, size, _ in self._resultFiles())
+
+    def contains(self, key):
+        """
+        Determines if a result is stored for the key.
+        :param key: Hexadecimal key.
+        :return: True if a result is stored. False otherwise.
+        """
+        return os.path.isfile(self._path(key))
+
+    def load(self, key):
+        """
+        Loads the result of a key and marks it as used.
+        :param key: Hexadecimal key.
+        :return: Dictionary name -> numpy array as saved, or None if no result is stored.
+        """
+        path = self._path(key)
+
+        try:
+            with numpy.load(path, allow_pickle=False) as container:
+                arrays = dict((name, container[name]) for name in container.files)
+        except FileNotFoundError:
+            self._misses += 1
+            return None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # Unreadable, e.g. written by a process that crashed before atomic renames were used. Drop it.
+            self._remove(path)
+            self._tracked_bytes = None
+            self._misses += 1
+            return None
+
+        # The modification time is the time of last use.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self._hits += 1
+        return arrays
+
+    def save(self, key, arrays):
+        """
+        Saves a result under a key and evicts least recently used results beyond the byte budget.
+        The directory is scanned on the first save and whenever the tracked bytes exceed the budget.
+        :param key: Hexadecimal key.
+        :param arrays: Dictionary name -> numpy array.
+        """
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        file_descriptor, temporary_path = tempfile.mkstemp(prefix=self.TEMPORARY_PREFIX,
+                                                           suffix=".npz",
+                                                           dir=directory)
+        try:
+            with os.fdopen(file_descriptor, "wb") as temporary_file:
+                numpy.savez_compressed(temporary_file, **arrays)
+
+            saved_bytes = os.path.getsize(temporary_path)
+
+            # A result saved before under the same key is replaced.
+            try:
+                replaced_bytes = os.path.getsize(path)
+            except OSError:
+                replaced_bytes = 0
+
+            os.replace(temporary_path, path)
+        except BaseException:
+            self._remove(temporary_path)
+            raise
+
+        if self._tracked_bytes is None:
+            self._evict()
+        else:
+            self._tracked_bytes += saved_bytes - replaced_bytes
+
+            if self._tracked_bytes > self._max_bytes:
+                self._evict()
+
+    def remove(self, key):
+        """
+        Removes the result of a key if it is stored.
+        :param key: Hexadecimal key.
+        """
+        self._remove(self._path(key))
+        self._tracked_bytes = None
+
+    def clear(self):
+        """
+        Removes all stored results.
+        """
+        for path, _, _ in self._resultFiles():
+            self._remove(path)
+
+        self._tracked_bytes = None
+
+    def _remove(self, path):
+        """
+        Removes a file. Files already removed by another process are ignored.
+        :param path: Path of the file.
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """
+        Removes least recently used results until the byte budget holds. Scans the directory and resets the tracked
+        bytes.
+        """
+        result_files = self._resultFiles()
+        used_bytes = sum(size for _, size, _ in result_files)
+
+        for path, size, _ in sorted(result_files, key=lambda result_file: result_file[2]):
+            if used_bytes <= self._max_bytes:
+                break
+
+            self._remove(path)
+            used_bytes -= size
+
+        self._tracked_bytes = used_bytes
+
+
+def _defaultDirectory():
+    """
+    Returns the directory of the default result store. Can be set with the ORANGE_CRYSTAL_RESULT_STORE
+    environment variable.
+    :return: Directory of the default result store.
+    """
+    directory = os.environ.get("ORANGE_CRYSTAL_RESULT_STORE")
+
+    if directory is None:
+        cache_home = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+        directory = os.path.join(cache_home, "Orange-Crystal", "results")
+
+    return directory
+
+
+# Store shared by all calculations of this user that opt in.
+result_store = ResultStore(_defaultDirectory())
@@ -0,0 +1,121 @@
+"""
+Process-wide memoization of xraylib structure factors.
+Structure factors are keyed by (crystal name, h, k, l, energy, Debye-Waller factor) and evicted in LRU order.
+Energy is in eV.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+import xraylib
+
+
+class StructureFactorCache(object):
+
+    def __init__(self, max_size=100000):
+        """
+        Constructor.
+        :param max_size: Maximal number of cached structure factors.
+        """
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self.setMaxSize(max_size)
+        self.resetStatistics()
+
+    def maxSize(self):
+        """
+        Returns the maximal number of cached structure factors.
+        :return: Maximal number of cached structure factors.
+        """
+        return self._max_size
+
+    def setMaxSize(self, max_size):
+        """
+        Sets the maximal number of cached structure factors. Evicts least recently used entries if necessary.
+        :param max_size: Maximal number of cached structure factors.
+        """
+        if max_size < 0:
+            raise ValueError("Cache size must not be negative.")
+
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    def size(self):
+        """
+        Returns the number of cached structure factors.
+        :return: Number of cached structure factors.
+        """
+        return len(self._entries)
+
+    def hits(self):
+        """
+        Returns the number of lookups that were served from the cache.
+        :return: Number of cache hits.
+        """
+        return self._hits
+
+    def misses(self):
+        """
+        Returns the number of lookups that required an xraylib calculation.
+        :return: Number of cache misses.
+        """
+        return self._misses
+
+    def resetStatistics(self):
+        """
+        Resets the hit and miss counters.
+        """
+        self._hits = 0
+        self._misses = 0
+
+    def clear(self):
+        """
+        Removes all cached structure factors and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.resetStatistics()
+
+    def _evict(self):
+        """
+        Evicts least recently used entries until the size bound holds.
+        """
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def structureFactor(self, crystal_name, crystal, energy, miller_h, miller_k, miller_l, debye_waller):
+        """
+        Returns the structure factor F_H for H=(h,k,l). Calculates it with xraylib if it is not cached.
+        :param crystal_name: The name of the crystal, e.g. Si. Identifies the crystal in the cache key.
+        :param crystal: The xraylib crystal.
+        :param energy: Photon energy in eV.
+        :param miller_h: Miller index H.
+        :param miller_k: Miller index K.
+        :param miller_l: Miller index L.
+        :param debye_waller: Debye-Waller factor.
+        :return: Structure factor.
+        """
+        key = (crystal_name, miller_h, miller_k, miller_l, float(energy), float(debye_waller))
+
+        with self._lock:
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        structure_factor = xraylib.Crystal_F_H_StructureFactor(crystal,
+                                                               energy / 1000.0,
+                                                               miller_h, miller_k, miller_l,
+                                                               debye_waller, 1.0)
+
+        with self._lock:
+            self._misses += 1
+            self._entries[key] = structure_factor
+            self._entries.move_to_end(key)
+            self._evict()
+
+        return structure_factor
+
+
+# Cache shared by all diffraction setups of this process.
+structure_factor_cache = StructureFactorCache()
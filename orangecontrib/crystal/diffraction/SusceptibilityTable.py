@@ -0,0 +1,173 @@
+"""
+Energy-interpolated susceptibility table for dense energy sweeps.
+The structure factors F_0, F_H and F_H_bar are calculated with xraylib on a coarse energy grid that is refined
+adaptively, in particular around absorption edges. Psi_0, psi_H and psi_H_bar as defined in Zachariasen [3-95] are
+then evaluated for arbitrary energies by vectorized linear interpolation of the structure factors, combined with the
+exact wavelength dependence of psi.
+
+Error bound: every interval of the table was checked at its midpoint. Linear interpolation reproduces the exact
+structure factors there within half the relative tolerance. Since the error of linear interpolation is largest
+at the interval midpoint (h^2 F''/8) the interpolated structure factors satisfy
+|F_interpolated - F| <= tolerance * |F| on the whole table for structure factors that are smooth on the scale of
+the minimal spacing. Absorption edges of all atoms of the
+crystal are inserted as table nodes, so the interpolation never crosses an edge except within the minimal spacing.
+
+Except for energy all units are in SI. Energy is in eV.
+"""
+import numpy as np
+import xraylib
+
+from orangecontrib.crystal.diffraction.CrystalRegistry import crystal_registry
+from orangecontrib.crystal.diffraction.Psi import psiFromStructureFactor
+from orangecontrib.crystal.util.Photon import SPEED_OF_LIGHT, PLANCK_CONSTANT, ELEMENTARY_CHARGE
+
+
+class SusceptibilityTable(object):
+
+    # Absorption edges that are inserted into the table if they fall into its energy range.
+    EDGE_SHELLS = (xraylib.K_SHELL,
+                   xraylib.L1_SHELL, xraylib.L2_SHELL, xraylib.L3_SHELL,
+                   xraylib.M1_SHELL, xraylib.M2_SHELL, xraylib.M3_SHELL, xraylib.M4_SHELL, xraylib.M5_SHELL)
+
+    def __init__(self, diffraction_setup, energy_min, energy_max, tolerance=1e-4, initial_points=16,
+                 minimal_spacing=0.01):
+        """
+        Constructor.
+        :param diffraction_setup: Diffraction setup providing crystal and Miller indices.
+        :param energy_min: Minimal energy of the table in eV.
+        :param energy_max: Maximal energy of the table in eV.
+        :param tolerance: Relative interpolation error bound of the structure factors.
+        :param initial_points: Number of points of the initial uniform energy grid.
+        :param minimal_spacing: Intervals are not refined below this spacing in eV.
+        """
+        self._diffraction_setup = diffraction_setup
+        self._tolerance = tolerance
+        self._minimal_spacing = minimal_spacing
+
+        unitcell_volume = diffraction_setup.unitcellVolume() * 10 ** -30
+
+        # psi(E) = psi_factor * F(E) / E^2 as the wavelength is inversely proportional to the energy.
+        self._psi_factor = psiFromStructureFactor(unitcell_volume,
+                                                  SPEED_OF_LIGHT * PLANCK_CONSTANT / ELEMENTARY_CHARGE,
+                                                  1.0)
+
+        self._buildTable(energy_min, energy_max, initial_points)
+
+    def tolerance(self):
+        """
+        Returns the relative interpolation error bound of the structure factors.
+        :return: Relative interpolation error bound.
+        """
+        return self._tolerance
+
+    def energies(self):
+        """
+        Returns the energies of the table nodes.
+        :return: Energies of the table nodes.
+        """
+        return self._energies
+
+    def _edgeEnergies(self, energy_min, energy_max):
+        """
+        Returns the absorption edges of the crystal atoms within the given energy range.
+        :param energy_min: Minimal energy in eV.
+        :param energy_max: Maximal energy in eV.
+        :return: Absorption edge energies in eV.
+        """
+        crystal = crystal_registry.crystal(self._diffraction_setup.crystalName())
+        atomic_numbers = set(atom["Zatom"] for atom in crystal["atom"])
+
+        edges = list()
+        for atomic_number in atomic_numbers:
+            for shell in self.EDGE_SHELLS:
+                try:
+                    edge = xraylib.EdgeEnergy(atomic_number, shell) * 1000.0
+                except ValueError:
+                    continue
+
+                if energy_min < edge < energy_max:
+                    edges.append(edge)
+
+        return edges
+
+    def _exactStructureFactors(self, energy):
+        """
+        Returns the exact structure factors at one energy.
+        :param energy: Energy in eV.
+        :return: Array of F_0, F_H and F_H_bar.
+        """
+        return np.array([self._diffraction_setup.F0(energy),
+                         self._diffraction_setup.FH(energy),
+                         self._diffraction_setup.FH_bar(energy)], dtype=np.complex128)
+
+    def _buildTable(self, energy_min, energy_max, initial_points):
+        """
+        Builds the table by refining the initial grid until the tolerance is met on every interval.
+        :param energy_min: Minimal energy in eV.
+        :param energy_max: Maximal energy in eV.
+        :param initial_points: Number of points of the initial uniform energy grid.
+        """
+        nodes = set(np.linspace(energy_min, energy_max, max(initial_points, 2)))
+
+        # Place nodes just below and above every absorption edge.
+        for edge in self._edgeEnergies(energy_min, energy_max):
+            nodes.add(max(edge - 0.5 * self._minimal_spacing, energy_min))
+            nodes.add(min(edge + 0.5 * self._minimal_spacing, energy_max))
+
+        values = dict((energy, self._exactStructureFactors(energy)) for energy in nodes)
+
+        sorted_nodes = sorted(nodes)
+        pending = list(zip(sorted_nodes[:-1], sorted_nodes[1:]))
+
+        while len(pending) > 0:
+            refine = list()
+            for energy_left, energy_right in pending:
+                if energy_right - energy_left <= self._minimal_spacing:
+                    continue
+
+                energy_middle = 0.5 * (energy_left + energy_right)
+                exact = self._exactStructureFactors(energy_middle)
+                interpolated = 0.5 * (values[energy_left] + values[energy_right])
+                values[energy_middle] = exact
+
+                # Check against half the tolerance to leave a margin for the error away from the midpoint.
+                # Intervals with NaN structure factors on one side only (e.g. at the Bragg cutoff) are refined, too.
+                if np.any(np.abs(interpolated - exact) > 0.5 * self._tolerance * np.abs(exact)) or \
+                   np.any(np.isnan(values[energy_left]) != np.isnan(values[energy_right])):
+                    refine.append((energy_left, energy_middle))
+                    refine.append((energy_middle, energy_right))
+
+            pending = refine
+
+        self._energies = np.array(sorted(values.keys()))
+        self._structure_factors = np.array([values[energy] for energy in self._energies])
+
+    def _interpolate(self, energies, index):
+        """
+        Linearly interpolates one structure factor.
+        :param energies: Energies in eV.
+        :param index: 0 for F_0, 1 for F_H, 2 for F_H_bar.
+        :return: Interpolated structure factor.
+        """
+        column = self._structure_factors[:, index]
+        return np.interp(energies, self._energies, column.real) + \
+               1j * np.interp(energies, self._energies, column.imag)
+
+    def structureFactors(self, energies):
+        """
+        Returns the interpolated structure factors.
+        :param energies: Energy or array of energies in eV.
+        :return: Tuple F_0, F_H, F_H_bar.
+        """
+        return (self._interpolate(energies, 0),
+                self._interpolate(energies, 1),
+                self._interpolate(energies, 2))
+
+    def psi(self, energies):
+        """
+        Returns the interpolated psis as defined in Zachariasen [3-95].
+        :param energies: Energy or array of energies in eV.
+        :return: Tuple psi_0, psi_H, psi_H_bar.
+        """
+        factor = self._psi_factor / np.asarray(energies, dtype=np.float64) ** 2
+        return tuple(factor * structure_factor for structure_factor in self.structureFactors(energies))
@@ -156,9 +156,6 @@ def plot_diffraction_1d(result, deg):
     info_dict = result.diffractionSetup().asInfoDictionary()
     info_dict["Bragg angle"] = str(result.braggAngle())
 
-    # Retrieve angles of the results.
-    angles_in_um = [i * 1e+6 for i in result.angleDeviations()]
-
     # Define inner function to duplicate info for every plot.
     def addPlotInfo(info_dict, energy, angles_in_um, data):
         plot_data = PlotData1D(data[0], data[1], data[2])
@@ -171,6 +168,9 @@ def plot_diffraction_1d(result, deg):
 
     plots = []
     for energy in result.energies():
+        # Retrieve angles of the results for this energy.
+        angles_in_um = [i * 1e+6 for i in result.angleDeviationsByEnergy(energy)]
+
         # Intensity S polarization.
         categories = []
 
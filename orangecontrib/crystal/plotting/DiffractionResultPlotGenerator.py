@@ -71,7 +71,7 @@ class DiffractionResultPlotGenerator(PlotGenerator):
         if plot_type == AngleSweepIntensity() or plot_type == AngleSweepPhase():
             # Retrieve angles of the results.
             parameter_name = "Energy"
-            axis_x = [i * 1e+6 for i in self._diffraction_result.angleDeviations()]
+            axis_x = [i * 1e+6 for i in self._diffraction_result.angleDeviationsByEnergy(parameter)]
 
             if plot_type == AngleSweepIntensity():
                 plot_data = PlotData1D("Intensity - " + polarization_name,
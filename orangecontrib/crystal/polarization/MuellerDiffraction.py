@@ -1,14 +1,39 @@
+import hashlib
+
+import numpy
+
 from orangecontrib.crystal.polarization.CrystalPhasePlate import CrystalPhasePlate
 from orangecontrib.crystal.polarization.MuellerResult import MuellerResult
 
 
 class MuellerDiffraction(object):
 
-    def __init__(self, diffraction_result, incoming_stokes_vector, inclination_angle=0.0):
+    # Version of the calculation as seen by the result store. Increase it whenever a change of the calculation
+    # changes its results, so results stored by older versions are no longer found.
+    RESULT_STORE_VERSION = 1
+
+    def __init__(self, diffraction_result, incoming_stokes_vector, inclination_angle=0.0, result_store=None):
 
         self._diffraction_result = diffraction_result  # DiffractionResult object.
         self._incoming_stokes_vector = incoming_stokes_vector  # StokesVector object.
         self._inclination_angle = inclination_angle
+        self._result_store = result_store  # ResultStore object or None.
+
+    def _result_store_key(self):
+        """
+        Returns the key of the outgoing Stokes vectors in the result store. Covers the versions of the calculation
+        and of the stored arrays, the content of the diffraction result, the incoming Stokes vector and the
+        inclination angle.
+        :return: Hexadecimal SHA-256 digest.
+        """
+        digest = hashlib.sha256(self.__class__.__name__.encode("utf-8"))
+        digest.update(numpy.array([MuellerDiffraction.RESULT_STORE_VERSION, MuellerResult.ARRAYS_FORMAT_VERSION],
+                                  dtype=numpy.int64).tobytes())
+        digest.update(self._diffraction_result.contentDigest().encode("ascii"))
+        digest.update(numpy.asarray(self._incoming_stokes_vector.get_array(), dtype=numpy.float64).tobytes())
+        digest.update(numpy.array([self._inclination_angle], dtype=numpy.float64).tobytes())
+
+        return digest.hexdigest()
 
     def _intensity_sigma(self, energy, index):
         """
@@ -47,7 +72,9 @@ class MuellerDiffraction(object):
         Calculates the outgoing Stokes vectors (deviation) for a certain energy.
         :return: StokesVector objects (deviations).
         """
-        for index, deviation in enumerate(self._diffraction_result.angleDeviations()):
+        stokes_vectors = list()
+
+        for index in range(len(self._diffraction_result.angleDeviationsByEnergy(energy))):
 
             intensity_sigma = self._intensity_sigma(energy, index)
             phase_sigma = self._phase_sigma(energy, index)
@@ -59,13 +86,32 @@ class MuellerDiffraction(object):
                                                     intensity_pi, phase_pi,
                                                     self._inclination_angle)
 
-            mueller_result.add(energy, deviation, crystal_phase_plate.calculate_stokes_vector())
+            stokes_vectors.append(crystal_phase_plate.calculate_stokes_vector())
+
+        # Set the whole energy row at once.
+        mueller_result.set_stokes_by_energy(energy,
+                                            [stokes_vector.s0 for stokes_vector in stokes_vectors],
+                                            [stokes_vector.s1 for stokes_vector in stokes_vectors],
+                                            [stokes_vector.s2 for stokes_vector in stokes_vectors],
+                                            [stokes_vector.s3 for stokes_vector in stokes_vectors])
 
     def calculate_stokes(self):
         """
         Calculates the outgoing Stokes vectors (deviation).
         :return: StokesVector objects (deviations).
         """
+        # Reuse Stokes vectors calculated before, possibly by another process.
+        if self._result_store is not None:
+            key = self._result_store_key()
+            arrays = self._result_store.load(key)
+
+            if arrays is not None:
+                try:
+                    return MuellerResult.from_arrays(self._diffraction_result, arrays)
+                except ValueError:
+                    # Malformed or of another format. Recalculate and overwrite it.
+                    pass
+
         # Create an instance of the MuellerResult class.
         mueller_result = MuellerResult(self._diffraction_result)
 
@@ -73,4 +119,7 @@ class MuellerDiffraction(object):
         for energy in self._diffraction_result.energies():
             self._calculate_stokes_for_energy(energy, mueller_result)
 
+        if self._result_store is not None:
+            self._result_store.save(key, mueller_result.as_arrays())
+
         return mueller_result
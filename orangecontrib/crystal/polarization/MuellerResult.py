@@ -6,6 +6,9 @@ import numpy
 
 class MuellerResult(object):
 
+    # Version of the arrays returned by as_arrays. Increase it whenever their names or meaning change.
+    ARRAYS_FORMAT_VERSION = 1
+
     def __init__(self, diffraction_result):
         """
         Constructor.
@@ -14,8 +17,11 @@ class MuellerResult(object):
         self.diffraction_result = diffraction_result
         self.diffraction_setup = diffraction_result.diffractionSetup()
 
+        # Index map for point-wise lookups of energies.
+        self._energy_index_map = dict((energy, index) for index, energy in enumerate(self.energies()))
+
         number_energies = len(self.energies())
-        number_angles = len(self.angle_deviations())
+        number_angles = max(len(diffraction_result.angleDeviationsByEnergy(energy)) for energy in self.energies())
 
         # Stokes parameters.
         self._s0 = numpy.zeros((number_energies,
@@ -47,7 +53,11 @@ class MuellerResult(object):
         :param energy: Energy to find index for.
         :return: Energy index that corresponds to the energy.
         """
-        energy_index = abs(self.energies()-energy).argmin()
+        energy_index = self._energy_index_map.get(energy)
+
+        if energy_index is None:
+            energy_index = abs(self.energies()-energy).argmin()
+
         return energy_index
 
     def angle_deviations(self):
@@ -57,13 +67,28 @@ class MuellerResult(object):
         """
         return self.diffraction_result.angleDeviations()
 
-    def _deviation_index(self, deviation):
+    def angle_deviations_by_energy(self, energy):
+        """
+        Returns the angle deviations used for the given energy.
+        :param energy: Energy to return the angle deviations for.
+        :return: Angle deviations used for the given energy.
+        """
+        return self.diffraction_result.angleDeviationsByEnergy(energy)
+
+    def _deviation_index(self, deviation, energy=None):
         """
         Returns the index of the entry in the angle deviations list that is closest to the given deviation.
         :param deviation: Deviation to find index for.
+        :param energy: If given the angle deviations of this energy are searched.
         :return: Deviation index that corresponds to the deviation.
         """
-        deviation_index = abs(self.angle_deviations()-deviation).argmin()
+        if energy is None:
+            angle_deviations = self.angle_deviations()
+            deviation_index = abs(angle_deviations-deviation).argmin()
+        else:
+            # Delegate to the index maps of the diffraction result.
+            _, deviation_index = self.diffraction_result.gridIndices(energy, deviation)
+
         return deviation_index
 
     def s0_by_energy(self, energy):
@@ -73,7 +98,8 @@ class MuellerResult(object):
         :return: S0.
         """
         energy_index = self._energy_index(energy)
-        return self._s0[energy_index, :]
+        number_deviations = len(self.angle_deviations_by_energy(energy))
+        return self._s0[energy_index, :number_deviations]
 
     def s1_by_energy(self, energy):
         """
@@ -82,7 +108,8 @@ class MuellerResult(object):
         :return: S1.
         """
         energy_index = self._energy_index(energy)
-        return self._s1[energy_index, :]
+        number_deviations = len(self.angle_deviations_by_energy(energy))
+        return self._s1[energy_index, :number_deviations]
 
     def s2_by_energy(self, energy):
         """
@@ -91,7 +118,8 @@ class MuellerResult(object):
         :return: S2.
         """
         energy_index = self._energy_index(energy)
-        return self._s2[energy_index, :]
+        number_deviations = len(self.angle_deviations_by_energy(energy))
+        return self._s2[energy_index, :number_deviations]
 
     def s3_by_energy(self, energy):
         """
@@ -100,7 +128,8 @@ class MuellerResult(object):
         :return: S3.
         """
         energy_index = self._energy_index(energy)
-        return self._s3[energy_index, :]
+        number_deviations = len(self.angle_deviations_by_energy(energy))
+        return self._s3[energy_index, :number_deviations]
 
     def polarization_degree_by_energy(self, energy):
         """
@@ -109,7 +138,8 @@ class MuellerResult(object):
         :return: degree of circular polarization.
         """
         energy_index = self._energy_index(energy)
-        return self._polarization_degree[energy_index, :]
+        number_deviations = len(self.angle_deviations_by_energy(energy))
+        return self._polarization_degree[energy_index, :number_deviations]
 
     def s0_by_deviation(self, deviation):
         """
@@ -162,10 +192,88 @@ class MuellerResult(object):
         Adds a result for a given energy and deviation.
         """
         energy_index = self._energy_index(energy)
-        deviation_index = self._deviation_index(deviation)
+        deviation_index = self._deviation_index(deviation, energy)
 
         self._s0[energy_index, deviation_index] = stokes_vector.s0
         self._s1[energy_index, deviation_index] = stokes_vector.s1
         self._s2[energy_index, deviation_index] = stokes_vector.s2
         self._s3[energy_index, deviation_index] = stokes_vector.s3
         self._polarization_degree[energy_index, deviation_index] = stokes_vector.polarization_degree()
+
+    def set_stokes_by_energy(self, energy, s0, s1, s2, s3):
+        """
+        Sets the Stokes parameters of one energy at once.
+        :param energy: Energy of the results.
+        :param s0: Array of S0 aligned with angle_deviations_by_energy(energy).
+        :param s1: Array of S1 aligned with angle_deviations_by_energy(energy).
+        :param s2: Array of S2 aligned with angle_deviations_by_energy(energy).
+        :param s3: Array of S3 aligned with angle_deviations_by_energy(energy).
+        """
+        energy_index = self._energy_index(energy)
+        number_deviations = len(self.angle_deviations_by_energy(energy))
+
+        self._s0[energy_index, :number_deviations] = s0
+        self._s1[energy_index, :number_deviations] = s1
+        self._s2[energy_index, :number_deviations] = s2
+        self._s3[energy_index, :number_deviations] = s3
+        self._polarization_degree[energy_index, :number_deviations] = numpy.asarray(s3) / numpy.asarray(s0)
+
+    def as_arrays(self):
+        """
+        Returns the Stokes parameters as plain arrays, e.g. for a ResultStore.
+        :return: Dictionary name -> numpy array. See from_arrays.
+        """
+        return {"format_version": numpy.array(self.ARRAYS_FORMAT_VERSION, dtype=numpy.int64),
+                "s0": self._s0,
+                "s1": self._s1,
+                "s2": self._s2,
+                "s3": self._s3,
+                "polarization_degree": self._polarization_degree}
+
+    @staticmethod
+    def from_arrays(diffraction_result, arrays):
+        """
+        Creates Mueller results from the arrays returned by as_arrays. Raises ValueError if the arrays are of another
+        format version or malformed, e.g. read from a damaged file.
+        :param diffraction_result: result of the diffraction the Stokes parameters were calculated for.
+        :param arrays: Dictionary name -> numpy array as returned by as_arrays.
+        :return: MuellerResult holding the arrays.
+        """
+        mueller_result = MuellerResult(diffraction_result)
+
+        MuellerResult._check_arrays(arrays, mueller_result._s0.shape)
+
+        mueller_result._s0[:, :] = arrays["s0"]
+        mueller_result._s1[:, :] = arrays["s1"]
+        mueller_result._s2[:, :] = arrays["s2"]
+        mueller_result._s3[:, :] = arrays["s3"]
+        mueller_result._polarization_degree[:, :] = arrays["polarization_degree"]
+
+        return mueller_result
+
+    @staticmethod
+    def _check_arrays(arrays, shape):
+        """
+        Checks that arrays are as returned by as_arrays of this format version. Raises ValueError otherwise.
+        :param arrays: Dictionary name -> numpy array.
+        :param shape: Shape of the Stokes parameter arrays, i.e. (energies, deviations).
+        """
+        stokes_names = ["s0", "s1", "s2", "s3", "polarization_degree"]
+
+        if set(arrays.keys()) != set(stokes_names + ["format_version"]):
+            raise ValueError("Expected arrays %s, got %s." % (sorted(stokes_names + ["format_version"]),
+                                                               sorted(arrays.keys())))
+
+        format_version = numpy.asarray(arrays["format_version"])
+        if format_version.dtype.kind != "i" or format_version.ndim != 0:
+            raise ValueError("Malformed array format_version of dtype %s and shape %s." % (format_version.dtype,
+                                                                                          format_version.shape))
+
+        if int(format_version) != MuellerResult.ARRAYS_FORMAT_VERSION:
+            raise ValueError("Expected arrays of format version %i, got %i." % (MuellerResult.ARRAYS_FORMAT_VERSION,
+                                                                               int(format_version)))
+
+        for name in stokes_names:
+            array = numpy.asarray(arrays[name])
+            if array.dtype.kind != "f" or array.shape != shape:
+                raise ValueError("Malformed array %s of dtype %s and shape %s." % (name, array.dtype, array.shape))
@@ -4,13 +4,24 @@ from orangecontrib.crystal.tests.diffraction.GeometryTypeTest import GeometryTyp
 from orangecontrib.crystal.tests.plotting.PlotData1DTest import PlotData1DTest
 
 from orangecontrib.crystal.tests.util.VectorTest import VectorTest
+from orangecontrib.crystal.tests.util.VectorArrayTest import VectorArrayTest
 from orangecontrib.crystal.tests.util.PhotonTest import PhotonTest
+from orangecontrib.crystal.tests.util.PhotonBundleTest import PhotonBundleTest
 from orangecontrib.crystal.tests.diffraction.ComplexAmplitudeTest import ComplexAmplitudeTest
 from orangecontrib.crystal.tests.diffraction.PerfectCrystalDiffractionTest import PerfectCrystalDiffractionTest
 from orangecontrib.crystal.tests.diffraction.DiffractionSetupTest import DiffractionSetupTest
 from orangecontrib.crystal.tests.diffraction.DiffractionSetupSweepsTest import DiffractionSetupSweepsTest
+from orangecontrib.crystal.tests.diffraction.DiffractionSetupAdaptiveSweepsTest import DiffractionSetupAdaptiveSweepsTest
+from orangecontrib.crystal.tests.diffraction.DiffractionSetupDarwinSweepsTest import DiffractionSetupDarwinSweepsTest
+from orangecontrib.crystal.tests.diffraction.DiffractionSetupThicknessSweepsTest import DiffractionSetupThicknessSweepsTest
+from orangecontrib.crystal.tests.diffraction.DiffractionSetupOrientationSweepsTest import DiffractionSetupOrientationSweepsTest
 from orangecontrib.crystal.tests.diffraction.DiffractionTest import DiffractionTest
 from orangecontrib.crystal.tests.diffraction.DiffractionResultTest import DiffractionResultTest
+from orangecontrib.crystal.tests.diffraction.StructureFactorCacheTest import StructureFactorCacheTest
+from orangecontrib.crystal.tests.diffraction.CrystalRegistryTest import CrystalRegistryTest
+from orangecontrib.crystal.tests.diffraction.DiffractionResultCacheTest import DiffractionResultCacheTest
+from orangecontrib.crystal.tests.diffraction.ResultStoreTest import ResultStoreTest
+from orangecontrib.crystal.tests.diffraction.SusceptibilityTableTest import SusceptibilityTableTest
 from orangecontrib.crystal.tests.widgets.PlotViewer1DTest import PlotViewer1DTest
 from orangecontrib.crystal.tests.widgets.CrystalDiffractionWidgetTest import CrystalDiffractionWidgetTest
 
@@ -18,15 +29,26 @@ from orangecontrib.crystal.tests.widgets.CrystalDiffractionWidgetTest import Cry
 def suite():
     suites = (
         unittest.makeSuite(VectorTest, 'test'),
+        unittest.makeSuite(VectorArrayTest, 'test'),
         unittest.makeSuite(PhotonTest, 'test'),
+        unittest.makeSuite(PhotonBundleTest, 'test'),
         unittest.makeSuite(ComplexAmplitudeTest, 'test'),
         unittest.makeSuite(GeometryTypeTest, 'test'),
 
         unittest.makeSuite(PerfectCrystalDiffractionTest, 'test'),
         unittest.makeSuite(DiffractionSetupTest, 'test'),
         unittest.makeSuite(DiffractionSetupSweepsTest, 'test'),
+        unittest.makeSuite(DiffractionSetupAdaptiveSweepsTest, 'test'),
+        unittest.makeSuite(DiffractionSetupDarwinSweepsTest, 'test'),
+        unittest.makeSuite(DiffractionSetupThicknessSweepsTest, 'test'),
+        unittest.makeSuite(DiffractionSetupOrientationSweepsTest, 'test'),
         unittest.makeSuite(DiffractionTest, 'test'),
         unittest.makeSuite(DiffractionResultTest, 'test'),
+        unittest.makeSuite(StructureFactorCacheTest, 'test'),
+        unittest.makeSuite(CrystalRegistryTest, 'test'),
+        unittest.makeSuite(DiffractionResultCacheTest, 'test'),
+        unittest.makeSuite(ResultStoreTest, 'test'),
+        unittest.makeSuite(SusceptibilityTableTest, 'test'),
 
         unittest.makeSuite(PlotData1DTest, 'test'),
         unittest.makeSuite(PlotViewer1DTest, 'test'),
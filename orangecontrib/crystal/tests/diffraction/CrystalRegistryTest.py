@@ -0,0 +1,51 @@
+"""
+Unittest for CrystalRegistry class.
+"""
+
+import copy
+import pickle
+import unittest
+
+import xraylib
+
+from orangecontrib.crystal.diffraction.CrystalRegistry import CrystalRegistry, FrozenCrystal, crystal_registry
+
+
+class CrystalRegistryTest(unittest.TestCase):
+    def testConstructor(self):
+        registry = CrystalRegistry()
+
+        self.assertIsInstance(registry, CrystalRegistry)
+        self.assertEqual(registry.size(), 0)
+
+    def testCrystal(self):
+        registry = CrystalRegistry()
+
+        crystal = registry.crystal("Si")
+        self.assertIsInstance(crystal, FrozenCrystal)
+        self.assertIs(registry.crystal("Si"), crystal)
+        self.assertEqual(registry.size(), 1)
+
+        # xraylib accepts the shared crystal.
+        self.assertEqual(xraylib.Crystal_dSpacing(crystal, 1, 1, 1),
+                         xraylib.Crystal_dSpacing(xraylib.Crystal_GetCrystal("Si"), 1, 1, 1))
+
+        registry.clear()
+        self.assertEqual(registry.size(), 0)
+        self.assertIsNot(registry.crystal("Si"), crystal)
+
+        self.assertRaises(ValueError, registry.crystal, "NoSuchCrystal")
+
+    def testReadOnly(self):
+        crystal = CrystalRegistry().crystal("Si")
+
+        self.assertRaises(TypeError, crystal.__setitem__, "volume", 1.0)
+        self.assertRaises(TypeError, crystal.update, {"volume": 1.0})
+        self.assertRaises(TypeError, crystal["atom"][0].__setitem__, "Zatom", 1)
+
+    def testCopy(self):
+        crystal = crystal_registry.crystal("Si")
+
+        self.assertIs(copy.copy(crystal), crystal)
+        self.assertIs(copy.deepcopy(crystal), crystal)
+        self.assertIs(pickle.loads(pickle.dumps(crystal)), crystal)
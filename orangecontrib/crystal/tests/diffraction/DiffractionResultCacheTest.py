@@ -0,0 +1,124 @@
+"""
+Unittest for DiffractionResultCache class.
+"""
+
+import unittest
+
+import numpy
+
+from orangecontrib.crystal.diffraction.Diffraction import Diffraction
+from orangecontrib.crystal.diffraction.DiffractionEnergyResult import DiffractionEnergyResult
+from orangecontrib.crystal.diffraction.DiffractionResult import DiffractionResult
+from orangecontrib.crystal.diffraction.DiffractionResultCache import DiffractionResultCache
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
+
+
+def diffractionSetup(thickness=0.0001, energy_points=3):
+    diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                               "Si",
+                                               thickness=thickness,
+                                               miller_h=1,
+                                               miller_k=1,
+                                               miller_l=1,
+                                               asymmetry_angle=0.0,
+                                               azimuthal_angle=0.5 * numpy.pi,
+                                               energy_min=8000,
+                                               energy_max=8100,
+                                               energy_points=energy_points,
+                                               angle_deviation_min=-100.0e-6,
+                                               angle_deviation_max=100e-6,
+                                               angle_deviation_points=50)
+    return diffraction_setup
+
+
+class DiffractionResultCacheTest(unittest.TestCase):
+    def testConstructor(self):
+        cache = DiffractionResultCache(max_bytes=1000)
+
+        self.assertIsInstance(cache, DiffractionResultCache)
+        self.assertEqual(cache.maxBytes(), 1000)
+        self.assertEqual(cache.size(), 0)
+        self.assertEqual(cache.usedBytes(), 0)
+        self.assertEqual(cache.hits(), 0)
+        self.assertEqual(cache.misses(), 0)
+
+        self.assertRaises(ValueError, DiffractionResultCache, -1)
+
+    def testStore(self):
+        result = DiffractionResult(diffractionSetup(), 0.0)
+        byte_size = result.byteSize()
+
+        # 3 energies x 50 deviations x 2 polarizations x 16 bytes and one shared deviation axis x 50 x 8 bytes.
+        self.assertEqual(byte_size, 3 * 50 * 2 * 16 + 50 * 8)
+
+        cache = DiffractionResultCache(max_bytes=2 * byte_size)
+        self.assertIsNone(cache.result("first"))
+
+        cache.store("first", result)
+        cache.store("second", result)
+        self.assertIs(cache.result("first"), result)
+        self.assertEqual(cache.usedBytes(), 2 * byte_size)
+
+        # The least recently used result is evicted.
+        cache.store("third", result)
+        self.assertIsNone(cache.result("second"))
+        self.assertIs(cache.result("first"), result)
+        self.assertIs(cache.result("third"), result)
+        self.assertEqual(cache.size(), 2)
+        self.assertEqual(cache.hits(), 3)
+        self.assertEqual(cache.misses(), 2)
+
+        # Results exceeding the budget are not cached.
+        cache.setMaxBytes(byte_size - 1)
+        self.assertEqual(cache.size(), 0)
+        cache.store("fourth", result)
+        self.assertEqual(cache.size(), 0)
+        self.assertEqual(cache.usedBytes(), 0)
+
+        cache.clear()
+        self.assertEqual(cache.hits(), 0)
+
+    def testCalculateDiffraction(self):
+        cache = DiffractionResultCache()
+        events = []
+
+        diffraction = Diffraction()
+        diffraction.setResultCache(cache)
+        diffraction.setOnCalculationStart(lambda: events.append("start"))
+        diffraction.setOnCalculationEnd(lambda: events.append("end"))
+        self.assertIs(diffraction.resultCache(), cache)
+
+        result = diffraction.calculateDiffraction(diffractionSetup())
+        del events[:]
+
+        # An identical setup is served from the cache.
+        self.assertIs(diffraction.calculateDiffraction(diffractionSetup()), result)
+        self.assertEqual(events, ["start", "end"])
+        self.assertEqual((cache.hits(), cache.misses()), (1, 1))
+
+        # Cached results are shared and cannot be modified.
+        self.assertTrue(result.isReadOnly())
+        s_amplitudes = result.sAmplitudeByEnergy(8000)
+        self.assertRaises(ValueError, result.setAmplitudes, numpy.zeros((3, 50)), numpy.zeros((3, 50)))
+        self.assertRaises(ValueError, result.setAmplitudesByEnergy, 8000, numpy.zeros(50), numpy.zeros(50))
+        self.assertRaises(ValueError, result.addEnergyResult,
+                          DiffractionEnergyResult(8000, result.angleDeviationsByEnergy(8000),
+                                                  numpy.zeros(50), numpy.zeros(50)))
+        self.assertRaises(ValueError, s_amplitudes.fill, 0.0)
+        self.assertRaises(ValueError, result.sIntensityByEnergy(8000).fill, 0.0)
+        self.assertRaises(ValueError, result.angleDeviationsByEnergy(8000).fill, 0.0)
+        numpy.testing.assert_array_equal(diffraction.calculateDiffraction(diffractionSetup()).sAmplitudeByEnergy(8000),
+                                         s_amplitudes)
+
+        # Changed setups and settings are calculated.
+        self.assertIsNot(diffraction.calculateDiffraction(diffractionSetup(thickness=0.0002)), result)
+
+        diffraction.setSusceptibilityTolerance(1e-4)
+        self.assertIsNot(diffraction.calculateDiffraction(diffractionSetup()), result)
+
+        # Without a cache every setup is calculated.
+        uncached_result = Diffraction().calculateDiffraction(diffractionSetup())
+        self.assertIsNot(uncached_result, result)
+        self.assertFalse(uncached_result.isReadOnly())
+        numpy.testing.assert_array_equal(uncached_result.sIntensityByEnergy(8000), result.sIntensityByEnergy(8000))
@@ -2,6 +2,8 @@
 Unittest for DiffractionResult class.
 """
 
+import os
+import pickle
 import unittest
 
 import numpy
@@ -9,6 +11,7 @@ import numpy
 from orangecontrib.crystal.diffraction.ComplexAmplitude import ComplexAmplitude
 from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
 from orangecontrib.crystal.diffraction.Diffraction import Diffraction
+from orangecontrib.crystal.diffraction.DiffractionEnergyResult import DiffractionEnergyResult
 from orangecontrib.crystal.diffraction.DiffractionResult import DiffractionResult
 from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
 
@@ -56,6 +59,24 @@ def diffractionResult():
     return diffraction_result
 
 
+def diffractionSetupSweep():
+    diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                               "Si",
+                                               thickness=0.0100 * 1e-2,
+                                               miller_h=1,
+                                               miller_k=1,
+                                               miller_l=1,
+                                               asymmetry_angle=0.0,
+                                               azimuthal_angle=0.5 * numpy.pi,
+                                               energy_min=10000,
+                                               energy_max=10001,
+                                               energy_points=2,
+                                               angle_deviation_min=-100.0e-6,
+                                               angle_deviation_max=100e-6,
+                                               angle_deviation_points=5)
+    return diffraction_setup
+
+
 class DiffractionResultTest(unittest.TestCase):
     def testConstructor(self):
         diffraction_setup = diffractionSetupSingleEnergy()
@@ -76,10 +97,10 @@ class DiffractionResultTest(unittest.TestCase):
         self.assertEqual(diffraction_result.angleDeviations().shape[0],
                          50)
 
-        self.assertEqual(diffraction_result._intensities.shape,
-                         (1, 50, 3))
-        self.assertEqual(diffraction_result._phases.shape,
-                         (1, 50, 3))
+        self.assertEqual(diffraction_result._s_amplitudes.shape,
+                         (1, 50))
+        self.assertEqual(diffraction_result._p_amplitudes.shape,
+                         (1, 50))
 
     def testDiffractionSetup(self):
         diffraction_setup = diffractionSetupSingleEnergy()
@@ -251,4 +272,191 @@ class DiffractionResultTest(unittest.TestCase):
 
         self.assertEqual(plot_info["Geometry Type"], "Bragg diffraction")
         self.assertEqual(plot_info["Crystal Name"], "Si")
-        self.assertEqual(plot_info["Miller indices (h,k,l)"], "(1,1,1)")
\ No newline at end of file
+        self.assertEqual(plot_info["Miller indices (h,k,l)"], "(1,1,1)")
+
+    def testMemoryMapped(self):
+        diffraction_setup = diffractionSetupSweep()
+
+        diffraction_result = DiffractionResult(diffraction_setup, 0.3, memory_mapped=True)
+        self.assertTrue(diffraction_result.isMemoryMapped())
+        self.assertEqual(diffraction_result._s_amplitudes.shape,
+                         DiffractionResult(diffraction_setup, 0.3)._s_amplitudes.shape)
+
+        buffer_filename = diffraction_result._buffer_filename
+        self.assertTrue(os.path.exists(buffer_filename))
+
+        # A pickled copy writes in place into the buffers of the original.
+        copy = pickle.loads(pickle.dumps(diffraction_result))
+        self.assertTrue(copy.isMemoryMapped())
+
+        deviation = diffraction_setup.angleDeviationGridByEnergy(10001)[2]
+        copy.add(10001,
+                 deviation,
+                 ComplexAmplitude(0.5 + 0.5j),
+                 ComplexAmplitude(0.5),
+                 ComplexAmplitude(1.0 + 1.0j))
+
+        self.assertAlmostEqual(diffraction_result.sIntensityByEnergy(10001)[2], 0.5)
+        self.assertAlmostEqual(diffraction_result.sPhaseByEnergy(10001)[2], 0.25 * numpy.pi)
+
+        # Copies do not own the buffer file.
+        copy.releaseBuffers()
+        del copy
+        self.assertTrue(os.path.exists(buffer_filename))
+
+        diffraction_result.releaseBuffers()
+        self.assertFalse(diffraction_result.isMemoryMapped())
+        self.assertFalse(os.path.exists(buffer_filename))
+        self.assertAlmostEqual(diffraction_result.pIntensityByEnergy(10001)[2], 0.25)
+
+    def testAngleDeviationsByEnergy(self):
+        diffraction_setup = diffractionSetupSweep()
+        diffraction_result = DiffractionResult(diffraction_setup, 0.3)
+
+        # Every energy has its own deviation axis.
+        self.assertEqual(diffraction_result._s_amplitudes.shape, (2, 5))
+
+        for energy in (10000, 10001):
+            self.assertEqual(len(diffraction_result.angleDeviationsByEnergy(energy)), 5)
+            self.assertEqual(len(diffraction_result.sIntensityByEnergy(energy)), 5)
+
+        diffraction_result.add(10001,
+                               diffraction_setup.angleDeviationGridByEnergy(10001)[3],
+                               ComplexAmplitude(2.0),
+                               ComplexAmplitude(1.0),
+                               ComplexAmplitude(2.0))
+
+        self.assertAlmostEqual(diffraction_result.sIntensityByEnergy(10001)[3], 4.0)
+        self.assertAlmostEqual(diffraction_result.sIntensityByEnergy(10000)[3], 0.0)
+        self.assertEqual(list(diffraction_result.sIntensityByDeviation(50e-6)), [0.0, 4.0])
+
+    def testComplexAmplitudes(self):
+        diffraction_setup = diffractionSetupSweep()
+        diffraction_result = DiffractionResult(diffraction_setup, 0.3)
+
+        self.assertEqual(diffraction_result._s_amplitudes.dtype, numpy.complex128)
+
+        deviation = diffraction_setup.angleDeviationGridByEnergy(10000)[1]
+        diffraction_result.add(10000,
+                               deviation,
+                               ComplexAmplitude(1.0 + 1.0j),
+                               ComplexAmplitude(2.0j))
+
+        self.assertEqual(diffraction_result.sAmplitudeByEnergy(10000)[1], 1.0 + 1.0j)
+        self.assertEqual(diffraction_result.pAmplitudeByEnergy(10000)[1], 2.0j)
+        self.assertAlmostEqual(diffraction_result.differenceAmplitudeByEnergy(10000)[1], 0.5 - 0.5j)
+        self.assertAlmostEqual(diffraction_result.sIntensityByEnergy(10000)[1], 2.0)
+        self.assertAlmostEqual(diffraction_result.pPhaseByEnergy(10000)[1], 0.5 * numpy.pi)
+        self.assertAlmostEqual(diffraction_result.differenceIntensityByEnergy(10000)[1], 0.5)
+        self.assertAlmostEqual(diffraction_result.differencePhaseByEnergy(10000)[1], -0.25 * numpy.pi)
+
+        # Unset entries have a vanishing difference.
+        self.assertEqual(diffraction_result.differenceAmplitudeByEnergy(10000)[0], 0.0)
+
+        # Views are cached until the amplitudes change.
+        self.assertIs(diffraction_result.sIntensityByEnergy(10000).base,
+                      diffraction_result.sIntensityByEnergy(10001).base)
+
+        diffraction_result.add(10000,
+                               deviation,
+                               ComplexAmplitude(3.0),
+                               ComplexAmplitude(1.0))
+
+        self.assertAlmostEqual(diffraction_result.sIntensityByEnergy(10000)[1], 9.0)
+        self.assertAlmostEqual(diffraction_result.differencePhaseByEnergy(10000)[1], 0.0)
+        self.assertAlmostEqual(diffraction_result.sAmplitudeByDeviation(deviation)[0], 3.0)
+
+    def testBulkSetters(self):
+        diffraction_setup = diffractionSetupSweep()
+
+        s_amplitudes = numpy.arange(10).reshape(2, 5) * (1.0 + 1.0j)
+        p_amplitudes = numpy.arange(10).reshape(2, 5) + 1.0
+
+        grid = DiffractionResult(diffraction_setup, 0.3)
+        grid.setAmplitudes(s_amplitudes, p_amplitudes)
+
+        rows = DiffractionResult(diffraction_setup, 0.3)
+        energy_results = DiffractionResult(diffraction_setup, 0.3)
+        point_wise = DiffractionResult(diffraction_setup, 0.3)
+
+        for energy_index, energy in enumerate(diffraction_setup.energies()):
+            rows.setAmplitudesByEnergy(energy, s_amplitudes[energy_index], p_amplitudes[energy_index])
+
+            # Unsorted deviations are mapped to their entries.
+            deviations = diffraction_setup.angleDeviationGridByEnergy(energy)
+            order = numpy.array([3, 0, 4, 1, 2])
+            energy_results.addEnergyResult(DiffractionEnergyResult(energy,
+                                                                   deviations[order],
+                                                                   s_amplitudes[energy_index][order],
+                                                                   p_amplitudes[energy_index][order]))
+
+            for deviation, s_amplitude, p_amplitude in zip(deviations,
+                                                           s_amplitudes[energy_index],
+                                                           p_amplitudes[energy_index]):
+                point_wise.add(energy, deviation, ComplexAmplitude(s_amplitude), ComplexAmplitude(p_amplitude))
+
+        for diffraction_result in (grid, rows, energy_results, point_wise):
+            for energy_index, energy in enumerate(diffraction_setup.energies()):
+                numpy.testing.assert_array_equal(diffraction_result.sAmplitudeByEnergy(energy),
+                                                 s_amplitudes[energy_index])
+                numpy.testing.assert_array_equal(diffraction_result.pIntensityByEnergy(energy),
+                                                 p_amplitudes[energy_index] ** 2)
+
+    def testIndexMaps(self):
+        diffraction_result = DiffractionResult(diffractionSetupSweep(), 0.3)
+
+        self.assertEqual(diffraction_result._energyIndexByEnergy(10001), 1)
+        self.assertEqual(diffraction_result._energyIndexByEnergy(10000.4), 0)
+
+        deviations = diffraction_result.angleDeviationsByEnergy(10001)
+        self.assertEqual(diffraction_result._deviationIndexByDeviation(1, deviations[3]), 3)
+        self.assertEqual(diffraction_result._deviationIndexByDeviation(1, 1.0), 4)
+        self.assertEqual(diffraction_result._deviationIndexByDeviation(1, -1.0), 0)
+        self.assertEqual(diffraction_result._deviationIndexByDeviation(1, 0.49 * deviations[3]), 2)
+        self.assertEqual(diffraction_result._deviationIndexByDeviation(1, 0.51 * deviations[3]), 3)
+
+
+    def testFromArrays(self):
+        diffraction_setup = diffractionSetupSweep()
+
+        diffraction_result = DiffractionResult(diffraction_setup, 0.3)
+        diffraction_result.setAmplitudes(numpy.arange(10).reshape(2, 5) * (1.0 + 1.0j),
+                                         numpy.arange(10).reshape(2, 5) + 1.0)
+
+        arrays = diffraction_result.asArrays()
+        self.assertEqual(int(arrays["format_version"]), DiffractionResult.ARRAYS_FORMAT_VERSION)
+
+        loaded_result = DiffractionResult.fromArrays(diffraction_setup, arrays)
+        self.assertEqual(loaded_result.contentDigest(), diffraction_result.contentDigest())
+
+        # Other format versions and malformed arrays are refused.
+        malformed_arrays = [dict(arrays, format_version=numpy.array(DiffractionResult.ARRAYS_FORMAT_VERSION + 1)),
+                            dict((name, array) for name, array in arrays.items() if name != "bragg_angle"),
+                            dict(arrays, unknown=numpy.zeros(3)),
+                            dict(arrays, s_amplitudes=arrays["s_amplitudes"].real),
+                            dict(arrays, p_amplitudes=arrays["p_amplitudes"][:, :4]),
+                            dict(arrays, deviation_counts=numpy.array([5, 6])),
+                            dict(arrays, energies=numpy.array([10000.0]))]
+
+        for malformed in malformed_arrays:
+            self.assertRaises(ValueError, DiffractionResult.fromArrays, diffraction_setup, malformed)
+
+    def testGridIndices(self):
+        diffraction_result = DiffractionResult(diffractionSetupSweep(), 0.3)
+
+        deviations = diffraction_result.angleDeviationsByEnergy(10001)
+        self.assertEqual(diffraction_result.gridIndices(10001, deviations[3]), (1, 3))
+        self.assertEqual(diffraction_result.gridIndices(10000.4, 1.0), (0, 4))
+        self.assertEqual(diffraction_result.gridIndices(10000.6, 0.49 * deviations[3]), (1, 2))
+
+    def testSharedAngleDeviations(self):
+        diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.5 * numpy.pi,
+                                                   10000, 10010, 11, -100.0e-6, 100e-6, 50)
+        diffraction_result = DiffractionResult(diffraction_setup, 0.3)
+
+        # All energies of a sweep share one sorted deviation axis.
+        axes = [diffraction_result.angleDeviationsByEnergy(energy) for energy in diffraction_setup.energies()]
+        for axis in axes:
+            self.assertIs(axis, axes[0])
+
+        numpy.testing.assert_array_equal(axes[0], numpy.sort(diffraction_setup.angleDeviationGridByEnergy(10000)))
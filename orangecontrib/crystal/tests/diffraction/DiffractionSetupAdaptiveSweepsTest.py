@@ -0,0 +1,74 @@
+"""
+Unittest for DiffractionSetupAdaptiveSweeps class.
+"""
+
+import unittest
+from collections import OrderedDict
+
+import numpy
+
+from orangecontrib.crystal.diffraction.DiffractionSetup import DiffractionSetup
+from orangecontrib.crystal.diffraction.DiffractionSetupAdaptiveSweeps import DiffractionSetupAdaptiveSweeps
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
+
+
+def diffractionSetupAdaptive():
+    diffraction_setup = DiffractionSetupAdaptiveSweeps(BraggDiffraction(),
+                                                       "Si",
+                                                       thickness=0.0001,
+                                                       miller_h=1,
+                                                       miller_k=1,
+                                                       miller_l=1,
+                                                       asymmetry_angle=0.0,
+                                                       azimuthal_angle=0.5 * numpy.pi,
+                                                       energy_min=8000,
+                                                       energy_max=8000,
+                                                       energy_points=1,
+                                                       angle_deviation_min=-100.0e-6,
+                                                       angle_deviation_max=100e-6,
+                                                       angle_deviation_points=41,
+                                                       angle_deviation_max_points=400)
+    return diffraction_setup
+
+
+class DiffractionSetupAdaptiveSweepsTest(unittest.TestCase):
+    def testConstructor(self):
+        diffraction_setup = diffractionSetupAdaptive()
+
+        self.assertEqual(diffraction_setup.angleDeviationPoints(), 41)
+        self.assertEqual(diffraction_setup.angleDeviationMaxPoints(), 400)
+        self.assertEqual(diffraction_setup.intensityTolerance(), 1e-3)
+        self.assertEqual(diffraction_setup.phaseTolerance(), 1e-2)
+        self.assertAlmostEqual(diffraction_setup.angleDeviationMinSpacing(), 200e-6 / (16 * 400))
+
+        self.assertRaises(ValueError,
+                          DiffractionSetupAdaptiveSweeps,
+                          BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.5 * numpy.pi,
+                          8000, 8000, 1, -100.0e-6, 100e-6, 41, 40)
+
+    def testRefinedSetup(self):
+        diffraction_setup = diffractionSetupAdaptive()
+
+        deviations = numpy.array([-100e-6, -1e-6, 0.0, 0.5e-6, 100e-6])
+        refined_setup = diffraction_setup.refinedSetup(OrderedDict([(8000.0, deviations)]))
+
+        self.assertIsInstance(refined_setup, DiffractionSetup)
+        self.assertEqual(refined_setup.crystalName(), "Si")
+        self.assertEqual(refined_setup.angleDeviationPoints(), 5)
+
+        for deviation, refined_deviation in zip(deviations, refined_setup.angleDeviationGridByEnergy(8000.0)):
+            self.assertAlmostEqual(deviation, refined_deviation)
+
+    def testFingerprint(self):
+        diffraction_setup = diffractionSetupAdaptive()
+
+        # The same initial grid without refinement yields different results.
+        uniform_setup = DiffractionSetupSweeps(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.5 * numpy.pi,
+                                               8000, 8000, 1, -100.0e-6, 100e-6, 41)
+
+        self.assertEqual(diffraction_setup.fingerprint(), diffractionSetupAdaptive().fingerprint())
+        self.assertNotEqual(diffraction_setup.fingerprint(), uniform_setup.fingerprint())
+
+        diffraction_setup._intensity_tolerance = 1e-4
+        self.assertNotEqual(diffraction_setup.fingerprint(), diffractionSetupAdaptive().fingerprint())
@@ -0,0 +1,89 @@
+"""
+Unittest for DiffractionSetupDarwinSweeps class.
+"""
+
+import unittest
+
+import numpy
+
+from orangecontrib.crystal.diffraction.Diffraction import Diffraction
+from orangecontrib.crystal.diffraction.DiffractionSetupDarwinSweeps import DiffractionSetupDarwinSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction, LaueDiffraction
+
+
+def diffractionSetupDarwin(geometry_type=BraggDiffraction(), asymmetry_angle=0.0):
+    diffraction_setup = DiffractionSetupDarwinSweeps(geometry_type,
+                                                     "Si",
+                                                     thickness=0.001,
+                                                     miller_h=1,
+                                                     miller_k=1,
+                                                     miller_l=1,
+                                                     asymmetry_angle=asymmetry_angle,
+                                                     azimuthal_angle=0.5 * numpy.pi,
+                                                     energy_min=8000,
+                                                     energy_max=16000,
+                                                     energy_points=3,
+                                                     darwin_widths=6,
+                                                     angle_deviation_points=301)
+    return diffraction_setup
+
+
+class DiffractionSetupDarwinSweepsTest(unittest.TestCase):
+    def testConstructor(self):
+        diffraction_setup = diffractionSetupDarwin()
+
+        self.assertEqual(diffraction_setup.darwinWidths(), 6)
+        self.assertEqual(diffraction_setup.energyPoints(), 3)
+
+        for energy in diffraction_setup.energies():
+            deviations = diffraction_setup.angleDeviationGridByEnergy(energy)
+            darwin_width = diffraction_setup.darwinWidth(energy)
+
+            self.assertEqual(len(deviations), 301)
+            self.assertAlmostEqual((deviations.max() - deviations.min()) / darwin_width, 6.0)
+            self.assertAlmostEqual(0.5 * (deviations.max() + deviations.min()) / darwin_width,
+                                   diffraction_setup.refractionShift(energy) / darwin_width)
+
+        # The window shrinks with energy.
+        self.assertGreater(diffraction_setup.darwinWidth(8000), 1.9 * diffraction_setup.darwinWidth(16000))
+
+    def testReflectionSetup(self):
+        diffraction_setup = diffractionSetupDarwin()
+        reflection_setup = diffraction_setup.reflectionSetup(4, 0, 0)
+
+        self.assertIsInstance(reflection_setup, DiffractionSetupDarwinSweeps)
+        self.assertEqual(reflection_setup.millerH(), 4)
+
+        # The windows follow the Darwin plateaus of the new reflection.
+        for energy in diffraction_setup.energies():
+            deviations = reflection_setup.angleDeviationGridByEnergy(energy)
+            darwin_width = reflection_setup.darwinWidth(energy)
+
+            self.assertEqual(len(deviations), 301)
+            self.assertLess(darwin_width, diffraction_setup.darwinWidth(energy))
+            self.assertAlmostEqual((deviations.max() - deviations.min()) / darwin_width, 6.0)
+
+    def testAsymmetryFactor(self):
+        self.assertAlmostEqual(diffractionSetupDarwin().asymmetryFactor(8000), -1.0, places=5)
+        self.assertLess(diffractionSetupDarwin(asymmetry_angle=0.1).asymmetryFactor(8000), -1.0)
+        self.assertAlmostEqual(diffractionSetupDarwin(LaueDiffraction(), 0.5 * numpy.pi).asymmetryFactor(8000), 1.0, places=5)
+
+    def testDarwinPlateau(self):
+        for asymmetry_angle in (-0.1, 0.0, 0.1):
+            diffraction_setup = diffractionSetupDarwin(asymmetry_angle=asymmetry_angle)
+            result = Diffraction().calculateDiffraction(diffraction_setup)
+
+            for energy in diffraction_setup.energies():
+                deviations = result.angleDeviationsByEnergy(energy)
+                intensities = result.sIntensityByEnergy(energy)
+                darwin_width = diffraction_setup.darwinWidth(energy)
+
+                # The full width at half maximum of a thick crystal is slightly larger than the Darwin width.
+                plateau = deviations[intensities > 0.5 * intensities.max()]
+                self.assertLess(abs(plateau.max() - plateau.min() - 1.06 * darwin_width), 0.06 * darwin_width)
+                self.assertLess(abs(0.5 * (plateau.max() + plateau.min()) - diffraction_setup.refractionShift(energy)),
+                                0.02 * darwin_width)
+
+                # The tails are inside the window.
+                self.assertLess(intensities[0], 0.05 * intensities.max())
+                self.assertLess(intensities[-1], 0.05 * intensities.max())
@@ -0,0 +1,94 @@
+"""
+Unittest for DiffractionSetupOrientationSweeps class.
+"""
+
+import unittest
+
+import numpy
+
+from orangecontrib.crystal.diffraction.DiffractionSetup import DiffractionSetup
+from orangecontrib.crystal.diffraction.DiffractionSetupOrientationSweeps import DiffractionSetupOrientationSweeps
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
+
+
+def diffractionSetupOrientation():
+    diffraction_setup = DiffractionSetupOrientationSweeps(BraggDiffraction(),
+                                                          "Si",
+                                                          thickness=0.0001,
+                                                          miller_h=1,
+                                                          miller_k=1,
+                                                          miller_l=1,
+                                                          asymmetry_angle_min=-0.1,
+                                                          asymmetry_angle_max=0.1,
+                                                          asymmetry_angle_points=5,
+                                                          azimuthal_angle_min=0.4 * numpy.pi,
+                                                          azimuthal_angle_max=0.6 * numpy.pi,
+                                                          azimuthal_angle_points=3,
+                                                          energy_min=8000,
+                                                          energy_max=8100,
+                                                          energy_points=3,
+                                                          angle_deviation_min=-100.0e-6,
+                                                          angle_deviation_max=100e-6,
+                                                          angle_deviation_points=41)
+    return diffraction_setup
+
+
+class DiffractionSetupOrientationSweepsTest(unittest.TestCase):
+    def testConstructor(self):
+        diffraction_setup = diffractionSetupOrientation()
+
+        numpy.testing.assert_array_almost_equal(diffraction_setup.asymmetryAngles(), [-0.1, -0.05, 0.0, 0.05, 0.1])
+        numpy.testing.assert_array_almost_equal(diffraction_setup.azimuthalAngles(),
+                                                [0.4 * numpy.pi, 0.5 * numpy.pi, 0.6 * numpy.pi])
+        self.assertAlmostEqual(diffraction_setup.asymmetryAngle(), -0.1)
+        self.assertAlmostEqual(diffraction_setup.azimuthalAngle(), 0.4 * numpy.pi)
+        self.assertEqual(diffraction_setup.angleDeviationPoints(), 3 * 41)
+
+    def testOrientations(self):
+        orientations = diffractionSetupOrientation().orientations()
+
+        self.assertEqual(orientations.shape, (15, 2))
+        numpy.testing.assert_array_almost_equal(orientations[0], [-0.1, 0.4 * numpy.pi])
+        numpy.testing.assert_array_almost_equal(orientations[1], [-0.1, 0.5 * numpy.pi])
+        numpy.testing.assert_array_almost_equal(orientations[3], [-0.05, 0.4 * numpy.pi])
+
+    def testNormalsBragg(self):
+        diffraction_setup = diffractionSetupOrientation()
+        orientations = diffraction_setup.orientations()
+
+        normals_bragg = diffraction_setup.normalsBragg(orientations[:, 0], orientations[:, 1])
+
+        self.assertEqual(len(normals_bragg), 15)
+        for index, (asymmetry_angle, azimuthal_angle) in enumerate(orientations):
+            orientation_setup = diffraction_setup.orientationSetup(asymmetry_angle, azimuthal_angle)
+            self.assertTrue(normals_bragg.vector(index) == orientation_setup.normalBragg())
+
+    def testOrientationSetup(self):
+        diffraction_setup = diffractionSetupOrientation()
+        diffraction_setup.angleBragg(8000.0)
+
+        orientation_setup = diffraction_setup.orientationSetup(0.05, 0.5 * numpy.pi)
+
+        self.assertIsInstance(orientation_setup, DiffractionSetup)
+        self.assertEqual(orientation_setup.asymmetryAngle(), 0.05)
+        self.assertEqual(orientation_setup.azimuthalAngle(), 0.5 * numpy.pi)
+
+        # An orientation of the sweep is indistinguishable from a plain sweep of that orientation.
+        sweep = DiffractionSetupSweeps(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.05, 0.5 * numpy.pi,
+                                       8000, 8100, 3, -100.0e-6, 100e-6, 41)
+        self.assertEqual(orientation_setup.fingerprint(), sweep.fingerprint())
+
+        # Lattice spacing and Bragg angles are shared, not recalculated.
+        orientation_setup.angleBragg(8000.0)
+        orientation_setup.dSpacing()
+        self.assertEqual(orientation_setup.xraylibCalls(), {"Bragg_angle": 0, "Crystal_dSpacing": 0})
+
+    def testFingerprint(self):
+        diffraction_setup = diffractionSetupOrientation()
+
+        sweep = DiffractionSetupSweeps(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, -0.1, 0.4 * numpy.pi,
+                                       8000, 8100, 3, -100.0e-6, 100e-6, 41)
+
+        self.assertEqual(diffraction_setup.fingerprint(), diffractionSetupOrientation().fingerprint())
+        self.assertNotEqual(diffraction_setup.fingerprint(), sweep.fingerprint())
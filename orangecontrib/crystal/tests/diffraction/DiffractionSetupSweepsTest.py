@@ -2,10 +2,13 @@
 Unittest for DiffractionSetup class.
 """
 
+import pickle
 import unittest
+from collections import OrderedDict
 
 import numpy
 
+from orangecontrib.crystal.diffraction.Diffraction import Diffraction
 from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
 from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
 from orangecontrib.crystal.util.Vector import Vector
@@ -29,6 +32,24 @@ def diffractionSetup():
     return diffraction_setup
 
 
+def diffractionSetupMultipleEnergies():
+    diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                               "Si",
+                                               thickness=0.0001,
+                                               miller_h=1,
+                                               miller_k=1,
+                                               miller_l=1,
+                                               asymmetry_angle=0.0,
+                                               azimuthal_angle=0.5 * numpy.pi,
+                                               energy_min=8000,
+                                               energy_max=8100,
+                                               energy_points=3,
+                                               angle_deviation_min=-100.0e-6,
+                                               angle_deviation_max=100e-6,
+                                               angle_deviation_points=7)
+    return diffraction_setup
+
+
 class DiffractionSetupSweepsTest(unittest.TestCase):
     def testConstructor(self):
         diffraction_setup = diffractionSetup()
@@ -270,4 +291,115 @@ class DiffractionSetupSweepsTest(unittest.TestCase):
         clone = diffraction_setup.clone()
 
         self.assertEqual(diffraction_setup, clone)
-        self.assertIsNot(diffraction_setup, clone)
\ No newline at end of file
+        self.assertIsNot(diffraction_setup, clone)
+
+    def testAngleDeviationGridByEnergy(self):
+        diffraction_setup = diffractionSetupMultipleEnergies()
+
+        self.assertEqual(diffraction_setup.angleDeviationGrid().shape[0],
+                         21)
+
+        for energy in diffraction_setup.energies():
+            deviations = diffraction_setup.angleDeviationGridByEnergy(energy)
+
+            self.assertEqual(deviations.shape[0],
+                             7)
+            for deviation, expected in zip(deviations, numpy.linspace(-100.0e-6, 100e-6, 7)):
+                self.assertAlmostEqual(deviation, expected, 12)
+
+    def testAxesDescriptor(self):
+        diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                                   "Si",
+                                                   thickness=0.0001,
+                                                   miller_h=1,
+                                                   miller_k=1,
+                                                   miller_l=1,
+                                                   asymmetry_angle=0.0,
+                                                   azimuthal_angle=0.5 * numpy.pi,
+                                                   energy_min=8000,
+                                                   energy_max=9000,
+                                                   energy_points=2000,
+                                                   angle_deviation_min=-100.0e-6,
+                                                   angle_deviation_max=100e-6,
+                                                   angle_deviation_points=2000)
+
+        # No photons are materialized and all energies share one deviation axis.
+        self.assertIsNone(diffraction_setup._incoming_photons)
+        self.assertIs(diffraction_setup.angleDeviationGridByEnergy(8000),
+                      diffraction_setup.angleDeviationGridByEnergy(9000))
+
+        self.assertEqual(diffraction_setup.energyPoints(), 2000)
+        self.assertEqual(diffraction_setup.angleDeviationPoints(), 2000 * 2000)
+        self.assertAlmostEqual(diffraction_setup.angleDeviationMin(), -100.0e-6)
+        self.assertAlmostEqual(diffraction_setup.angleDeviationMax(), 100.0e-6)
+
+        # Photons are generated on demand.
+        photons = diffractionSetupMultipleEnergies().incomingPhotons()
+        self.assertEqual(len(photons), 3 * 7)
+        self.assertEqual(photons[7].energy(), 8050)
+        self.assertAlmostEqual(diffraction_setup.deviationOfIncomingPhoton(photons[7]) * 1e6, -100.0)
+
+
+    def testMemoizedGeometry(self):
+        diffraction_setup = diffractionSetupMultipleEnergies()
+
+        # A sweep queries xraylib once per energy for the Bragg angle and once for the lattice spacing.
+        Diffraction().calculateDiffraction(diffraction_setup)
+        Diffraction().calculateDiffraction(diffraction_setup)
+        self.assertEqual(diffraction_setup.xraylibCalls(), {"Bragg_angle": 3, "Crystal_dSpacing": 1})
+
+        self.assertIs(diffraction_setup.normalBragg(), diffraction_setup.normalBragg())
+        self.assertIs(diffraction_setup.normalSurface(), diffraction_setup.normalSurface())
+
+        diffraction_setup.resetXraylibCalls()
+        self.assertEqual(diffraction_setup.xraylibCalls(), {"Bragg_angle": 0, "Crystal_dSpacing": 0})
+
+        # Explicit invalidation drops all memoized values.
+        normal_bragg = diffraction_setup.normalBragg()
+        diffraction_setup.invalidateCache()
+        self.assertIsNot(diffraction_setup.normalBragg(), normal_bragg)
+        self.assertEqual(diffraction_setup.normalBragg(), normal_bragg)
+        diffraction_setup.angleBragg(8000)
+        self.assertEqual(diffraction_setup.xraylibCalls(), {"Bragg_angle": 1, "Crystal_dSpacing": 1})
+
+        # Assigning a member directly does not leave stale values behind.
+        diffraction_setup._asymmetry_angle = 0.1
+        self.assertNotEqual(diffraction_setup.normalBragg(), normal_bragg)
+        self.assertEqual(diffraction_setup.normalBragg(), diffraction_setup._calculateNormalBragg())
+
+    def testFingerprint(self):
+        diffraction_setup = diffractionSetupMultipleEnergies()
+        fingerprint = diffraction_setup.fingerprint()
+
+        self.assertEqual(len(fingerprint), 64)
+        self.assertEqual(fingerprint, diffractionSetupMultipleEnergies().fingerprint())
+        self.assertEqual(fingerprint, diffraction_setup.clone().fingerprint())
+        self.assertEqual(fingerprint, diffraction_setup.snapshot().fingerprint())
+        self.assertEqual(fingerprint, pickle.loads(pickle.dumps(diffraction_setup)).fingerprint())
+
+        # Equal setups key the same dictionary entry.
+        results = {diffraction_setup: "result"}
+        self.assertEqual(results[diffractionSetupMultipleEnergies()], "result")
+        self.assertEqual(hash(diffraction_setup), hash(diffractionSetupMultipleEnergies()))
+
+        # Every parameter the results depend on changes the fingerprint.
+        changed_setups = [diffractionSetupMultipleEnergies() for _ in range(4)]
+        changed_setups[0]._thickness = 0.0002
+        changed_setups[1]._debyeWaller = 0.9
+        changed_setups[2]._miller_l = 3
+        changed_setups[3]._setAxes(diffraction_setup.energies(),
+                                   OrderedDict((energy, deviations * 2.0) for energy, deviations
+                                               in diffraction_setup._photonIndexByEnergy().items()))
+
+        for changed_setup in changed_setups:
+            self.assertNotEqual(changed_setup.fingerprint(), fingerprint)
+            self.assertFalse(changed_setup == diffraction_setup)
+
+        # The physics fingerprint ignores the photon axes.
+        physics_fingerprint = diffraction_setup.physicsFingerprint()
+        self.assertEqual(len(physics_fingerprint), 64)
+        self.assertEqual(changed_setups[3].physicsFingerprint(), physics_fingerprint)
+        for changed_setup in changed_setups[:3]:
+            self.assertNotEqual(changed_setup.physicsFingerprint(), physics_fingerprint)
+
+        self.assertFalse(diffraction_setup == "Si")
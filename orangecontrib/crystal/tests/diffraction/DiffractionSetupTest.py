@@ -2,6 +2,7 @@
 Unittest for DiffractionSetup class.
 """
 
+import pickle
 import unittest
 
 import numpy
@@ -10,6 +11,7 @@ from orangecontrib.crystal.diffraction.DiffractionSetup import DiffractionSetup
 from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
 from orangecontrib.crystal.util.Vector import Vector
 from orangecontrib.crystal.util.Photon import Photon
+from orangecontrib.crystal.util.PhotonBundle import PhotonBundle
 
 
 def diffractionSetup():
@@ -177,6 +179,105 @@ class DiffractionSetupTest(unittest.TestCase):
                 deviation = diffraction.deviationOfIncomingPhoton(photon)
                 self.assertAlmostEqual(test_deviation, deviation)
 
+    def testAnglesBragg(self):
+        diffraction = DiffractionSetup(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.0, [])
+
+        energies = numpy.array([[8000, 10000], [8000, 15000]])
+        angles_bragg = diffraction.anglesBragg(energies)
+
+        self.assertEqual(angles_bragg.shape, (2, 2))
+        for energy, angle_bragg in zip(energies.flatten(), angles_bragg.flatten()):
+            self.assertAlmostEqual(angle_bragg, diffraction.angleBragg(energy))
+
+    def testDeviationsOfIncomingPhotons(self):
+        diffraction = DiffractionSetup(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.0, [])
+
+        photons = [Photon(energy, diffraction.incomingPhotonDirection(energy, test_deviation))
+                   for energy in [2500, 6000, 8000, 15000, 22000, 30000]
+                   for test_deviation in [0.01, 0.03, 0.5, -0.1, -0.9, 0.00001, -0.0007]]
+
+        deviations = diffraction.deviationsOfIncomingPhotons(photons)
+
+        self.assertEqual(len(deviations), len(photons))
+        for photon, deviation in zip(photons, deviations):
+            self.assertAlmostEqual(deviation, diffraction.deviationOfIncomingPhoton(photon))
+
+        self.assertEqual(len(diffraction.deviationsOfIncomingPhotons([])), 0)
+
+    def testPhotonBundle(self):
+        diffraction = DiffractionSetup(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.0, [])
+
+        photons = [Photon(energy, diffraction.incomingPhotonDirection(energy, deviation))
+                   for energy in [8000, 10000]
+                   for deviation in [-0.0007, 0.00001, 0.01]]
+
+        photon_setup = DiffractionSetup(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.0, photons)
+        bundle_setup = DiffractionSetup(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.0,
+                                        PhotonBundle.fromPhotons(photons))
+
+        numpy.testing.assert_array_equal(bundle_setup.energies(), photon_setup.energies())
+        numpy.testing.assert_array_almost_equal(bundle_setup.angleDeviationGrid(), photon_setup.angleDeviationGrid())
+        numpy.testing.assert_array_almost_equal(bundle_setup.angleDeviationGridByEnergy(8000),
+                                                [-0.0007, 0.00001, 0.01])
+        self.assertEqual(bundle_setup.angleDeviationPoints(), 6)
+
+    def testSnapshot(self):
+        diffraction = DiffractionSetup(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.0, [])
+
+        photons = [Photon(energy, diffraction.incomingPhotonDirection(energy, deviation))
+                   for energy in [10000, 8000]
+                   for deviation in [0.01, -0.0007, 0.00001]]
+        diffraction_setup = DiffractionSetup(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.0, photons)
+
+        snapshot = diffraction_setup.snapshot()
+
+        self.assertTrue(snapshot == diffraction_setup)
+        self.assertIs(snapshot._crystal, diffraction_setup._crystal)
+        self.assertIsNone(snapshot._incoming_photons)
+        for energy in [8000, 10000]:
+            numpy.testing.assert_array_almost_equal(snapshot.angleDeviationGridByEnergy(energy),
+                                                    diffraction_setup.angleDeviationGridByEnergy(energy))
+
+        # Snapshots do not share their memoized values with the original.
+        snapshot.angleBragg(9000)
+        self.assertNotIn(9000.0, diffraction_setup._angle_bragg_cache)
+
+        # Clones and unpickled setups reference the shared crystal.
+        self.assertIs(diffraction_setup.clone()._crystal, diffraction_setup._crystal)
+        self.assertIs(pickle.loads(pickle.dumps(diffraction_setup))._crystal, diffraction_setup._crystal)
+
+    def testReflectionSetup(self):
+        diffraction_setup = DiffractionSetup(BraggDiffraction(), "Si", 0.0001, 1, 1, 1, 0.0, 0.0, [])
+        diffraction_setup._setAxes(numpy.array([8000.0]), {8000.0: numpy.array([-1e-5, 0.0, 1e-5])})
+        diffraction_setup.dSpacing()
+
+        reflection_setup = diffraction_setup.reflectionSetup(2, 2, 0)
+
+        self.assertEqual((reflection_setup.millerH(), reflection_setup.millerK(), reflection_setup.millerL()),
+                         (2, 2, 0))
+        self.assertIs(reflection_setup._crystal, diffraction_setup._crystal)
+        numpy.testing.assert_array_equal(reflection_setup.angleDeviationGridByEnergy(8000.0),
+                                         [-1e-5, 0.0, 1e-5])
+
+        # The derived geometry belongs to the new reflection.
+        self.assertAlmostEqual(reflection_setup.dSpacing(), 1.920, 3)
+        self.assertAlmostEqual(diffraction_setup.dSpacing(), 3.135, 3)
+        self.assertNotEqual(reflection_setup.fingerprint(), diffraction_setup.fingerprint())
+
+    def testIsForbiddenReflection(self):
+        # Diamond structure: all indices odd or all even with a sum divisible by four.
+        for miller_indices, forbidden in [((1, 1, 1), False), ((2, 2, 0), False), ((4, 0, 0), False),
+                                          ((1, 0, 0), True), ((2, 0, 0), True), ((2, 2, 2), True),
+                                          ((1, 1, 2), True)]:
+            diffraction_setup = DiffractionSetup(BraggDiffraction(), "Si", 0.0001, *miller_indices,
+                                                 asymmetry_angle=0.0, azimuthal_angle=0.0, incoming_photons=[])
+            self.assertEqual(diffraction_setup.isForbiddenReflection(), forbidden)
+
+        # Rock salt: odd reflections are weak but allowed since Na and Cl scatter differently.
+        diffraction_setup = DiffractionSetup(BraggDiffraction(), "NaCl", 0.0001, 1, 1, 1, 0.0, 0.0, [])
+        self.assertFalse(diffraction_setup.isForbiddenReflection())
+        self.assertTrue(diffraction_setup.reflectionSetup(1, 1, 0).isForbiddenReflection())
+
     def testUnitcellVolume(self):
         diffraction = diffractionSetup()
 
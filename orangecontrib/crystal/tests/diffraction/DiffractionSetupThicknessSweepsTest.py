@@ -0,0 +1,83 @@
+"""
+Unittest for DiffractionSetupThicknessSweeps class.
+"""
+
+import unittest
+
+import numpy
+
+from orangecontrib.crystal.diffraction.DiffractionSetup import DiffractionSetup
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.DiffractionSetupThicknessSweeps import DiffractionSetupThicknessSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
+
+
+def diffractionSetupThickness():
+    diffraction_setup = DiffractionSetupThicknessSweeps(BraggDiffraction(),
+                                                        "Si",
+                                                        thickness_min=1e-6,
+                                                        thickness_max=10e-6,
+                                                        thickness_points=10,
+                                                        miller_h=1,
+                                                        miller_k=1,
+                                                        miller_l=1,
+                                                        asymmetry_angle=0.0,
+                                                        azimuthal_angle=0.5 * numpy.pi,
+                                                        energy_min=8000,
+                                                        energy_max=8100,
+                                                        energy_points=3,
+                                                        angle_deviation_min=-100.0e-6,
+                                                        angle_deviation_max=100e-6,
+                                                        angle_deviation_points=41)
+    return diffraction_setup
+
+
+class DiffractionSetupThicknessSweepsTest(unittest.TestCase):
+    def testConstructor(self):
+        diffraction_setup = diffractionSetupThickness()
+
+        self.assertEqual(diffraction_setup.thicknessPoints(), 10)
+        self.assertAlmostEqual(diffraction_setup.thicknessMin(), 1e-6)
+        self.assertAlmostEqual(diffraction_setup.thicknessMax(), 10e-6)
+        self.assertAlmostEqual(diffraction_setup.thickness(), 1e-6)
+        self.assertEqual(diffraction_setup.energyPoints(), 3)
+        self.assertEqual(diffraction_setup.angleDeviationPoints(), 3 * 41)
+
+        self.assertRaises(ValueError,
+                          DiffractionSetupThicknessSweeps,
+                          BraggDiffraction(), "Si", 0.0, 1e-5, 10, 1, 1, 1, 0.0, 0.5 * numpy.pi,
+                          8000, 8000, 1, -100.0e-6, 100e-6, 41)
+
+    def testThicknessSetup(self):
+        diffraction_setup = diffractionSetupThickness()
+        thickness_setup = diffraction_setup.thicknessSetup(5e-6)
+
+        self.assertIsInstance(thickness_setup, DiffractionSetup)
+        self.assertEqual(thickness_setup.thickness(), 5e-6)
+
+        # A thickness of the sweep is indistinguishable from a plain sweep of that thickness.
+        sweep = DiffractionSetupSweeps(BraggDiffraction(), "Si", 5e-6, 1, 1, 1, 0.0, 0.5 * numpy.pi,
+                                       8000, 8100, 3, -100.0e-6, 100e-6, 41)
+        self.assertEqual(thickness_setup.fingerprint(), sweep.fingerprint())
+
+        # The geometry is shared, not recalculated.
+        diffraction_setup.angleBragg(8000.0)
+        diffraction_setup.dSpacing()
+        thickness_setup = diffraction_setup.thicknessSetup(5e-6)
+        thickness_setup.angleBragg(8000.0)
+        thickness_setup.dSpacing()
+        self.assertEqual(thickness_setup.xraylibCalls(), {"Bragg_angle": 0, "Crystal_dSpacing": 0})
+
+    def testFingerprint(self):
+        diffraction_setup = diffractionSetupThickness()
+
+        sweep = DiffractionSetupSweeps(BraggDiffraction(), "Si", 1e-6, 1, 1, 1, 0.0, 0.5 * numpy.pi,
+                                       8000, 8100, 3, -100.0e-6, 100e-6, 41)
+
+        self.assertEqual(diffraction_setup.fingerprint(), diffractionSetupThickness().fingerprint())
+        self.assertNotEqual(diffraction_setup.fingerprint(), sweep.fingerprint())
+
+        other_setup = DiffractionSetupThicknessSweeps(BraggDiffraction(), "Si", 1e-6, 20e-6, 10, 1, 1, 1,
+                                                      0.0, 0.5 * numpy.pi,
+                                                      8000, 8100, 3, -100.0e-6, 100e-6, 41)
+        self.assertNotEqual(diffraction_setup.fingerprint(), other_setup.fingerprint())
@@ -3,19 +3,24 @@ Unittest for Diffraction class.
 """
 
 import unittest
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import xraylib
 
 from orangecontrib.crystal.diffraction.Diffraction import Diffraction
+from orangecontrib.crystal.diffraction.DiffractionEnergyResult import DiffractionEnergyResult
 from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.DiffractionSetupAdaptiveSweeps import DiffractionSetupAdaptiveSweeps
+from orangecontrib.crystal.diffraction.DiffractionSetupOrientationSweeps import DiffractionSetupOrientationSweeps
+from orangecontrib.crystal.diffraction.DiffractionSetupThicknessSweeps import DiffractionSetupThicknessSweeps
 from orangecontrib.crystal.diffraction.GeometryType import GeometryType
 from orangecontrib.crystal.util.Vector import Vector
 from orangecontrib.crystal.util.Photon import Photon
 from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction, LaueDiffraction, BraggTransmission, LaueTransmission
 from orangecontrib.crystal.diffraction.DiffractionExceptions import ReflectionImpossibleException, TransmissionImpossibleException, \
                                                                     StructureFactorF0isZeroException, StructureFactorFHisZeroException, \
-                                                                    StructureFactorFHbarIsZeroException
+                                                                    StructureFactorFHbarIsZeroException, BraggConditionUnreachableException
 
 
 class DiffractionTest(unittest.TestCase):
@@ -192,6 +197,12 @@ class DiffractionTest(unittest.TestCase):
         self.assertAlmostEqual(psi.real,-1.527826e-5)
         self.assertAlmostEqual(psi.imag,-2.372566e-7)
 
+        # The setup shares the formula, e.g. to place Darwin windows.
+        diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(), "Si", 128 * 1e-6, 1, 1, 1, 0.0, 0.5 * np.pi,
+                                                   8000, 8000, 1, -20.0e-6, 20e-6, 5)
+        setup_psi = diffraction_setup._psi(8000, structure_factor)
+        self.assertAlmostEqual(abs(setup_psi - psi) / abs(psi), 0.0, 12)
+
     def testCheckSetup(self):
         diffraction = Diffraction()
 
@@ -392,4 +403,427 @@ class DiffractionTest(unittest.TestCase):
         ow = PlotViewer1D()
         ow.show()
         ow.setPlots(plots)  
-        application.exec_()
\ No newline at end of file
+        application.exec_()
+
+    def testCalculateDiffractionVisitsEveryPhotonOnce(self):
+        diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                                   "Si",
+                                                   thickness=128 * 1e-6,
+                                                   miller_h=1,
+                                                   miller_k=1,
+                                                   miller_l=1,
+                                                   asymmetry_angle=0.0,
+                                                   azimuthal_angle=0.5 * np.pi,
+                                                   energy_min=8000,
+                                                   energy_max=8100,
+                                                   energy_points=4,
+                                                   angle_deviation_min=-20.0e-6,
+                                                   angle_deviation_max=20e-6,
+                                                   angle_deviation_points=5)
+
+        evaluated_photons = []
+
+        class CountingDiffraction(Diffraction):
+            def _perfectCrystalForEnergy(self, diffraction_setup, energy, *args, **kwargs):
+                perfect_crystal = Diffraction._perfectCrystalForEnergy(self, diffraction_setup, energy, *args, **kwargs)
+                calculate_diffraction_batch = perfect_crystal.calculateDiffractionBatch
+
+                def countingCalculateDiffractionBatch(energies, directions):
+                    evaluated_photons.extend(energies)
+                    return calculate_diffraction_batch(energies, directions)
+
+                perfect_crystal.calculateDiffractionBatch = countingCalculateDiffractionBatch
+                return perfect_crystal
+
+        CountingDiffraction().calculateDiffraction(diffraction_setup)
+
+        self.assertEqual(len(evaluated_photons), 4 * 5)
+        for energy in diffraction_setup.energies():
+            self.assertEqual(evaluated_photons.count(energy), 5)
+
+    def testCalculateDiffractionEvents(self):
+        diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(), "Si", 128 * 1e-6, 1, 1, 1, 0.0, 0.5 * np.pi,
+                                                   8000, 8100, 4, -20.0e-6, 20e-6, 5)
+
+        events = []
+        diffraction = Diffraction()
+        diffraction.setOnCalculationStart(lambda: events.append("start"))
+        diffraction.setOnProgress(lambda current, total: events.append((current, total)))
+        diffraction.setOnCalculationEnd(lambda: events.append("end"))
+
+        diffraction.calculateDiffraction(diffraction_setup)
+
+        # One calculation, progress in energies.
+        self.assertEqual(events, ["start", (1, 4), (2, 4), (3, 4), (4, 4), "end"])
+
+    def testCalculateDiffractionWithSusceptibilityTable(self):
+        diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                                   "Si",
+                                                   thickness=128 * 1e-6,
+                                                   miller_h=1,
+                                                   miller_k=1,
+                                                   miller_l=1,
+                                                   asymmetry_angle=0.0,
+                                                   azimuthal_angle=0.5 * np.pi,
+                                                   energy_min=8000,
+                                                   energy_max=8100,
+                                                   energy_points=11,
+                                                   angle_deviation_min=-20.0e-6,
+                                                   angle_deviation_max=20e-6,
+                                                   angle_deviation_points=5)
+
+        diffraction = Diffraction()
+        self.assertIsNone(diffraction.susceptibilityTolerance())
+        exact = diffraction.calculateDiffraction(diffraction_setup)
+
+        diffraction.setSusceptibilityTolerance(1e-5)
+        self.assertEqual(diffraction.susceptibilityTolerance(), 1e-5)
+        interpolated = diffraction.calculateDiffraction(diffraction_setup)
+
+        for energy in diffraction_setup.energies():
+            self.assertAlmostEqualLists(interpolated.sIntensityByEnergy(energy),
+                                        exact.sIntensityByEnergy(energy))
+            self.assertAlmostEqualLists(interpolated.pPhaseByEnergy(energy),
+                                        exact.pPhaseByEnergy(energy))
+
+    def testCalculateDiffractionWithExecutor(self):
+        diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                                   "Si",
+                                                   thickness=128 * 1e-6,
+                                                   miller_h=1,
+                                                   miller_k=1,
+                                                   miller_l=1,
+                                                   asymmetry_angle=0.0,
+                                                   azimuthal_angle=0.5 * np.pi,
+                                                   energy_min=8000,
+                                                   energy_max=8100,
+                                                   energy_points=5,
+                                                   angle_deviation_min=-20.0e-6,
+                                                   angle_deviation_max=20e-6,
+                                                   angle_deviation_points=5)
+
+        serial = Diffraction().calculateDiffraction(diffraction_setup)
+
+        progress = []
+        diffraction = Diffraction()
+        diffraction.setOnProgress(lambda current, total: progress.append((current, total)))
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            parallel = diffraction.calculateDiffraction(diffraction_setup,
+                                                        executor=executor,
+                                                        energies_per_chunk=2)
+
+        # Five energies in chunks of two: three chunks.
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(progress[-1], (5, 5))
+
+        for energy in diffraction_setup.energies():
+            self.assertAlmostEqualLists(parallel.sIntensityByEnergy(energy),
+                                        serial.sIntensityByEnergy(energy))
+            self.assertAlmostEqualLists(parallel.pPhaseByEnergy(energy),
+                                        serial.pPhaseByEnergy(energy))
+            self.assertAlmostEqualLists(parallel.differencePhaseByEnergy(energy),
+                                        serial.differencePhaseByEnergy(energy))
+
+    def testCalculateDiffractionAdaptive(self):
+        setup_arguments = dict(geometry_type=BraggDiffraction(),
+                               crystal_name="Si",
+                               thickness=128 * 1e-6,
+                               miller_h=1,
+                               miller_k=1,
+                               miller_l=1,
+                               asymmetry_angle=0.0,
+                               azimuthal_angle=0.5 * np.pi,
+                               energy_min=8000,
+                               energy_max=8100,
+                               energy_points=2,
+                               angle_deviation_min=-100.0e-6,
+                               angle_deviation_max=100e-6)
+
+        dense_setup = DiffractionSetupSweeps(angle_deviation_points=4001, **setup_arguments)
+        adaptive_setup = DiffractionSetupAdaptiveSweeps(angle_deviation_points=41,
+                                                        angle_deviation_max_points=400,
+                                                        **setup_arguments)
+
+        dense = Diffraction().calculateDiffraction(dense_setup)
+        adaptive = Diffraction().calculateDiffraction(adaptive_setup)
+
+        for energy in adaptive_setup.energies():
+            deviations = adaptive.angleDeviationsByEnergy(energy)
+            dense_deviations = dense.angleDeviationsByEnergy(energy)
+
+            # Non-uniform axis within the point budget that keeps the initial grid.
+            self.assertLessEqual(len(deviations), 400)
+            self.assertGreater(len(deviations), 41)
+            self.assertGreater(np.diff(deviations).max(), 2.0 * np.diff(deviations).min())
+            self.assertEqual(len(adaptive.sIntensityByEnergy(energy)), len(deviations))
+
+            for intensities, dense_intensities in ((adaptive.sIntensityByEnergy(energy),
+                                                    dense.sIntensityByEnergy(energy)),
+                                                   (adaptive.pIntensityByEnergy(energy),
+                                                    dense.pIntensityByEnergy(energy))):
+                interpolated = np.interp(dense_deviations, deviations, intensities)
+                error = np.abs(interpolated - dense_intensities).max() / dense_intensities.max()
+
+                # A uniform grid with the same number of points is more than ten times worse.
+                self.assertLess(error, 5e-3)
+
+    def testIterateDiffraction(self):
+        diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                                   "Si",
+                                                   thickness=128 * 1e-6,
+                                                   miller_h=1,
+                                                   miller_k=1,
+                                                   miller_l=1,
+                                                   asymmetry_angle=0.0,
+                                                   azimuthal_angle=0.5 * np.pi,
+                                                   energy_min=8000,
+                                                   energy_max=8100,
+                                                   energy_points=3,
+                                                   angle_deviation_min=-20.0e-6,
+                                                   angle_deviation_max=20e-6,
+                                                   angle_deviation_points=5)
+
+        result = Diffraction().calculateDiffraction(diffraction_setup)
+
+        progress = []
+        diffraction = Diffraction()
+        diffraction.setOnProgress(lambda current, total: progress.append((current, total)))
+        energy_results = diffraction.iterateDiffraction(diffraction_setup)
+
+        # Energies are calculated on demand.
+        first_energy_result = next(energy_results)
+        self.assertEqual(progress, [])
+        self.assertEqual(first_energy_result.energy(), 8000)
+
+        for energy_result in [first_energy_result] + list(energy_results):
+            energy = energy_result.energy()
+            self.assertAlmostEqualLists(energy_result.angleDeviations(),
+                                        diffraction_setup.angleDeviationGridByEnergy(energy))
+            self.assertAlmostEqualLists(energy_result.sIntensities(),
+                                        result.sIntensityByEnergy(energy))
+            self.assertAlmostEqualLists(energy_result.pPhases(),
+                                        result.pPhaseByEnergy(energy))
+            self.assertAlmostEqualLists(np.angle(energy_result.differenceAmplitudes()),
+                                        result.differencePhaseByEnergy(energy))
+
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+
+        # The polarization difference vanishes where the P amplitude does.
+        energy_result = DiffractionEnergyResult(8000, np.array([0.0, 1e-6]),
+                                                np.array([1.0 + 1.0j, 2.0]), np.array([0.0, 1.0j]))
+        np.testing.assert_array_equal(energy_result.differenceAmplitudes(), [0.0, -2.0j])
+
+    def testIterateDiffractionInterleaved(self):
+        def sweep(crystal_name):
+            return DiffractionSetupSweeps(BraggDiffraction(),
+                                          crystal_name,
+                                          thickness=128 * 1e-6,
+                                          miller_h=1,
+                                          miller_k=1,
+                                          miller_l=1,
+                                          asymmetry_angle=0.0,
+                                          azimuthal_angle=0.5 * np.pi,
+                                          energy_min=8000,
+                                          energy_max=8400,
+                                          energy_points=5,
+                                          angle_deviation_min=-20.0e-6,
+                                          angle_deviation_max=20e-6,
+                                          angle_deviation_points=5)
+
+        silicon_setup = sweep("Si")
+        diamond_setup = sweep("Diamond")
+
+        diffraction = Diffraction()
+        diffraction.setSusceptibilityTolerance(1e-6)
+
+        silicon_results = diffraction.iterateDiffraction(silicon_setup)
+        diamond_results = diffraction.iterateDiffraction(diamond_setup)
+
+        # Each generator keeps its own susceptibility table, also while the other one and a direct calculation run.
+        for silicon_result, diamond_result in zip(silicon_results, diamond_results):
+            silicon_direct = diffraction.calculateDiffraction(silicon_setup)
+            diamond_direct = diffraction.calculateDiffraction(diamond_setup)
+
+            np.testing.assert_allclose(silicon_result.sAmplitudes(),
+                                       silicon_direct.sAmplitudeByEnergy(silicon_result.energy()))
+            np.testing.assert_allclose(silicon_result.pAmplitudes(),
+                                       silicon_direct.pAmplitudeByEnergy(silicon_result.energy()))
+            np.testing.assert_allclose(diamond_result.sAmplitudes(),
+                                       diamond_direct.sAmplitudeByEnergy(diamond_result.energy()))
+            np.testing.assert_allclose(diamond_result.pAmplitudes(),
+                                       diamond_direct.pAmplitudeByEnergy(diamond_result.energy()))
+
+    def testCalculateDiffractionIncremental(self):
+        def sweep(energy_points, angle_deviation_max, angle_deviation_points, thickness=128 * 1e-6):
+            return DiffractionSetupSweeps(BraggDiffraction(), "Si", thickness, 1, 1, 1, 0.0, 0.5 * np.pi,
+                                          8000, 8100, energy_points,
+                                          -angle_deviation_max, angle_deviation_max, angle_deviation_points)
+
+        previous_result = Diffraction().calculateDiffraction(sweep(3, 50e-6, 101))
+
+        # Zoom out to twice the range and add energies between the previous ones at the same resolution.
+        diffraction_setup = sweep(5, 100e-6, 201)
+        full_result = Diffraction().calculateDiffraction(diffraction_setup)
+
+        progress = []
+        diffraction = Diffraction()
+        diffraction.setOnProgress(lambda current, total: progress.append((current, total)))
+        result = diffraction.calculateDiffractionIncremental(diffraction_setup, previous_result)
+
+        self.assertEqual(progress, [(index, 5) for index in range(1, 6)])
+        for energy in diffraction_setup.energies():
+            np.testing.assert_allclose(result.sAmplitudeByEnergy(energy), full_result.sAmplitudeByEnergy(energy),
+                                       rtol=1e-9)
+            np.testing.assert_allclose(result.pAmplitudeByEnergy(energy), full_result.pAmplitudeByEnergy(energy),
+                                       rtol=1e-9)
+
+        # Known grid points are taken from the previous result, new ones are calculated.
+        previous_result.setAmplitudes(np.full((3, 101), 2.0 + 1.0j), np.full((3, 101), 3.0))
+        result = Diffraction().calculateDiffractionIncremental(diffraction_setup, previous_result)
+
+        for energy in diffraction_setup.energies():
+            deviations = result.angleDeviationsByEnergy(energy)
+            known = (np.abs(deviations) <= 50.1e-6) & (energy in (8000, 8050, 8100))
+
+            np.testing.assert_array_equal(result.sAmplitudeByEnergy(energy)[known], 2.0 + 1.0j)
+            np.testing.assert_array_equal(result.pAmplitudeByEnergy(energy)[known], 3.0)
+            np.testing.assert_allclose(result.sAmplitudeByEnergy(energy)[~known],
+                                       full_result.sAmplitudeByEnergy(energy)[~known], rtol=1e-9)
+
+        # Doubling the resolution reuses every other grid point.
+        result = Diffraction().calculateDiffractionIncremental(sweep(3, 50e-6, 201), previous_result)
+        self.assertEqual(np.count_nonzero(result.pAmplitudeByEnergy(8050) == 3.0), 101)
+
+        # Results of other crystals are not reused.
+        result = Diffraction().calculateDiffractionIncremental(sweep(3, 50e-6, 101, thickness=1e-6), previous_result)
+        self.assertEqual(np.count_nonzero(result.pAmplitudeByEnergy(8050) == 3.0), 0)
+
+        # Results of other settings are not reused.
+        interpolating_diffraction = Diffraction()
+        interpolating_diffraction.setSusceptibilityTolerance(1e-6)
+        self.assertEqual(previous_result.calculationSettings(), Diffraction().calculationSettings())
+
+        result = interpolating_diffraction.calculateDiffractionIncremental(diffraction_setup, previous_result)
+        self.assertEqual(np.count_nonzero(result.pAmplitudeByEnergy(8050) == 3.0), 0)
+        self.assertEqual(result.calculationSettings(), interpolating_diffraction.calculationSettings())
+
+        # Incremental calculations interpolate the structure factors like full ones.
+        interpolated_result = interpolating_diffraction.calculateDiffraction(diffraction_setup)
+        result = interpolating_diffraction.calculateDiffractionIncremental(diffraction_setup,
+                                                                           interpolating_diffraction.calculateDiffraction(
+                                                                               sweep(3, 50e-6, 101)))
+        for energy in diffraction_setup.energies():
+            np.testing.assert_allclose(result.sAmplitudeByEnergy(energy),
+                                       interpolated_result.sAmplitudeByEnergy(energy), rtol=1e-9)
+
+    def testCalculateThicknessSweep(self):
+        for geometry_type in [BraggDiffraction(), BraggTransmission()]:
+            diffraction_setup = DiffractionSetupThicknessSweeps(geometry_type, "Si", 1e-6, 100e-6, 5, 1, 1, 1,
+                                                                0.0, 0.5 * np.pi,
+                                                                8000, 8100, 3, -50e-6, 50e-6, 51)
+
+            progress = []
+            diffraction = Diffraction()
+            diffraction.setOnProgress(lambda current, total: progress.append((current, total)))
+            sweep_result = diffraction.calculateThicknessSweep(diffraction_setup)
+
+            self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+            np.testing.assert_array_equal(sweep_result.thicknesses(), diffraction_setup.thicknesses())
+            self.assertEqual(len(sweep_result.diffractionResults()), 5)
+
+            # Every thickness agrees with a separate calculation of that thickness.
+            for thickness, result in zip(sweep_result.thicknesses(), sweep_result.diffractionResults()):
+                self.assertEqual(result.diffractionSetup().thickness(), thickness)
+
+                reference = Diffraction().calculateDiffraction(diffraction_setup.thicknessSetup(thickness))
+                for energy in diffraction_setup.energies():
+                    np.testing.assert_allclose(result.sAmplitudeByEnergy(energy),
+                                               reference.sAmplitudeByEnergy(energy), rtol=1e-10)
+                    np.testing.assert_allclose(result.pAmplitudeByEnergy(energy),
+                                               reference.pAmplitudeByEnergy(energy), rtol=1e-10)
+
+            # Curves along the thickness axis.
+            reflectivities = sweep_result.sIntensityByThickness(8050, 0.0)
+            self.assertEqual(reflectivities.shape, (5,))
+            for thickness, reflectivity in zip(sweep_result.thicknesses(), reflectivities):
+                self.assertAlmostEqual(reflectivity,
+                                       sweep_result.diffractionResultByThickness(thickness).sIntensityByDeviation(0.0)[1])
+
+    def testCalculateReflectionScan(self):
+        diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(), "Si", 128 * 1e-6, 1, 1, 1, 0.0, 0.5 * np.pi,
+                                                   8000, 8100, 3, -50e-6, 50e-6, 51)
+
+        # (2, 0, 0) is forbidden, (5, 5, 5) is not reachable at these energies.
+        reflections = [(1, 1, 1), (2, 0, 0), (2, 2, 0), (5, 5, 5), (4, 0, 0)]
+
+        progress = []
+        diffraction = Diffraction()
+        diffraction.setOnProgress(lambda current, total: progress.append((current, total)))
+        scan_result = diffraction.calculateReflectionScan(diffraction_setup, reflections)
+
+        self.assertEqual(progress, [(index, 5) for index in range(1, 6)])
+        self.assertEqual(scan_result.reflections(), [(1, 1, 1), (2, 2, 0), (4, 0, 0)])
+        self.assertEqual(len(scan_result), 3)
+        self.assertIn((2, 2, 0), scan_result)
+        self.assertIsInstance(scan_result.skippedReflections()[(2, 0, 0)], StructureFactorFHisZeroException)
+        self.assertIsInstance(scan_result.skippedReflections()[(5, 5, 5)], BraggConditionUnreachableException)
+
+        # Every reflection agrees with a separate calculation of that reflection.
+        for reflection in scan_result.reflections():
+            result = scan_result.diffractionResultByReflection(*reflection)
+            reference = Diffraction().calculateDiffraction(diffraction_setup.reflectionSetup(*reflection))
+
+            self.assertEqual(result.diffractionSetup(), reference.diffractionSetup())
+            for energy in diffraction_setup.energies():
+                np.testing.assert_allclose(result.sAmplitudeByEnergy(energy), reference.sAmplitudeByEnergy(energy),
+                                           rtol=1e-12)
+                np.testing.assert_allclose(result.pAmplitudeByEnergy(energy), reference.pAmplitudeByEnergy(energy),
+                                           rtol=1e-12)
+
+        # Impossible geometries are skipped as well: the asymmetry exceeds the Bragg angle of (1, 1, 1) only.
+        asymmetric_setup = DiffractionSetupSweeps(BraggDiffraction(), "Si", 128 * 1e-6, 1, 1, 1, 0.3, 0.5 * np.pi,
+                                                  8000, 8100, 3, -50e-6, 50e-6, 51)
+        scan_result = Diffraction().calculateReflectionScan(asymmetric_setup, [(1, 1, 1), (4, 4, 4)])
+        self.assertEqual(scan_result.reflections(), [(4, 4, 4)])
+        self.assertIsInstance(scan_result.skippedReflections()[(1, 1, 1)], ReflectionImpossibleException)
+
+        self.assertRaises(ValueError, Diffraction().calculateReflectionScan, diffraction_setup, [(0, 0, 0)])
+
+    def testCalculateOrientationSweep(self):
+        # The Bragg angle of Si (1, 1, 1) at 8 keV is about 0.247, larger asymmetry angles are impossible.
+        diffraction_setup = DiffractionSetupOrientationSweeps(BraggDiffraction(), "Si", 128 * 1e-6, 1, 1, 1,
+                                                              -0.2, 0.3, 6, 0.45 * np.pi, 0.5 * np.pi, 2,
+                                                              8000, 8100, 3, -50e-6, 50e-6, 51)
+
+        progress = []
+        diffraction = Diffraction()
+        diffraction.setOnProgress(lambda current, total: progress.append((current, total)))
+        sweep_result = diffraction.calculateOrientationSweep(diffraction_setup)
+
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+        self.assertEqual(len(sweep_result.diffractionResults()), 12)
+
+        # Every possible orientation agrees with a separate calculation of that orientation.
+        for (asymmetry_angle, azimuthal_angle), result in zip(diffraction_setup.orientations(),
+                                                              sweep_result.diffractionResults()):
+            self.assertEqual(result.diffractionSetup().asymmetryAngle(), asymmetry_angle)
+            self.assertEqual(result.diffractionSetup().azimuthalAngle(), azimuthal_angle)
+
+            if asymmetry_angle > 0.25:
+                self.assertTrue(np.all(np.isnan(result.sAmplitudeByEnergy(8000))))
+                continue
+
+            reference = Diffraction().calculateDiffraction(diffraction_setup.orientationSetup(asymmetry_angle,
+                                                                                              azimuthal_angle))
+            for energy in diffraction_setup.energies():
+                np.testing.assert_allclose(result.sAmplitudeByEnergy(energy), reference.sAmplitudeByEnergy(energy),
+                                           rtol=1e-9)
+                np.testing.assert_allclose(result.pAmplitudeByEnergy(energy), reference.pAmplitudeByEnergy(energy),
+                                           rtol=1e-9)
+
+        # Maps over the orientations.
+        reflectivities = sweep_result.sIntensityByOrientation(8000, 0.0)
+        self.assertEqual(reflectivities.shape, (6, 2))
+        self.assertAlmostEqual(reflectivities[2, 1],
+                               sweep_result.diffractionResultByOrientation(0.0, 0.5 * np.pi).sIntensityByDeviation(0.0)[0])
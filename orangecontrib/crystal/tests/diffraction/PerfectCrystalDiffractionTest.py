@@ -4,10 +4,12 @@ Unittest for PerfectCrystalDiffraction class.
 
 import unittest
 
+import numpy
 from numpy import pi
 
-from orangecontrib.crystal.diffraction.PerfectCrystalDiffraction import PerfectCrystalDiffraction
+from orangecontrib.crystal.diffraction.PerfectCrystalDiffraction import PerfectCrystalDiffraction, use_mpmath
 from orangecontrib.crystal.util.Vector import Vector
+from orangecontrib.crystal.util.VectorArray import VectorArray
 from orangecontrib.crystal.util.Photon import Photon
 from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction, LaueDiffraction, BraggTransmission, LaueTransmission
 
@@ -259,3 +261,102 @@ class PerfectCrystalDiffractionTest(unittest.TestCase):
         self.assertAlmostEqual(reflectivity["S"].phase(), -1.5995996312)
         self.assertAlmostEqual(reflectivity["P"].intensity(), 6.12476691e-14, 19)
         self.assertAlmostEqual(reflectivity["P"].phase(), -1.7858414233)
+
+    def testCalculateDiffractionBatch(self):
+        perfect_crystal_diffraction = generatePerfectCrystalDiffraction()
+        photon_in = generatePhotonIn()
+
+        photons = [Photon(3124, photon_in.unitDirectionVector().rotateAroundAxis(Vector(0, 1, 0), deviation))
+                   for deviation in numpy.linspace(-50e-6, 50e-6, 7)]
+
+        energies = numpy.array([photon.energy() for photon in photons])
+        directions = numpy.array([photon.unitDirectionVector().components() for photon in photons])
+
+        for geometry_type in [BraggDiffraction(), LaueDiffraction(), BraggTransmission(), LaueTransmission()]:
+            perfect_crystal_diffraction._geometryType = geometry_type
+
+            batch = perfect_crystal_diffraction.calculateDiffractionBatch(energies, directions)
+
+            self.assertEqual(batch["S"].dtype, numpy.complex128)
+            self.assertEqual(batch["P"].shape, (7,))
+
+            for index, photon in enumerate(photons):
+                reflectivity = perfect_crystal_diffraction.calculateDiffraction(photon)
+                self.assertAlmostEqual(batch["S"][index], reflectivity["S"].complexAmplitude(), 12)
+                self.assertAlmostEqual(batch["P"][index], reflectivity["P"].complexAmplitude(), 12)
+
+    def testCalculateDiffractionThicknessSweep(self):
+        perfect_crystal_diffraction = generatePerfectCrystalDiffraction()
+        photon_in = generatePhotonIn()
+
+        directions = numpy.array([photon_in.unitDirectionVector().rotateAroundAxis(Vector(0, 1, 0), deviation).components()
+                                  for deviation in numpy.linspace(-50e-6, 50e-6, 7)])
+        energies = numpy.full(7, 3124.0)
+        thicknesses = numpy.array([1e-6, 1e-5, 1e-4, 1e-2])
+
+        for geometry_type in [BraggDiffraction(), LaueDiffraction(), BraggTransmission(), LaueTransmission()]:
+            perfect_crystal_diffraction._geometryType = geometry_type
+
+            sweep = perfect_crystal_diffraction.calculateDiffractionThicknessSweep(energies, directions, thicknesses)
+
+            self.assertEqual(sweep["S"].shape, (4, 7))
+            self.assertEqual(sweep["P"].dtype, numpy.complex128)
+
+            # Every thickness agrees with a calculation for that thickness alone.
+            for index, thickness in enumerate(thicknesses):
+                perfect_crystal_diffraction._thickness = thickness
+                batch = perfect_crystal_diffraction.calculateDiffractionBatch(energies, directions)
+
+                numpy.testing.assert_allclose(sweep["S"][index], batch["S"], rtol=1e-12, atol=1e-300)
+                numpy.testing.assert_allclose(sweep["P"][index], batch["P"], rtol=1e-12, atol=1e-300)
+
+    def testCalculateDiffractionOrientationSweep(self):
+        perfect_crystal_diffraction = generatePerfectCrystalDiffraction()
+        photon_in = generatePhotonIn()
+
+        directions = numpy.array([photon_in.unitDirectionVector().rotateAroundAxis(Vector(0, 1, 0), deviation).components()
+                                  for deviation in numpy.linspace(-50e-6, 50e-6, 7)])
+        energies = numpy.full(7, 3124.0)
+
+        # Rows with the Bragg normal of the crystal agree with the batch calculation.
+        bragg_normal = perfect_crystal_diffraction.braggNormal()
+        tilted_bragg_normal = bragg_normal.rotateAroundAxis(Vector(0, 1, 0), 0.01)
+        bragg_normals = VectorArray.fromVectors([bragg_normal, tilted_bragg_normal] * 3 + [bragg_normal])
+
+        sweep = perfect_crystal_diffraction.calculateDiffractionOrientationSweep(energies, directions, bragg_normals)
+        batch = perfect_crystal_diffraction.calculateDiffractionBatch(energies, directions)
+
+        self.assertEqual(sweep["S"].shape, (7,))
+        numpy.testing.assert_allclose(sweep["S"][::2], batch["S"][::2], rtol=1e-12)
+        numpy.testing.assert_allclose(sweep["P"][::2], batch["P"][::2], rtol=1e-12)
+        self.assertFalse(numpy.allclose(sweep["S"][1::2], batch["S"][1::2]))
+
+    @unittest.skipUnless(use_mpmath, "mpmath reference not available")
+    def testCalculateDiffractionBatchThickCrystal(self):
+        perfect_crystal_diffraction = generatePerfectCrystalDiffraction()
+        photon_in = generatePhotonIn()
+
+        photons = [Photon(3124, photon_in.unitDirectionVector().rotateAroundAxis(Vector(0, 1, 0), deviation))
+                   for deviation in numpy.linspace(-80e-6, 80e-6, 9)]
+
+        energies = numpy.array([photon.energy() for photon in photons])
+        directions = numpy.array([photon.unitDirectionVector().components() for photon in photons])
+
+        # Plain complex exponentials overflow for these thicknesses.
+        for thickness in [1e-3, 1e-2, 1.0]:
+            perfect_crystal_diffraction._thickness = thickness
+
+            for geometry_type in [BraggDiffraction(), LaueDiffraction(), BraggTransmission(), LaueTransmission()]:
+                perfect_crystal_diffraction._geometryType = geometry_type
+
+                batch = perfect_crystal_diffraction.calculateDiffractionBatch(energies, directions)
+
+                self.assertTrue(numpy.all(numpy.isfinite(batch["S"])))
+                self.assertTrue(numpy.all(numpy.isfinite(batch["P"])))
+
+                for index, photon in enumerate(photons):
+                    reference = perfect_crystal_diffraction.calculateDiffraction(photon)
+                    for polarization in ["S", "P"]:
+                        expected = reference[polarization].complexAmplitude()
+                        self.assertLessEqual(abs(batch[polarization][index] - expected),
+                                             1e-9 * abs(expected) + 1e-300)
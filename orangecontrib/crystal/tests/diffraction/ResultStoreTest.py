@@ -0,0 +1,240 @@
+"""
+Unittest for ResultStore class.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+
+from orangecontrib.crystal.diffraction.Diffraction import Diffraction
+from orangecontrib.crystal.diffraction.DiffractionResult import DiffractionResult
+from orangecontrib.crystal.diffraction.DiffractionResultCache import DiffractionResultCache
+from orangecontrib.crystal.diffraction.DiffractionSetupAdaptiveSweeps import DiffractionSetupAdaptiveSweeps
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
+from orangecontrib.crystal.diffraction.ResultStore import ResultStore
+
+
+def diffractionSetup():
+    diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                               "Si",
+                                               thickness=0.0001,
+                                               miller_h=1,
+                                               miller_k=1,
+                                               miller_l=1,
+                                               asymmetry_angle=0.0,
+                                               azimuthal_angle=0.5 * numpy.pi,
+                                               energy_min=8000,
+                                               energy_max=8100,
+                                               energy_points=3,
+                                               angle_deviation_min=-100.0e-6,
+                                               angle_deviation_max=100e-6,
+                                               angle_deviation_points=50)
+    return diffraction_setup
+
+
+def key(index):
+    return "%064x" % index
+
+
+def saveResults(directory, indices):
+    result_store = ResultStore(directory)
+    for index in indices:
+        result_store.save(key(index % 4), {"values": numpy.full(1000, index % 4, dtype=numpy.float64)})
+
+    return len(indices)
+
+
+class ResultStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="ResultStoreTest_")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testConstructor(self):
+        result_store = ResultStore(os.path.join(self.directory, "store"), max_bytes=1000)
+
+        self.assertEqual(result_store.maxBytes(), 1000)
+        self.assertEqual(result_store.size(), 0)
+        self.assertEqual(result_store.usedBytes(), 0)
+
+        # The directory is created on first save.
+        self.assertFalse(os.path.exists(result_store.directory()))
+
+        self.assertRaises(ValueError, ResultStore, self.directory, -1)
+
+    def testSaveLoad(self):
+        result_store = ResultStore(self.directory)
+        arrays = {"amplitudes": numpy.array([1.0 + 2.0j, -3.0j]),
+                  "counts": numpy.array([3, 4])}
+
+        self.assertIsNone(result_store.load(key(1)))
+        result_store.save(key(1), arrays)
+
+        self.assertTrue(result_store.contains(key(1)))
+        self.assertEqual(result_store.size(), 1)
+
+        loaded_arrays = ResultStore(self.directory).load(key(1))
+        self.assertEqual(sorted(loaded_arrays.keys()), ["amplitudes", "counts"])
+        numpy.testing.assert_array_equal(loaded_arrays["amplitudes"], arrays["amplitudes"])
+        numpy.testing.assert_array_equal(loaded_arrays["counts"], arrays["counts"])
+
+        self.assertEqual((result_store.hits(), result_store.misses()), (0, 1))
+
+        result_store.remove(key(1))
+        self.assertFalse(result_store.contains(key(1)))
+
+        self.assertRaises(ValueError, result_store.load, "../outside")
+
+    def testCorruptResult(self):
+        result_store = ResultStore(self.directory)
+        result_store.save(key(1), {"values": numpy.zeros(10)})
+
+        with open(result_store._path(key(1)), "wb") as corrupt_file:
+            corrupt_file.write(b"no npz")
+
+        self.assertIsNone(result_store.load(key(1)))
+        self.assertFalse(result_store.contains(key(1)))
+
+    def testEviction(self):
+        result_store = ResultStore(self.directory)
+
+        for index in range(3):
+            result_store.save(key(index), {"values": numpy.full(1000, float(index))})
+
+        used_bytes = result_store.usedBytes()
+
+        # Use the first result last.
+        past = time.time() - 100
+        for index in range(3):
+            os.utime(result_store._path(key(index)), (past + index, past + index))
+        result_store.load(key(0))
+
+        # Room for three results.
+        result_store.setMaxBytes(used_bytes + used_bytes // 6)
+        result_store.save(key(3), {"values": numpy.full(1000, 3.0)})
+
+        self.assertTrue(result_store.contains(key(0)))
+        self.assertFalse(result_store.contains(key(1)))
+        self.assertTrue(result_store.contains(key(2)))
+        self.assertTrue(result_store.contains(key(3)))
+
+        result_store.clear()
+        self.assertEqual(result_store.size(), 0)
+
+    def testSaveTracksUsedBytes(self):
+        result_store = ResultStore(self.directory)
+
+        scans = []
+        result_files = result_store._resultFiles
+
+        def countingResultFiles():
+            scans.append(1)
+            return result_files()
+
+        result_store._resultFiles = countingResultFiles
+
+        # The directory is scanned on the first save only while the budget holds.
+        for index in range(10):
+            result_store.save(key(index), {"values": numpy.full(1000, float(index))})
+        result_store.save(key(0), {"values": numpy.full(1000, 0.0)})
+
+        self.assertEqual(len(scans), 1)
+        self.assertEqual(result_store._tracked_bytes, result_store.usedBytes())
+
+        # Exceeding the budget scans and evicts.
+        result_store.setMaxBytes(result_store.usedBytes() // 2)
+        result_store.save(key(10), {"values": numpy.full(1000, 10.0)})
+
+        self.assertLessEqual(result_store.usedBytes(), result_store.maxBytes())
+        self.assertEqual(result_store._tracked_bytes, result_store.usedBytes())
+
+    def testConcurrentAccess(self):
+        # Several processes write the same keys concurrently.
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            saved = list(executor.map(saveResults, [self.directory] * 3, [range(20)] * 3))
+
+        self.assertEqual(saved, [20, 20, 20])
+
+        result_store = ResultStore(self.directory)
+        self.assertEqual(result_store.size(), 4)
+        for index in range(4):
+            numpy.testing.assert_array_equal(result_store.load(key(index))["values"], numpy.full(1000, index))
+
+        self.assertEqual([name for _, _, names in os.walk(self.directory) for name in names
+                          if name.startswith(ResultStore.TEMPORARY_PREFIX)], [])
+
+    def testCalculateDiffraction(self):
+        result_store = ResultStore(self.directory)
+
+        diffraction = Diffraction()
+        diffraction.setResultStore(result_store)
+        self.assertIs(diffraction.resultStore(), result_store)
+
+        result = diffraction.calculateDiffraction(diffractionSetup())
+        self.assertEqual(result_store.size(), 1)
+
+        # A new session loads the result instead of calculating it.
+        diffraction = Diffraction()
+        diffraction.setResultStore(ResultStore(self.directory))
+        diffraction.setResultCache(DiffractionResultCache())
+        loaded_result = diffraction.calculateDiffraction(diffractionSetup())
+
+        self.assertEqual(diffraction.resultStore().hits(), 1)
+        self.assertIs(diffraction.calculateDiffraction(diffractionSetup()), loaded_result)
+        self.assertEqual(loaded_result.contentDigest(), result.contentDigest())
+        self.assertTrue(loaded_result.diffractionSetup() == result.diffractionSetup())
+        numpy.testing.assert_array_equal(loaded_result.sPhaseByEnergy(8050), result.sPhaseByEnergy(8050))
+
+    def testCalculateDiffractionAdaptive(self):
+        diffraction_setup = DiffractionSetupAdaptiveSweeps(BraggDiffraction(), "Si", 0.0001, 1, 1, 1,
+                                                           0.0, 0.5 * numpy.pi, 8000, 8000, 1,
+                                                           -100.0e-6, 100e-6, 21, 200)
+
+        diffraction = Diffraction()
+        diffraction.setResultStore(ResultStore(self.directory))
+
+        result = diffraction.calculateDiffraction(diffraction_setup)
+        loaded_result = diffraction.calculateDiffraction(diffraction_setup)
+
+        # The refined, non-uniform deviation axes are restored.
+        self.assertGreater(len(loaded_result.angleDeviationsByEnergy(8000)), 21)
+        numpy.testing.assert_array_equal(loaded_result.angleDeviationsByEnergy(8000),
+                                         result.angleDeviationsByEnergy(8000))
+        numpy.testing.assert_array_equal(loaded_result.sIntensityByEnergy(8000), result.sIntensityByEnergy(8000))
+
+    def testCalculateDiffractionStaleFormat(self):
+        result_store = ResultStore(self.directory)
+
+        diffraction = Diffraction()
+        diffraction.setResultStore(result_store)
+        result = diffraction.calculateDiffraction(diffractionSetup())
+
+        # Replace the stored result by one of another format version.
+        store_key = diffraction._resultStoreKey(diffraction._resultCacheKey(diffractionSetup()))
+        arrays = result_store.load(store_key)
+        arrays["format_version"] = numpy.array(DiffractionResult.ARRAYS_FORMAT_VERSION + 1)
+        result_store.save(store_key, arrays)
+
+        # It is recalculated and overwritten.
+        diffraction = Diffraction()
+        diffraction.setResultStore(result_store)
+        recalculated_result = diffraction.calculateDiffraction(diffractionSetup())
+
+        self.assertEqual(recalculated_result.contentDigest(), result.contentDigest())
+        self.assertEqual(int(result_store.load(store_key)["format_version"]), DiffractionResult.ARRAYS_FORMAT_VERSION)
+
+        # Keys differ between versions of the calculation.
+        store_version = Diffraction.RESULT_STORE_VERSION
+        try:
+            Diffraction.RESULT_STORE_VERSION = store_version + 1
+            self.assertNotEqual(diffraction._resultStoreKey(diffraction._resultCacheKey(diffractionSetup())),
+                                store_key)
+        finally:
+            Diffraction.RESULT_STORE_VERSION = store_version
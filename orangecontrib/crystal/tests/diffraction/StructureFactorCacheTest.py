@@ -0,0 +1,67 @@
+"""
+Unittest for StructureFactorCache class.
+"""
+
+import unittest
+
+import xraylib
+
+from orangecontrib.crystal.diffraction.StructureFactorCache import StructureFactorCache
+
+
+class StructureFactorCacheTest(unittest.TestCase):
+    def testConstructor(self):
+        cache = StructureFactorCache(max_size=10)
+
+        self.assertIsInstance(cache, StructureFactorCache)
+        self.assertEqual(cache.maxSize(), 10)
+        self.assertEqual(cache.size(), 0)
+        self.assertEqual(cache.hits(), 0)
+        self.assertEqual(cache.misses(), 0)
+
+    def testStructureFactor(self):
+        cache = StructureFactorCache(max_size=10)
+        crystal = xraylib.Crystal_GetCrystal("Si")
+
+        structure_factor = cache.structureFactor("Si", crystal, 8000, 1, 1, 1, 1.0)
+        self.assertEqual(structure_factor,
+                         xraylib.Crystal_F_H_StructureFactor(crystal, 8.0, 1, 1, 1, 1.0, 1.0))
+        self.assertEqual(cache.misses(), 1)
+        self.assertEqual(cache.hits(), 0)
+
+        self.assertEqual(cache.structureFactor("Si", crystal, 8000, 1, 1, 1, 1.0),
+                         structure_factor)
+        self.assertEqual(cache.misses(), 1)
+        self.assertEqual(cache.hits(), 1)
+
+        # Different Miller indices, energies and Debye-Waller factors are different entries.
+        cache.structureFactor("Si", crystal, 8000, -1, -1, -1, 1.0)
+        cache.structureFactor("Si", crystal, 8001, 1, 1, 1, 1.0)
+        cache.structureFactor("Si", crystal, 8000, 1, 1, 1, 0.9)
+        self.assertEqual(cache.misses(), 4)
+        self.assertEqual(cache.size(), 4)
+
+    def testEviction(self):
+        cache = StructureFactorCache(max_size=2)
+        crystal = xraylib.Crystal_GetCrystal("Si")
+
+        cache.structureFactor("Si", crystal, 8000, 1, 1, 1, 1.0)
+        cache.structureFactor("Si", crystal, 8001, 1, 1, 1, 1.0)
+
+        # Use the first entry. The second one is now least recently used.
+        cache.structureFactor("Si", crystal, 8000, 1, 1, 1, 1.0)
+        cache.structureFactor("Si", crystal, 8002, 1, 1, 1, 1.0)
+        self.assertEqual(cache.size(), 2)
+
+        cache.resetStatistics()
+        cache.structureFactor("Si", crystal, 8000, 1, 1, 1, 1.0)
+        self.assertEqual(cache.hits(), 1)
+        cache.structureFactor("Si", crystal, 8001, 1, 1, 1, 1.0)
+        self.assertEqual(cache.misses(), 1)
+
+        cache.setMaxSize(1)
+        self.assertEqual(cache.size(), 1)
+
+        cache.clear()
+        self.assertEqual(cache.size(), 0)
+        self.assertEqual(cache.hits(), 0)
@@ -0,0 +1,92 @@
+"""
+Unittest for SusceptibilityTable class.
+"""
+
+import unittest
+
+import numpy
+import xraylib
+
+from orangecontrib.crystal.diffraction.Diffraction import Diffraction
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
+from orangecontrib.crystal.diffraction.SusceptibilityTable import SusceptibilityTable
+from orangecontrib.crystal.util.Photon import Photon
+from orangecontrib.crystal.util.Vector import Vector
+
+
+def diffractionSetup():
+    diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                               "Si",
+                                               thickness=100 * 1e-6,
+                                               miller_h=1,
+                                               miller_k=1,
+                                               miller_l=1,
+                                               asymmetry_angle=0.0,
+                                               azimuthal_angle=0.5 * numpy.pi,
+                                               energy_min=8000,
+                                               energy_max=8000,
+                                               energy_points=1,
+                                               angle_deviation_min=-100.0e-6,
+                                               angle_deviation_max=100e-6,
+                                               angle_deviation_points=3)
+    return diffraction_setup
+
+
+class SusceptibilityTableTest(unittest.TestCase):
+    def testConstructor(self):
+        table = SusceptibilityTable(diffractionSetup(), 8000, 9000, tolerance=1e-4)
+
+        self.assertIsInstance(table, SusceptibilityTable)
+        self.assertEqual(table.tolerance(), 1e-4)
+        self.assertEqual(table.energies()[0], 8000)
+        self.assertEqual(table.energies()[-1], 9000)
+
+    def testErrorBound(self):
+        diffraction_setup = diffractionSetup()
+
+        # Range around the Si K-edge.
+        for tolerance in [1e-3, 1e-4]:
+            table = SusceptibilityTable(diffraction_setup, 1700, 2300, tolerance=tolerance)
+
+            energies = numpy.linspace(1700, 2300, 2001)
+            F_0, F_H, F_H_bar = table.structureFactors(energies)
+
+            exact_F_0 = numpy.array([diffraction_setup.F0(energy) for energy in energies])
+            exact_F_H = numpy.array([diffraction_setup.FH(energy) for energy in energies])
+
+            self.assertLessEqual(numpy.max(numpy.abs(F_0 - exact_F_0) / numpy.abs(exact_F_0)), tolerance)
+
+            # F_H vanishes below the Bragg cutoff. Interpolation must not widen this region.
+            self.assertTrue(numpy.all(numpy.isnan(F_H) == numpy.isnan(exact_F_H)))
+            valid = numpy.logical_not(numpy.isnan(exact_F_H))
+            self.assertLessEqual(numpy.max(numpy.abs(F_H - exact_F_H)[valid] / numpy.abs(exact_F_H[valid])),
+                                 tolerance)
+
+    def testEdgeRefinement(self):
+        table = SusceptibilityTable(diffractionSetup(), 1700, 2300, tolerance=1e-4)
+
+        edge = xraylib.EdgeEnergy(14, xraylib.K_SHELL) * 1000.0
+        spacings = numpy.diff(table.energies())
+        spacing_at_edge = spacings[numpy.searchsorted(table.energies(), edge) - 1]
+
+        self.assertLessEqual(spacing_at_edge, 0.01)
+        self.assertGreater(spacings.max(), 1.0)
+
+    def testPsi(self):
+        diffraction_setup = diffractionSetup()
+        table = SusceptibilityTable(diffraction_setup, 8000, 9000, tolerance=1e-6)
+
+        diffraction = Diffraction()
+        unitcell_volume = diffraction_setup.unitcellVolume() * 10 ** -30
+
+        energies = numpy.array([8000.0, 8333.3, 9000.0])
+        psi_0, psi_H, psi_H_bar = table.psi(energies)
+
+        for index, energy in enumerate(energies):
+            photon_in = Photon(energy, Vector(0, 0, -1))
+            for psi, structure_factor in [(psi_0, diffraction_setup.F0(energy)),
+                                          (psi_H, diffraction_setup.FH(energy)),
+                                          (psi_H_bar, diffraction_setup.FH_bar(energy))]:
+                expected = diffraction._calculatePsiFromStructureFactor(unitcell_volume, photon_in, structure_factor)
+                self.assertLessEqual(abs(psi[index] - expected), 1e-6 * abs(expected))
@@ -0,0 +1,106 @@
+"""
+Unittest for MuellerDiffraction class.
+"""
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from orangecontrib.crystal.diffraction.Diffraction import Diffraction
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
+from orangecontrib.crystal.diffraction.ResultStore import ResultStore
+from orangecontrib.crystal.polarization.MuellerDiffraction import MuellerDiffraction
+from orangecontrib.crystal.polarization.MuellerResult import MuellerResult
+from orangecontrib.crystal.polarization.StokesVector import StokesVector
+
+
+def _calculate_diffraction_result():
+    diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                               "Si",
+                                               thickness=0.0001,
+                                               miller_h=1,
+                                               miller_k=1,
+                                               miller_l=1,
+                                               asymmetry_angle=0.0,
+                                               azimuthal_angle=0.5 * np.pi,
+                                               energy_min=8000,
+                                               energy_max=8100,
+                                               energy_points=3,
+                                               angle_deviation_min=-100.0e-6,
+                                               angle_deviation_max=100e-6,
+                                               angle_deviation_points=20)
+    return Diffraction().calculateDiffraction(diffraction_setup)
+
+
+class MuellerDiffractionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="MuellerDiffractionTest_")
+        self.diffraction_result = _calculate_diffraction_result()
+        self.incoming_stokes_vector = StokesVector([1.0, 0.0, 1.0, 0.0])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_result_store(self):
+        result_store = ResultStore(self.directory)
+
+        mueller_result = MuellerDiffraction(self.diffraction_result,
+                                            self.incoming_stokes_vector,
+                                            np.pi / 4,
+                                            result_store).calculate_stokes()
+        self.assertEqual(result_store.size(), 1)
+
+        stored_result = MuellerDiffraction(_calculate_diffraction_result(),
+                                           self.incoming_stokes_vector,
+                                           np.pi / 4,
+                                           result_store).calculate_stokes()
+        self.assertEqual(result_store.hits(), 1)
+
+        for energy in self.diffraction_result.energies():
+            np.testing.assert_array_equal(stored_result.s3_by_energy(energy), mueller_result.s3_by_energy(energy))
+            np.testing.assert_array_equal(stored_result.polarization_degree_by_energy(energy),
+                                          mueller_result.polarization_degree_by_energy(energy))
+
+        # Other incoming Stokes vectors and inclination angles are calculated.
+        MuellerDiffraction(self.diffraction_result, StokesVector([1.0, 1.0, 0.0, 0.0]), np.pi / 4,
+                           result_store).calculate_stokes()
+        MuellerDiffraction(self.diffraction_result, self.incoming_stokes_vector, 0.0,
+                           result_store).calculate_stokes()
+        self.assertEqual(result_store.size(), 3)
+
+    def test_result_store_stale_format(self):
+        result_store = ResultStore(self.directory)
+        mueller_diffraction = MuellerDiffraction(self.diffraction_result,
+                                                 self.incoming_stokes_vector,
+                                                 np.pi / 4,
+                                                 result_store)
+        mueller_result = mueller_diffraction.calculate_stokes()
+
+        key = mueller_diffraction._result_store_key()
+        arrays = result_store.load(key)
+
+        # Stored arrays of another format version or truncated ones are recalculated and overwritten.
+        for stale_arrays in [dict(arrays, format_version=np.array(MuellerResult.ARRAYS_FORMAT_VERSION + 1)),
+                             dict(arrays, s3=arrays["s3"][:, :10]),
+                             dict((name, array) for name, array in arrays.items() if name != "s1")]:
+            result_store.save(key, stale_arrays)
+
+            recalculated_result = mueller_diffraction.calculate_stokes()
+
+            for energy in self.diffraction_result.energies():
+                np.testing.assert_array_equal(recalculated_result.s3_by_energy(energy),
+                                              mueller_result.s3_by_energy(energy))
+            self.assertEqual(int(result_store.load(key)["format_version"]), MuellerResult.ARRAYS_FORMAT_VERSION)
+
+    def test_calculate_stokes(self):
+        mueller_result = MuellerDiffraction(self.diffraction_result,
+                                            self.incoming_stokes_vector,
+                                            np.pi / 4).calculate_stokes()
+
+        for energy in self.diffraction_result.energies():
+            s0 = mueller_result.s0_by_energy(energy)
+            self.assertEqual(len(s0), 20)
+            self.assertTrue(np.all(s0 >= 0.0))
+            self.assertTrue(np.all(s0 <= 1.0 + 1e-12))
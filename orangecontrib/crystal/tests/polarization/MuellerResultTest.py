@@ -0,0 +1,65 @@
+"""
+Unittest for MuellerResult class.
+"""
+import unittest
+
+import numpy as np
+
+from orangecontrib.crystal.diffraction.DiffractionResult import DiffractionResult
+from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
+from orangecontrib.crystal.diffraction.GeometryType import BraggDiffraction
+from orangecontrib.crystal.polarization.MuellerResult import MuellerResult
+from orangecontrib.crystal.polarization.StokesVector import StokesVector
+
+
+def _generate_diffraction_result():
+    diffraction_setup = DiffractionSetupSweeps(BraggDiffraction(),
+                                               "Si",
+                                               thickness=0.0001,
+                                               miller_h=1,
+                                               miller_k=1,
+                                               miller_l=1,
+                                               asymmetry_angle=0.0,
+                                               azimuthal_angle=0.5 * np.pi,
+                                               energy_min=8000,
+                                               energy_max=8100,
+                                               energy_points=3,
+                                               angle_deviation_min=-100.0e-6,
+                                               angle_deviation_max=100e-6,
+                                               angle_deviation_points=4)
+    return DiffractionResult(diffraction_setup, 0.3)
+
+
+class MuellerResultTest(unittest.TestCase):
+    def setUp(self):
+        self.diffraction_result = _generate_diffraction_result()
+
+    def test_set_stokes_by_energy(self):
+        point_wise = MuellerResult(self.diffraction_result)
+        bulk = MuellerResult(self.diffraction_result)
+
+        deviations = self.diffraction_result.angleDeviationsByEnergy(8050)
+        s0 = np.array([1.0, 2.0, 4.0, 8.0])
+        s1 = np.array([0.1, 0.2, 0.3, 0.4])
+        s2 = np.array([0.5, 0.6, 0.7, 0.8])
+        s3 = np.array([0.5, 1.0, 1.0, 2.0])
+
+        for index, deviation in enumerate(deviations):
+            point_wise.add(8050, deviation, StokesVector([s0[index], s1[index], s2[index], s3[index]]))
+
+        bulk.set_stokes_by_energy(8050, s0, s1, s2, s3)
+
+        for mueller_result in (point_wise, bulk):
+            np.testing.assert_array_equal(mueller_result.s0_by_energy(8050), s0)
+            np.testing.assert_array_equal(mueller_result.s1_by_energy(8050), s1)
+            np.testing.assert_array_equal(mueller_result.s2_by_energy(8050), s2)
+            np.testing.assert_array_equal(mueller_result.s3_by_energy(8050), s3)
+            np.testing.assert_array_equal(mueller_result.polarization_degree_by_energy(8050), [0.5, 0.5, 0.25, 0.25])
+            np.testing.assert_array_equal(mueller_result.s0_by_energy(8000), np.zeros(4))
+
+    def test_energy_index(self):
+        mueller_result = MuellerResult(self.diffraction_result)
+
+        self.assertEqual(mueller_result._energy_index(8050), 1)
+        self.assertEqual(mueller_result._energy_index(8049), 1)
+        self.assertEqual(mueller_result._energy_index(9000), 2)
@@ -0,0 +1,57 @@
+"""
+Unittest for PhotonBundle class.
+"""
+
+import unittest
+
+import numpy as np
+
+from orangecontrib.crystal.util.Photon import Photon
+from orangecontrib.crystal.util.PhotonBundle import PhotonBundle
+from orangecontrib.crystal.util.Vector import Vector
+
+
+def photonBundle():
+    energies = np.array([3, 4, 8, 5000, 10000])
+    directions = np.array([[0, 0, 1],
+                           [0, 2, 0],
+                           [1, 1, 0],
+                           [0, 1, -1],
+                           [3, 0, 4]])
+    return PhotonBundle(energies, directions)
+
+
+class PhotonBundleTest(unittest.TestCase):
+    def testConstructor(self):
+        photon_bundle = photonBundle()
+
+        self.assertIsInstance(photon_bundle, PhotonBundle)
+        self.assertEqual(len(photon_bundle), 5)
+        self.assertEqual(photon_bundle.energies().dtype, np.float64)
+        np.testing.assert_array_almost_equal(np.linalg.norm(photon_bundle.unitDirections(), axis=1), np.ones(5))
+        np.testing.assert_array_almost_equal(photon_bundle.unitDirections()[4], [0.6, 0.0, 0.8])
+
+        self.assertRaises(ValueError, PhotonBundle, [1.0, 2.0], [[0, 0, 1]])
+
+    def testAgreesWithPhoton(self):
+        photon_bundle = photonBundle()
+
+        wavelengths = photon_bundle.wavelength()
+        wavenumbers = photon_bundle.wavenumber()
+        wavevectors = photon_bundle.wavevector()
+
+        for index, photon in enumerate(photon_bundle):
+            self.assertIsInstance(photon, Photon)
+            self.assertEqual(photon.energy(), photon_bundle.energies()[index])
+            self.assertAlmostEqual(wavelengths[index] / photon.wavelength(), 1.0)
+            self.assertAlmostEqual(wavenumbers[index] / photon.wavenumber(), 1.0)
+            np.testing.assert_array_almost_equal(wavevectors[index] / photon.wavenumber(),
+                                                 photon.wavevector().components() / photon.wavenumber())
+
+    def testFromPhotons(self):
+        photons = [Photon(8000, Vector(0, 1, -1)), Photon(9000, Vector(0, 0, -1))]
+        photon_bundle = PhotonBundle.fromPhotons(photons)
+
+        self.assertEqual(len(photon_bundle), 2)
+        self.assertTrue(photon_bundle.photon(0) == photons[0])
+        self.assertTrue(photon_bundle.photon(1) == photons[1])
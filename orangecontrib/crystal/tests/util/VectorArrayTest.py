@@ -0,0 +1,87 @@
+"""
+Unittest for VectorArray class.
+"""
+
+import unittest
+
+import numpy as np
+
+from orangecontrib.crystal.util.Vector import Vector
+from orangecontrib.crystal.util.VectorArray import VectorArray
+
+
+def vectors():
+    return [Vector(1, 2, 3),
+            Vector(-3.0, -4.0, 0.0),
+            Vector(0, 0, 1),
+            Vector(0.5, -7.0, 2.5)]
+
+
+class VectorArrayTest(unittest.TestCase):
+    def testConstructor(self):
+        vector_array = VectorArray.fromVectors(vectors())
+
+        self.assertIsInstance(vector_array, VectorArray)
+        self.assertEqual(len(vector_array), 4)
+        self.assertEqual(vector_array.vector(1), Vector(-3.0, -4.0, 0.0))
+
+        self.assertRaises(ValueError, VectorArray, [1, 2, 3])
+        self.assertRaises(ValueError, VectorArray, [[1, 2]])
+
+    def testOperatorEqual(self):
+        vector_array = VectorArray.fromVectors(vectors())
+
+        self.assertTrue(vector_array == VectorArray.fromVectors(vectors()))
+        self.assertTrue(vector_array != VectorArray.fromVectors(vectors()[::-1]))
+        self.assertTrue(VectorArray([[0, 0, 1], [0, 0, 1]]) == Vector(0, 0, 1))
+
+    def testAgreesWithVector(self):
+        vector_list = vectors()
+        vector_array = VectorArray.fromVectors(vector_list)
+        axis = Vector(1, -1, 2)
+        factors = VectorArray.fromVectors(vector_list[::-1])
+
+        sums = vector_array.addVector(axis)
+        differences = vector_array.subtractVector(factors)
+        cross_products = vector_array.crossProduct(factors)
+        scalar_products = vector_array.scalarProduct(factors)
+        normalized = vector_array.getNormalizedVector()
+        rotated = vector_array.rotateAroundAxis(axis, 0.3)
+        parallel = vector_array.parallelTo(axis)
+        perpendicular = vector_array.perpendicularTo(factors)
+        angles = vector_array.angle(axis)
+
+        for index, vector in enumerate(vector_list):
+            factor = factors.vector(index)
+
+            self.assertEqual(sums.vector(index), vector.addVector(axis))
+            self.assertEqual(differences.vector(index), vector.subtractVector(factor))
+            self.assertEqual(cross_products.vector(index), vector.crossProduct(factor))
+            self.assertAlmostEqual(scalar_products[index], vector.scalarProduct(factor))
+            self.assertAlmostEqual(vector_array.norm()[index], vector.norm())
+            self.assertEqual(normalized.vector(index), vector.getNormalizedVector())
+            self.assertEqual(rotated.vector(index), vector.rotateAroundAxis(axis, 0.3))
+            self.assertEqual(parallel.vector(index), vector.parallelTo(axis))
+            self.assertEqual(perpendicular.vector(index), vector.perpendicularTo(factor))
+            self.assertAlmostEqual(angles[index], vector.angle(axis))
+
+    def testRotateAroundAxis(self):
+        vector_array = VectorArray([[1, 0, 0], [1, 0, 0], [0, 1, 0]])
+
+        # One angle and one axis per vector.
+        rotated = vector_array.rotateAroundAxis(VectorArray([[0, 0, 1], [0, 0, 2], [1, 0, 0]]),
+                                                np.array([0.5 * np.pi, np.pi, 0.5 * np.pi]))
+
+        self.assertTrue(rotated == VectorArray([[0, 1, 0], [-1, 0, 0], [0, 0, 1]]))
+
+    def testScalarMultiplication(self):
+        vector_array = VectorArray([[1, 0, 0], [0, 2, 0]])
+
+        self.assertTrue(vector_array.scalarMultiplication(2.0) == VectorArray([[2, 0, 0], [0, 4, 0]]))
+        self.assertTrue(vector_array.scalarMultiplication([3.0, -1.0]) == VectorArray([[3, 0, 0], [0, -2, 0]]))
+
+    def testAngle(self):
+        vector_array = VectorArray([[0, 0, 1], [0, 0, -1], [1, 1, 0]])
+
+        np.testing.assert_array_almost_equal(vector_array.angle(Vector(0, 0, 3)),
+                                             [0.0, np.pi, 0.5 * np.pi])
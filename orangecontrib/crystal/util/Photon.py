@@ -2,8 +2,16 @@
 Represents a photon.
 Except for energy all units are in SI. Energy is in eV.
 """
+from math import pi
+
 import scipy.constants.codata
 
+# Physical constants are resolved once per process.
+_codata = scipy.constants.codata.physical_constants
+SPEED_OF_LIGHT = _codata["speed of light in vacuum"][0]
+PLANCK_CONSTANT = _codata["Planck constant"][0]
+ELEMENTARY_CHARGE = _codata["elementary charge"][0]
+
 
 class Photon(object):
 
@@ -26,14 +34,10 @@ class Photon(object):
         """
         :return: The photon wavelength in meter.
         """
-        codata = scipy.constants.codata.physical_constants
-        speed_of_light = codata["speed of light in vacuum"][0]
-        planck_constant = codata["Planck constant"][0]
-        elementary_charge = codata["elementary charge"][0]
-        E_in_Joule = self.energy() * elementary_charge
+        E_in_Joule = self.energy() * ELEMENTARY_CHARGE
 
         # Wavelength in meter
-        wavelength = (speed_of_light * planck_constant / E_in_Joule)
+        wavelength = (SPEED_OF_LIGHT * PLANCK_CONSTANT / E_in_Joule)
 
         return wavelength
 
@@ -41,7 +45,7 @@ class Photon(object):
         """
         :return: Wavenumber in m^-1.
         """
-        return (2.0 * scipy.constants.codata.pi) / self.wavelength()
+        return (2.0 * pi) / self.wavelength()
 
     def wavevector(self):
         """
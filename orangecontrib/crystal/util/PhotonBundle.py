@@ -0,0 +1,88 @@
+"""
+Represents a bundle of photons as contiguous arrays (struct of arrays).
+Complements Photon for beams of many photons, e.g. from a ray tracer.
+Except for energy all units are in SI. Energy is in eV.
+"""
+import numpy as np
+
+from orangecontrib.crystal.util.Photon import Photon, SPEED_OF_LIGHT, PLANCK_CONSTANT, ELEMENTARY_CHARGE
+from orangecontrib.crystal.util.Vector import Vector
+
+
+class PhotonBundle(object):
+
+    def __init__(self, energies_in_ev, directions):
+        """
+        Constructor.
+        :param energies_in_ev: Array of N photon energies in eV.
+        :param directions: Array of shape (N, 3) holding the photon directions. They are normalized.
+        """
+        self._energies_in_ev = np.ascontiguousarray(energies_in_ev, dtype=np.float64).reshape(-1)
+
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+        self._unit_directions = np.ascontiguousarray(directions / np.linalg.norm(directions, axis=1)[:, np.newaxis])
+
+        if self._energies_in_ev.shape[0] != self._unit_directions.shape[0]:
+            raise ValueError("Number of energies and directions differ.")
+
+    @staticmethod
+    def fromPhotons(photons):
+        """
+        Creates a bundle from a list of photons.
+        :param photons: List of Photon.
+        :return: PhotonBundle holding the photons.
+        """
+        energies = np.array([photon.energy() for photon in photons])
+        directions = np.array([photon.unitDirectionVector().components() for photon in photons]).reshape(-1, 3)
+        return PhotonBundle(energies, directions)
+
+    def __len__(self):
+        """
+        :return: Number of photons in the bundle.
+        """
+        return self._energies_in_ev.shape[0]
+
+    def __iter__(self):
+        """
+        Iterates the photons of the bundle as Photon instances.
+        """
+        for index in range(len(self)):
+            yield self.photon(index)
+
+    def photon(self, index):
+        """
+        Returns one photon of the bundle.
+        :param index: Index of the photon.
+        :return: Photon at the index.
+        """
+        return Photon(self._energies_in_ev[index], Vector.fromComponents(self._unit_directions[index]))
+
+    def energies(self):
+        """
+        :return: Array of energies in eV.
+        """
+        return self._energies_in_ev
+
+    def unitDirections(self):
+        """
+        :return: Array of shape (N, 3) holding the unit directions.
+        """
+        return self._unit_directions
+
+    def wavelength(self):
+        """
+        :return: Array of wavelengths in meter.
+        """
+        return SPEED_OF_LIGHT * PLANCK_CONSTANT / (self._energies_in_ev * ELEMENTARY_CHARGE)
+
+    def wavenumber(self):
+        """
+        :return: Array of wavenumbers in m^-1.
+        """
+        return (2.0 * np.pi) / self.wavelength()
+
+    def wavevector(self):
+        """
+        :return: Array of shape (N, 3) holding the wavevectors in m^-1.
+        """
+        return self._unit_directions * self.wavenumber()[:, np.newaxis]
@@ -0,0 +1,217 @@
+"""
+Represents an array of 3d vectors.
+Array version of Vector: the components are stored as one (N, 3) array and all operations act on the whole batch.
+Wherever a vector is expected a single Vector can be given instead of a VectorArray. It is broadcast to all rows.
+"""
+import numpy as np
+
+from orangecontrib.crystal.util.Vector import Vector
+
+
+class VectorArray(object):
+    def __init__(self, components):
+        """
+        Constructor.
+        :param components: Array of shape (N, 3) holding the x,y,z components of the vectors.
+        """
+        self.setComponents(components)
+
+    @staticmethod
+    def fromVectors(vectors):
+        """
+        Creates a vector array from a list of vectors.
+        :param vectors: List of Vector.
+        :return: VectorArray holding these vectors.
+        """
+        return VectorArray([vector.components() for vector in vectors])
+
+    @staticmethod
+    def _componentsOf(operand):
+        """
+        Returns the components of a Vector or VectorArray in a shape that broadcasts against (N, 3).
+        :param operand: Vector or VectorArray.
+        :return: Array of shape (1, 3) for a Vector or (N, 3) for a VectorArray.
+        """
+        if isinstance(operand, Vector):
+            return operand.components().reshape(1, 3)
+
+        return operand.components()
+
+    @staticmethod
+    def _asColumn(values):
+        """
+        Returns a scalar or an array of shape (N,) in a shape that broadcasts against (N, 3).
+        :param values: Scalar or array of shape (N,).
+        :return: Scalar or array of shape (N, 1).
+        """
+        values = np.asarray(values, dtype=np.float64)
+
+        if values.ndim == 0:
+            return values
+
+        return values.reshape(-1, 1)
+
+    def setComponents(self, components):
+        """
+        Sets the vector components.
+        :param components: Array of shape (N, 3) holding the x,y,z components of the vectors.
+        """
+        components = np.ascontiguousarray(components, dtype=np.float64)
+
+        if components.ndim != 2 or components.shape[1] != 3:
+            raise ValueError("Components must have shape (N, 3), got %s." % str(components.shape))
+
+        self._components = components
+
+    def components(self):
+        """
+        Returns the components of the vectors as (N, 3) array.
+        :return: Components of the vectors.
+        """
+        return self._components
+
+    def __len__(self):
+        """
+        Returns the number of vectors.
+        :return: Number of vectors.
+        """
+        return self._components.shape[0]
+
+    def vector(self, index):
+        """
+        Returns the vector at the given index.
+        :param index: Index of the vector.
+        :return: Vector at the index.
+        """
+        return Vector.fromComponents(self._components[index])
+
+    def __eq__(self, candidate):
+        """
+        Determines if two vector arrays are equal.
+        :param candidate: VectorArray or Vector to compare to.
+        :return: True if all vectors are equal. Otherwise False.
+        """
+        difference = self._components - VectorArray._componentsOf(candidate)
+        return bool(np.all(np.sqrt(np.einsum("ij,ij->i", difference, difference)) < 1.e-7))
+
+    def __ne__(self, candidate):
+        """
+        Determines if two vector arrays are not equal.
+        :param candidate: VectorArray or Vector to compare to.
+        :return: True if the vector arrays are not equal. Otherwise False.
+        """
+        return not (self == candidate)
+
+    def addVector(self, summand):
+        """
+        Adds vectors row by row.
+        :param summand: VectorArray or Vector to add.
+        :return: The sums as vector array.
+        """
+        return VectorArray(self._components + VectorArray._componentsOf(summand))
+
+    def scalarMultiplication(self, factor):
+        """
+        Scalar multiplies the vectors.
+        :param factor: Scalar or array of shape (N,) with one factor per vector.
+        :return: Scalar multiplied vector array.
+        """
+        return VectorArray(self._components * VectorArray._asColumn(factor))
+
+    def subtractVector(self, subtrahend):
+        """
+        Subtracts vectors row by row.
+        :param subtrahend: VectorArray or Vector to subtract.
+        :return: The differences as vector array.
+        """
+        return VectorArray(self._components - VectorArray._componentsOf(subtrahend))
+
+    def scalarProduct(self, factor):
+        """
+        Calculates the scalar products row by row.
+        :param factor: VectorArray or Vector to calculate the scalar products with.
+        :return: Array of shape (N,) holding the scalar products.
+        """
+        factor_components = VectorArray._componentsOf(factor)
+
+        if factor_components.shape[0] == 1:
+            return self._components.dot(factor_components[0])
+
+        return np.einsum("ij,ij->i", self._components, factor_components)
+
+    def crossProduct(self, factor):
+        """
+        Calculates the cross products row by row.
+        :param factor: VectorArray or Vector to form the cross products with.
+        :return: Cross products as vector array.
+        """
+        return VectorArray(np.cross(self._components, VectorArray._componentsOf(factor)))
+
+    def norm(self):
+        """
+        Returns the standard norms of the vectors.
+        :return: Array of shape (N,) holding the norms.
+        """
+        return np.sqrt(np.einsum("ij,ij->i", self._components, self._components))
+
+    def getNormalizedVector(self):
+        """
+        Returns the normalized vectors.
+        :return: Vector array of the normalized vectors.
+        """
+        return self.scalarMultiplication(1.0 / self.norm())
+
+    def rotateAroundAxis(self, rotation_axis, angle):
+        """
+        Rotates the vectors around axes.
+        :param rotation_axis: VectorArray or Vector specifying the rotation axes.
+        :param angle: Rotation angle as scalar or array of shape (N,).
+        :return: Rotated vector array.
+        """
+        # Rodrigues rotation formula, see Vector.rotateAroundAxis.
+        if isinstance(rotation_axis, Vector):
+            unit_rotation_axis = VectorArray(rotation_axis.getNormalizedVector().components().reshape(1, 3))
+        else:
+            unit_rotation_axis = rotation_axis.getNormalizedVector()
+
+        cos_angle = VectorArray._asColumn(np.cos(angle))
+        sin_angle = VectorArray._asColumn(np.sin(angle))
+        axis_components = unit_rotation_axis.components()
+
+        rotated = self._components * cos_angle
+        rotated = rotated + np.cross(axis_components, self._components) * sin_angle
+        rotated = rotated + axis_components * (VectorArray._asColumn(self.scalarProduct(unit_rotation_axis))
+                                               * (1.0 - cos_angle))
+
+        return VectorArray(rotated)
+
+    def parallelTo(self, vector):
+        """
+        Returns the parallel projections of the vectors along the given vectors.
+        :param vector: VectorArray or Vector defining the parallel directions.
+        :return: Parallel projections as vector array.
+        """
+        unit_direction = vector.getNormalizedVector()
+        projection_in_direction = self.scalarProduct(unit_direction)
+
+        return VectorArray(VectorArray._componentsOf(unit_direction) *
+                           VectorArray._asColumn(projection_in_direction))
+
+    def perpendicularTo(self, vector):
+        """
+        Returns the projections perpendicular to the given vectors.
+        :param vector: VectorArray or Vector that defines the directions.
+        :return: Perpendicular projections as vector array.
+        """
+        return self.subtractVector(self.parallelTo(vector))
+
+    def angle(self, factor):
+        """
+        Returns the angles between the vectors and the given vectors.
+        :param factor: VectorArray or Vector to determine the angles with.
+        :return: Array of shape (N,) holding the angles in [0, pi].
+        """
+        cos_angle = self.getNormalizedVector().scalarProduct(factor.getNormalizedVector())
+
+        # Rounding can push the cosine of (anti)parallel vectors slightly out of [-1, 1].
+        return np.arccos(np.clip(cos_angle, -1.0, 1.0))
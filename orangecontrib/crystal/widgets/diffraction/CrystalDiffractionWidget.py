@@ -18,6 +18,8 @@ from orangecontrib.crystal.diffraction.GeometryType import GeometryType
 from orangecontrib.crystal.diffraction.DiffractionExceptions import DiffractionException
 from orangecontrib.crystal.diffraction.DiffractionSetupSweeps import DiffractionSetupSweeps
 from orangecontrib.crystal.diffraction.Diffraction import Diffraction
+from orangecontrib.crystal.diffraction.DiffractionResultCache import diffraction_result_cache
+from orangecontrib.crystal.diffraction.ResultStore import result_store
 
 from orangecontrib.crystal.plotting.PlotGenerator import PlotGenerator
 from orangecontrib.crystal.plotting.DiffractionResultPlotGenerator import DiffractionResultPlotGenerator
@@ -163,17 +165,20 @@ class CrystalDiffractionWidget(widget.OWWidget):
                                         self,
                                         "Calculate",
                                         self.calculate)
+
+        # Result of the last calculation. Zooming out or refining it only calculates the new grid points.
+        self._previous_result = None
         
+    def calculationStart(self):
+        self.progressBarInit()
+
     def calculationProgress(self, current, total):
         percent = int(100*float(current)/float(total)) 
-        
-        if percent <= 11:
-            self.progressBarInit()
 
         self.progressBarSet(percent)
-        
-        if percent >= 99:
-            self.progressBarFinished()
+
+    def calculationEnd(self):
+        self.progressBarFinished()
         
     def calculate(self):        
         print(self.value_cbb_geometry_type)
@@ -198,16 +203,25 @@ class CrystalDiffractionWidget(widget.OWWidget):
         # Create a Diffraction object.
         diffraction = Diffraction()
 
+        # Resubmitted setups, e.g. after changing only plot settings, are served from the cache.
+        # Results of earlier sessions are loaded from the persistent store.
+        diffraction.setResultCache(diffraction_result_cache)
+        diffraction.setResultStore(result_store)
+
+        diffraction.setOnCalculationStart(self.calculationStart)
         diffraction.setOnProgress(self.calculationProgress)
+        diffraction.setOnCalculationEnd(self.calculationEnd)
 
         # Create a DiffractionResult object holding the results of the diffraction calculations.
         try:
-            res = diffraction.calculateDiffraction(diffraction_setup)
+            res = diffraction.calculateDiffractionIncremental(diffraction_setup, self._previous_result)
 
         except DiffractionException as de:
             self.showException(de)
             return
 
+        self._previous_result = res
+
         self.send("Plots", DiffractionResultPlotGenerator(res))
         #from PlotViewer2D import PlotViewer2D
         #pv = PlotViewer2D()